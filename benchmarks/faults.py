@@ -0,0 +1,230 @@
+"""
+    Descp: Fault injection for the local stand-ins of The Graph, Blockscout, CryptoCompare and Zenodo
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+
+from .server import BackgroundServer, JSONHandler, address
+
+# HTTP errors, a response cut in half, or an error reported by the API itself
+# (for The Graph, a GraphQL error that gql raises as TransportQueryError)
+FAULTS = ['429', '503', '504', 'truncated', 'error']
+
+DEFAULT_SCENARIOS = Path(__file__).parent / 'scenarios.json'
+
+class Scenario:
+    """ Describes how the stand-in APIs misbehave
+
+    Parameters:
+        name: to identify the scenario in the report
+        latency: median latency of every response, in seconds
+        latency_sigma: sigma of the log-normal latency distribution (0 is constant)
+        faults: probability of each of the FAULTS for every request
+        script: faults of the first requests, in order (None is a normal response).
+            Once consumed, the faults are chosen randomly
+        parallel: number of requesters running at the same time
+        err_sleep: seconds waited by the Blockscout collector after an error
+        config: settings to use while running the scenario, like PAGE_MAX_ATTEMPTS
+        seed: of the random number generator
+    """
+    def __init__(self,
+        name: str,
+        latency: float = 0,
+        latency_sigma: float = 0,
+        faults: Optional[dict[str, float]] = None,
+        script: Optional[list[Optional[str]]] = None,
+        parallel: int = 1,
+        err_sleep: float = 1,
+        config: Optional[dict[str, Any]] = None,
+        seed: int = 0,
+        description: str = '',
+    ):
+        self.name = name
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.faults = faults or {}
+        self.script = script or []
+        self.parallel = parallel
+        self.err_sleep = err_sleep
+        self.config = config or {}
+        self.seed = seed
+        self.description = description
+
+        if unknown := (set(self.faults) | set(self.script)) - set(FAULTS) - {None}:
+            raise ValueError(f"Unknown faults in scenario {name}: {unknown}")
+
+def load_scenarios(path: Path = DEFAULT_SCENARIOS) -> list[Scenario]:
+    with open(path, 'r') as f:
+        return [Scenario(**d) for d in json.load(f)]
+
+class FaultInjector:
+    """ Chooses the latency and fault of every request following a Scenario """
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.requests: int = 0
+        self.injected: Counter[str] = Counter()
+        self._rng = random.Random(scenario.seed)
+        self._lock = threading.Lock()
+
+    def _latency(self) -> float:
+        if self.scenario.latency <= 0:
+            return 0
+        return self._rng.lognormvariate(math.log(self.scenario.latency), self.scenario.latency_sigma)
+
+    def _random_fault(self) -> Optional[str]:
+        r = self._rng.random()
+        for fault, p in self.scenario.faults.items():
+            if r < p:
+                return fault
+            r -= p
+        return None
+
+    def inject(self) -> Optional[str]:
+        """ Waits the latency of the next request and returns its fault, if any """
+        with self._lock:
+            n = self.requests
+            self.requests += 1
+
+            fault = self.scenario.script[n] if n < len(self.scenario.script) else self._random_fault()
+            latency = self._latency()
+            if fault:
+                self.injected[fault] += 1
+
+        time.sleep(latency)
+        return fault
+
+# Number of ERC-20 tokens of every address in the Blockscout stand-in
+TOKENS_PER_ADDRESS = 5
+
+class _BlockscoutHandler(JSONHandler):
+    def respond(self) -> Any:
+        params = {k:v[0] for k,v in parse_qs(urlparse(self.path).query).items()}
+        if params.get('module') != 'account' or params.get('action') != 'tokenlist':
+            return {'status': '0', 'message': 'Unknown action', 'result': None}
+
+        seed = int(params['address'], 16)
+        return {'status': '1', 'message': 'OK', 'result': [{
+            'balance': str((seed + i) * 10**15),
+            'contractAddress': address(i),
+            'decimals': '18',
+            'name': f'Token {i}',
+            'symbol': f'T{i}',
+            'type': 'ERC-20',
+        } for i in range(TOKENS_PER_ADDRESS)]}
+
+    def error_response(self) -> Any:
+        return {'status': '0', 'message': 'Query Timeout', 'result': None}
+
+class BlockscoutServer(BackgroundServer):
+    """ Stand-in for the Blockscout API (`module=account&action=tokenlist`) """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, injector: Optional[FaultInjector] = None):
+        super().__init__(_BlockscoutHandler, host, port, injector)
+
+class _CryptoCompareHandler(JSONHandler):
+    def respond(self) -> Any:
+        url = urlparse(self.path)
+        params = {k:v[0] for k,v in parse_qs(url.query).items()}
+        if not url.path.endswith('/pricemulti'):
+            return {'Response': 'Error', 'Message': 'Path does not exist', 'HasWarning': False, 'Type': 90, 'Data': {}}
+
+        return {
+            fsym: {tsym: round(1 + i + j / 10, 2) for j, tsym in enumerate(params['tsyms'].split(','))}
+            for i, fsym in enumerate(params['fsyms'].split(','))
+        }
+
+    def error_response(self) -> Any:
+        return {'Response': 'Error', 'Message': 'You are over your rate limit', 'HasWarning': False, 'Type': 99, 'Data': {}}
+
+class CryptoCompareServer(BackgroundServer):
+    """ Stand-in for the CryptoCompare API (`pricemulti`), use `url + 'data/'` as BASEURL """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, injector: Optional[FaultInjector] = None):
+        super().__init__(_CryptoCompareHandler, host, port, injector)
+
+class _ZenodoHandler(JSONHandler):
+    server: 'ZenodoServer'
+
+    def respond(self) -> Any:
+        path = urlparse(self.path).path.strip('/').split('/')
+        with self.server.lock:
+            return self.server.route(self.command, path, self._body)
+
+class ZenodoServer(BackgroundServer):
+    """ Stand-in for the deposition API of Zenodo, use `url + 'api/'` as base url
+
+    Starts with a published deposition with id 1, with the files of `files`.
+    """
+    def __init__(self, files: Optional[dict[str, bytes]] = None, host: str = '127.0.0.1', port: int = 0, injector: Optional[FaultInjector] = None):
+        super().__init__(_ZenodoHandler, host, port, injector)
+        self.lock = threading.Lock()
+        self.depositions: dict[int, dict[str, Any]] = {}
+        self.contents: dict[int, dict[str, bytes]] = {}
+        # Number of successful uploads of every file name
+        self.uploads: Counter[str] = Counter()
+
+        self._new_deposition({'title': 'DAO Analyzer', 'version': '1'}, files or {})
+        self.depositions[1]['submitted'] = True
+
+    def _new_deposition(self, metadata: dict[str, Any], files: dict[str, bytes]) -> dict[str, Any]:
+        i = len(self.depositions) + 1
+        self.depositions[i] = {'id': i, 'submitted': False, 'metadata': dict(metadata)}
+        self.contents[i] = dict(files)
+        return self.depositions[i]
+
+    def deposition(self, i: int) -> dict[str, Any]:
+        api = f'{self.url}api/'
+        return self.depositions[i] | {
+            'files': [self._file(i, name) for name in self.contents[i]],
+            'links': {
+                'self': f'{api}deposit/depositions/{i}',
+                'bucket': f'{api}files/{i}',
+                'latest_draft': f'{api}deposit/depositions/{len(self.depositions)}',
+            },
+        }
+
+    def _file(self, i: int, name: str) -> dict[str, Any]:
+        return {
+            'id': name,
+            'filename': name,
+            'filesize': len(self.contents[i][name]),
+            'checksum': hashlib.md5(self.contents[i][name]).hexdigest(),
+            'links': {'self': f'{self.url}api/deposit/depositions/{i}/files/{name}'},
+        }
+
+    def route(self, method: str, path: list[str], body: bytes) -> Any:
+        match method, path:
+            case 'GET', ['api', 'deposit', 'depositions', i]:
+                return self.deposition(int(i))
+            case 'PUT', ['api', 'deposit', 'depositions', i]:
+                self.depositions[int(i)]['metadata'] = json.loads(body)['metadata']
+                return self.deposition(int(i))
+            case 'POST', ['api', 'deposit', 'depositions', i, 'actions', 'newversion']:
+                prev = self.depositions[int(i)]
+                self._new_deposition(prev['metadata'], self.contents[int(i)])
+                return self.deposition(int(i))
+            case 'POST', ['api', 'deposit', 'depositions', i, 'actions', 'publish']:
+                self.depositions[int(i)]['submitted'] = True
+                return self.deposition(int(i))
+            case 'GET', ['api', 'deposit', 'depositions', i, 'files']:
+                return [self._file(int(i), name) for name in self.contents[int(i)]]
+            case 'DELETE', ['api', 'deposit', 'depositions', i, 'files', name]:
+                del self.contents[int(i)][name]
+                return None
+            case 'PUT', ['api', 'files', i, name]:
+                self.contents[int(i)][name] = body
+                self.uploads[name] += 1
+                return {'key': name, 'size': len(body), 'checksum': f'md5:{hashlib.md5(body).hexdigest()}'}
+
+        return {'message': f'Unknown route {method} {"/".join(path)}'}
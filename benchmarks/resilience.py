@@ -0,0 +1,224 @@
+"""
+    Descp: Runs the requesters against faulty stand-ins of the APIs, and reports
+    their tail latency and total run time
+
+    Usage: python -m benchmarks.resilience --targets graphql blockscout -o resilience.json
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+import argparse
+import json
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .faults import BlockscoutServer, CryptoCompareServer, FaultInjector, Scenario, load_scenarios, DEFAULT_SCENARIOS
+from .server import SubgraphServer
+
+NETWORK = 'mainnet'
+PERCENTILES = [50, 95, 99]
+
+class LatencyRecorder:
+    """ Wraps functions to record the latency of every (non reentrant) call """
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.failures: int = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def wrap(self, f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            # Retries calling themselves are part of the same call
+            if getattr(self._local, 'inside', False):
+                return f(*args, **kwargs)
+
+            self._local.inside = True
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+            finally:
+                self._local.inside = False
+                with self._lock:
+                    self.latencies.append(time.perf_counter() - start)
+
+        return wrapper
+
+    def percentiles(self) -> dict[str, Optional[float]]:
+        if not self.latencies:
+            return {f'p{p}': None for p in PERCENTILES}
+        return {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(self.latencies, PERCENTILES))}
+
+@contextmanager
+def scenario_config(scenario: Scenario) -> Iterator[None]:
+    """ Applies the settings of the scenario, and starts with a fresh retry budget and scheduler """
+    from dao_analyzer.cache_scripts import config
+    from dao_analyzer.cache_scripts.common import api_requester
+
+    settings = config.get_settings()
+    prev = {k:settings.get(k) for k in scenario.config}
+    for k, v in scenario.config.items():
+        settings.set(k, v)
+
+    api_requester._retry_budget = None
+    api_requester._scheduler = None
+    try:
+        yield
+    finally:
+        api_requester.close_clients()
+        for k, v in prev.items():
+            settings.set(k, v)
+
+def _members_query(requester):
+    ds = requester.get_schema()
+    return lambda **kwargs: ds.Query.members(**kwargs).select(ds.Member.id, ds.Member.shares)
+
+def run_graphql(scenario: Scenario, injector: FaultInjector, recorder: LatencyRecorder, stack: ExitStack, rows: int = 5000):
+    """ Requests every page of a subgraph with `scenario.parallel` GQLRequesters """
+    from dao_analyzer.cache_scripts.common.api_requester import GQLRequester
+
+    # The schema is requested without faults
+    server = stack.enter_context(SubgraphServer(rows))
+    requesters = [GQLRequester(server.url, pbar_enabled=False) for _ in range(scenario.parallel)]
+    queries = [_members_query(r) for r in requesters]
+
+    server.injector = injector
+    for r in requesters:
+        r.request_page = recorder.wrap(r.request_page)
+
+    with ThreadPoolExecutor(scenario.parallel) as executor:
+        for data in executor.map(lambda rq: rq[0].n_requests(query=rq[1]), zip(requesters, queries)):
+            assert len(data) == rows, f"Received {len(data)} rows instead of {rows}"
+
+def run_cryptocompare(scenario: Scenario, injector: FaultInjector, recorder: LatencyRecorder, stack: ExitStack, symbols: int = 500):
+    """ Requests the prices of many symbols with `scenario.parallel` CryptoCompareRequesters """
+    from dao_analyzer.cache_scripts.common.api_requester import CryptoCompareRequester
+
+    server = stack.enter_context(CryptoCompareServer(injector=injector))
+
+    requesters = [CryptoCompareRequester(api_key='benchmark', pbar_enabled=False) for _ in range(scenario.parallel)]
+    for r in requesters:
+        r.BASEURL = server.url + 'data/'
+        r._request = recorder.wrap(r._request)
+        r.pbar = lambda x: x
+
+    fsyms = [f'T{i}' for i in range(symbols)]
+    with ThreadPoolExecutor(scenario.parallel) as executor:
+        list(executor.map(lambda r: r.get_symbols_price(fsyms), requesters))
+
+class _Addresses:
+    """ Base collector of the balances collector """
+    def __init__(self, n: int):
+        self.df = pd.DataFrame({'id': [f'0x{i:040x}' for i in range(n)]})
+
+class _Runner:
+    name = 'resilience'
+
+    def __init__(self, dw: Path):
+        self.basedir = dw
+        self.cache = dw / '.cache'
+
+def run_blockscout(scenario: Scenario, injector: FaultInjector, recorder: LatencyRecorder, stack: ExitStack, addresses: int = 100):
+    """ Runs `scenario.parallel` BlockscoutBallancesCollectors, with a healthy CryptoCompare """
+    from dao_analyzer.cache_scripts.common import ENDPOINTS
+    from dao_analyzer.cache_scripts.common.api_requester import CryptoCompareRequester
+    from dao_analyzer.cache_scripts.common.blockscout import BlockscoutBallancesCollector
+
+    server = stack.enter_context(BlockscoutServer(injector=injector))
+    cc_server = stack.enter_context(CryptoCompareServer())
+    dw = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix='resilience_dw_')))
+
+    prev_endpoint, prev_baseurl = ENDPOINTS[NETWORK]['blockscout'], CryptoCompareRequester.BASEURL
+    ENDPOINTS[NETWORK]['blockscout'], CryptoCompareRequester.BASEURL = server.url, cc_server.url + 'data/'
+
+    @stack.callback
+    def _restore():
+        ENDPOINTS[NETWORK]['blockscout'], CryptoCompareRequester.BASEURL = prev_endpoint, prev_baseurl
+
+    collectors = []
+    for i in range(scenario.parallel):
+        c = BlockscoutBallancesCollector(_Runner(dw), base=_Addresses(addresses), name=f'tokenBalances{i}', network=NETWORK)
+        c.ERR_SLEEP = scenario.err_sleep
+        c._get_from_address = recorder.wrap(c._get_from_address)
+        collectors.append(c)
+
+    with ThreadPoolExecutor(scenario.parallel) as executor:
+        list(executor.map(lambda c: c.run(force=True), collectors))
+
+TARGETS: dict[str, Callable[[Scenario, FaultInjector, LatencyRecorder, ExitStack], None]] = {
+    'graphql': run_graphql,
+    'blockscout': run_blockscout,
+    'cryptocompare': run_cryptocompare,
+}
+
+def run_scenario(target: str, scenario: Scenario) -> dict[str, Any]:
+    recorder = LatencyRecorder()
+    injector = FaultInjector(scenario)
+    error: Optional[str] = None
+
+    start = time.perf_counter()
+    with scenario_config(scenario), ExitStack() as stack:
+        try:
+            TARGETS[target](scenario, injector, recorder, stack)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+    total = time.perf_counter() - start
+
+    return {
+        'target': target,
+        'scenario': scenario.name,
+        'total_seconds': total,
+        'error': error,
+        'calls': len(recorder.latencies),
+        'failed_calls': recorder.failures,
+        **recorder.percentiles(),
+        'server_requests': injector.requests,
+        'injected': dict(injector.injected),
+    }
+
+def run_resilience(scenarios: list[Scenario], targets: list[str] = list(TARGETS)) -> dict[str, Any]:
+    results = []
+    for scenario in scenarios:
+        for target in targets:
+            print(f"Running {target} with scenario {scenario.name}")
+            results.append(run_scenario(target, scenario))
+
+    return {
+        'date': datetime.now(timezone.utc).isoformat(),
+        'results': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', type=Path, default=DEFAULT_SCENARIOS, help='JSON file with a list of scenarios')
+    parser.add_argument('--only', nargs='+', help='Names of the scenarios to run')
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('-o', '--output', type=Path, default=Path('resilience.json'))
+    args = parser.parse_args()
+
+    scenarios = [s for s in load_scenarios(args.scenarios) if not args.only or s.name in args.only]
+    report = run_resilience(scenarios, args.targets)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    with pd.option_context('display.width', None, 'display.float_format', '{:.3f}'.format):
+        print(pd.DataFrame(report['results']).set_index(['target', 'scenario']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,699 @@
+"""
+    Descp: Local stand-in for The Graph gateway serving synthetic DAO data
+
+    The daohaus, aragon and daostack subgraphs can be served, with the
+    entities of their collectors and the fields they request.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import json
+import threading
+import time
+
+from graphql import build_schema, graphql_sync
+
+if TYPE_CHECKING:
+    from .faults import FaultInjector
+
+# Types of every subgraph, used by the collectors
+COMMON_SDL = """
+scalar BigInt
+scalar Bytes
+
+input Block_height { hash: Bytes, number: Int }
+input BlockChangedFilter { number_gte: Int! }
+
+type _Block_ { hash: Bytes, number: Int!, timestamp: Int }
+type _Meta_ { block: _Block_!, deployment: String!, hasIndexingErrors: Boolean! }
+
+"""
+
+# Subsets of the schemas of the subgraphs used by the collectors
+DAOHAUS_SDL = """
+input Entity_filter {
+    id_gt: ID
+    _change_block: BlockChangedFilter
+    deleted: Boolean
+    guildBank: Boolean
+    tokenBalance_gt: BigInt
+}
+
+type Moloch {
+    id: ID!
+    version: String
+    summoner: Bytes!
+    summoningTime: BigInt!
+    createdAt: String!
+    totalShares: BigInt!
+    guildBankAddress: Bytes
+    totalLoot: BigInt!
+    deleted: Boolean!
+}
+
+type Member {
+    id: ID!
+    createdAt: String!
+    molochAddress: Bytes!
+    memberAddress: Bytes!
+    shares: BigInt!
+    loot: BigInt
+    exists: Boolean!
+    tokenTribute: BigInt!
+    didRagequit: Boolean!
+}
+
+type Proposal {
+    id: ID!
+    createdAt: String!
+    proposalId: BigInt!
+    molochAddress: Bytes!
+    memberAddress: Bytes!
+    proposer: Bytes!
+    sponsor: Bytes
+    sharesRequested: BigInt!
+    lootRequested: BigInt
+    tributeOffered: BigInt!
+    paymentRequested: BigInt!
+    yesVotes: BigInt!
+    noVotes: BigInt!
+    sponsored: Boolean!
+    sponsoredAt: String
+    processed: Boolean!
+    processedAt: String
+    didPass: Boolean!
+    yesShares: BigInt!
+    noShares: BigInt!
+    details: String!
+}
+
+type RageQuit {
+    id: ID!
+    createdAt: String!
+    molochAddress: Bytes!
+    memberAddress: Bytes!
+    shares: BigInt!
+    loot: BigInt!
+}
+
+type Token { id: ID!, tokenAddress: Bytes!, symbol: String, decimals: BigInt }
+
+type TokenBalance {
+    id: ID!
+    moloch: Moloch!
+    token: Token!
+    guildBank: Boolean!
+    memberBank: Boolean!
+    ecrowBank: Boolean!
+    tokenBalance: BigInt!
+}
+
+type Vote {
+    id: ID!
+    createdAt: String!
+    proposal: Proposal!
+    molochAddress: Bytes!
+    memberAddress: Bytes!
+    memberPower: BigInt
+    uintVote: Int!
+}
+
+type Query {
+    _meta(block: Block_height): _Meta_
+    moloches(first: Int = 100, where: Entity_filter, block: Block_height): [Moloch!]!
+    members(first: Int = 100, where: Entity_filter, block: Block_height): [Member!]!
+    proposals(first: Int = 100, where: Entity_filter, block: Block_height): [Proposal!]!
+    rageQuits(first: Int = 100, where: Entity_filter, block: Block_height): [RageQuit!]!
+    tokenBalances(first: Int = 100, where: Entity_filter, block: Block_height): [TokenBalance!]!
+    votes(first: Int = 100, where: Entity_filter, block: Block_height): [Vote!]!
+}
+"""
+
+# The apps, organizations and repos are in the aragon subgraph, the casts and
+# votes in aragon_voting, the tokens in aragon_tokens and the transactions in
+# aragon_finance. Their entities don't overlap, so they are served together.
+ARAGON_SDL = """
+input Entity_filter {
+    id_gt: ID
+    _change_block: BlockChangedFilter
+}
+
+type Organization { id: ID!, createdAt: BigInt!, recoveryVault: Bytes }
+
+type App {
+    id: ID!
+    isForwarder: Boolean
+    isUpgradeable: Boolean
+    repoName: String
+    repoAddress: Bytes
+    organization: Organization!
+}
+
+type Repo { id: ID!, address: Bytes!, name: String!, node: Bytes!, appCount: Int! }
+
+type Voter { id: ID! }
+
+type Vote {
+    id: ID!
+    orgAddress: Bytes!
+    appAddress: Bytes!
+    creator: Bytes!
+    originalCreator: Bytes!
+    metadata: String!
+    executed: Boolean!
+    executedAt: BigInt!
+    startDate: BigInt!
+    supportRequiredPct: BigInt!
+    minAcceptQuorum: BigInt!
+    yea: BigInt!
+    nay: BigInt!
+    voteNum: BigInt!
+    votingPower: BigInt!
+}
+
+type Cast {
+    id: ID!
+    vote: Vote!
+    voter: Voter!
+    supports: Boolean!
+    stake: BigInt!
+    createdAt: BigInt!
+}
+
+type MiniMeToken {
+    id: ID!
+    address: Bytes!
+    totalSupply: BigInt!
+    transferable: Boolean!
+    name: String!
+    symbol: String!
+    orgAddress: Bytes!
+    appAddress: Bytes!
+    lastUpdateAt: BigInt!
+}
+
+type TokenHolder { id: ID!, address: Bytes!, tokenAddress: Bytes!, lastUpdateAt: BigInt!, balance: BigInt! }
+
+type Transaction {
+    id: ID!
+    orgAddress: Bytes!
+    appAddress: Bytes!
+    token: Bytes!
+    entity: Bytes!
+    isIncoming: Boolean!
+    amount: BigInt
+    date: BigInt!
+    reference: String!
+}
+
+type Query {
+    _meta(block: Block_height): _Meta_
+    apps(first: Int = 100, where: Entity_filter, block: Block_height): [App!]!
+    organizations(first: Int = 100, where: Entity_filter, block: Block_height): [Organization!]!
+    repos(first: Int = 100, where: Entity_filter, block: Block_height): [Repo!]!
+    casts(first: Int = 100, where: Entity_filter, block: Block_height): [Cast!]!
+    votes(first: Int = 100, where: Entity_filter, block: Block_height): [Vote!]!
+    miniMeTokens(first: Int = 100, where: Entity_filter, block: Block_height): [MiniMeToken!]!
+    tokenHolders(first: Int = 100, where: Entity_filter, block: Block_height): [TokenHolder!]!
+    transactions(first: Int = 100, where: Entity_filter, block: Block_height): [Transaction!]!
+}
+"""
+
+DAOSTACK_SDL = """
+input Entity_filter {
+    id_gt: ID
+    _change_block: BlockChangedFilter
+    register: String
+    amount_not: BigInt
+}
+
+type Token { id: ID! }
+type Rep { id: ID! }
+
+type DAO { id: ID!, name: String!, register: String!, nativeToken: Token!, nativeReputation: Rep! }
+
+type GenesisProtocolParam {
+    queuedVoteRequiredPercentage: BigInt!
+    queuedVotePeriodLimit: BigInt!
+    boostedVotePeriodLimit: BigInt!
+    thresholdConst: BigInt!
+    minimumDaoBounty: BigInt!
+    daoBountyConst: BigInt!
+}
+
+type CompetitionProposal { id: ID! }
+
+type Proposal {
+    id: ID!
+    proposer: Bytes!
+    stage: String!
+    createdAt: BigInt!
+    preBoostedAt: BigInt
+    boostedAt: BigInt
+    quietEndingPeriodBeganAt: BigInt
+    closingAt: BigInt
+    preBoostedClosingAt: BigInt
+    executedAt: BigInt
+    totalRepWhenExecuted: BigInt
+    totalRepWhenCreated: BigInt
+    executionState: String!
+    expiresInQueueAt: BigInt!
+    votesFor: BigInt!
+    votesAgainst: BigInt!
+    winningOutcome: String!
+    stakesFor: BigInt!
+    stakesAgainst: BigInt!
+    title: String
+    description: String
+    url: String
+    confidence: String!
+    confidenceThreshold: BigInt!
+    genesisProtocolParams: GenesisProtocolParam!
+    dao: DAO!
+    competition: CompetitionProposal
+}
+
+type ReputationHolder { id: ID!, contract: Bytes!, address: Bytes!, balance: BigInt!, createdAt: BigInt!, dao: DAO! }
+
+type ProposalStake {
+    id: ID!
+    createdAt: BigInt!
+    staker: Bytes!
+    outcome: String!
+    amount: BigInt!
+    dao: DAO!
+    proposal: Proposal!
+}
+
+type ProposalVote {
+    id: ID!
+    createdAt: BigInt!
+    voter: Bytes!
+    outcome: String!
+    reputation: BigInt!
+    dao: DAO!
+    proposal: Proposal!
+}
+
+type ReputationMint { id: ID!, contract: Bytes!, address: Bytes!, amount: BigInt!, createdAt: BigInt! }
+type ReputationBurn { id: ID!, contract: Bytes!, address: Bytes!, amount: BigInt!, createdAt: BigInt! }
+
+type Query {
+    _meta(block: Block_height): _Meta_
+    daos(first: Int = 100, where: Entity_filter, block: Block_height): [DAO!]!
+    proposals(first: Int = 100, where: Entity_filter, block: Block_height): [Proposal!]!
+    reputationHolders(first: Int = 100, where: Entity_filter, block: Block_height): [ReputationHolder!]!
+    proposalStakes(first: Int = 100, where: Entity_filter, block: Block_height): [ProposalStake!]!
+    proposalVotes(first: Int = 100, where: Entity_filter, block: Block_height): [ProposalVote!]!
+    reputationMints(first: Int = 100, where: Entity_filter, block: Block_height): [ReputationMint!]!
+    reputationBurns(first: Int = 100, where: Entity_filter, block: Block_height): [ReputationBurn!]!
+}
+"""
+
+# Every block changes this number of rows of each entity
+ROWS_PER_BLOCK = 10
+# Number of rows per DAO, to obtain a realistic number of DAOs
+ROWS_PER_DAO = 100
+BASE_TIMESTAMP = 1_600_000_000
+
+def address(i: int) -> str:
+    return f'0x{i:040x}'
+
+def _block_hash(number: int) -> str:
+    return f'0x{number:064x}'
+
+def _timestamp(i: int) -> str:
+    return str(BASE_TIMESTAMP + i // ROWS_PER_BLOCK * 12)
+
+def _moloch(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'version': '2', 'summoner': address(i + 1),
+        'summoningTime': _timestamp(i), 'createdAt': _timestamp(i),
+        'totalShares': str(i * 100), 'guildBankAddress': address(i + 2),
+        'totalLoot': str(i), 'deleted': False,
+    }
+
+def _member(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'molochAddress': address(i // ROWS_PER_DAO),
+        'memberAddress': address(i * 7), 'shares': str(i % 1000), 'loot': str(i % 10),
+        'exists': i % 5 != 0, 'tokenTribute': '0', 'didRagequit': i % 50 == 0,
+    }
+
+def _proposal(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'proposalId': str(i % ROWS_PER_DAO),
+        'molochAddress': address(i // ROWS_PER_DAO), 'memberAddress': address(i * 7),
+        'proposer': address(i * 3), 'sponsor': address(i * 5) if i % 3 else None,
+        'sharesRequested': str(i % 100), 'lootRequested': '0', 'tributeOffered': str(i * 10**15),
+        'paymentRequested': '0', 'yesVotes': str(i % 7), 'noVotes': str(i % 3),
+        'sponsored': bool(i % 3), 'sponsoredAt': _timestamp(i) if i % 3 else None,
+        'processed': bool(i % 2), 'processedAt': _timestamp(i) if i % 2 else None,
+        'didPass': bool(i % 4), 'yesShares': str(i % 1000), 'noShares': str(i % 100),
+        'details': f'{{"title": "Proposal {i}", "description": "Synthetic proposal"}}',
+    }
+
+def _rage_quit(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'molochAddress': address(i // ROWS_PER_DAO),
+        'memberAddress': address(i * 7), 'shares': str(i % 1000), 'loot': str(i % 10),
+    }
+
+def _token_balance(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'moloch': _moloch(i // ROWS_PER_DAO),
+        'token': {'id': address(i % 20), 'tokenAddress': address(i % 20), 'symbol': f'T{i % 20}', 'decimals': '18'},
+        'guildBank': True, 'memberBank': False, 'ecrowBank': False, 'tokenBalance': str(i * 10**15 + 1),
+    }
+
+def _vote(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'proposal': _proposal(i // 10),
+        'molochAddress': address(i // ROWS_PER_DAO), 'memberAddress': address(i * 7),
+        'memberPower': str(i % 1000), 'uintVote': 1 + i % 2,
+    }
+
+DAOHAUS_ENTITIES: dict[str, Callable[[int], dict[str, Any]]] = {
+    'moloches': _moloch,
+    'members': _member,
+    'proposals': _proposal,
+    'rageQuits': _rage_quit,
+    'tokenBalances': _token_balance,
+    'votes': _vote,
+}
+
+def _organization(i: int) -> dict[str, Any]:
+    return {'id': address(i), 'createdAt': _timestamp(i), 'recoveryVault': address(i + 1)}
+
+def _app(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'isForwarder': i % 2 == 0, 'isUpgradeable': True,
+        'repoName': f'app{i % 10}', 'repoAddress': address(i % 10),
+        'organization': {'id': address(i // ROWS_PER_DAO)},
+    }
+
+def _repo(i: int) -> dict[str, Any]:
+    return {'id': address(i), 'address': address(i), 'name': f'app{i}', 'node': _block_hash(i), 'appCount': i % 100}
+
+def _aragon_vote(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'orgAddress': address(i // ROWS_PER_DAO), 'appAddress': address(i // ROWS_PER_DAO + 1),
+        'creator': address(i * 3), 'originalCreator': address(i * 3), 'metadata': f'Vote {i}',
+        'executed': bool(i % 2), 'executedAt': _timestamp(i) if i % 2 else '0', 'startDate': _timestamp(i),
+        'supportRequiredPct': str(5 * 10**17), 'minAcceptQuorum': str(10**17),
+        'yea': str(i % 1000 * 10**18), 'nay': str(i % 100 * 10**18), 'voteNum': str(i % ROWS_PER_DAO),
+        'votingPower': str(10**21),
+    }
+
+def _cast(i: int) -> dict[str, Any]:
+    vote = _aragon_vote(i // 10)
+    return {
+        'id': address(i), 'voter': {'id': address(i * 7)}, 'supports': i % 3 != 0,
+        'stake': str(i % 1000 * 10**18), 'createdAt': _timestamp(i),
+        'vote': {k: vote[k] for k in ['id', 'orgAddress', 'appAddress']},
+    }
+
+def _minime_token(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'address': address(i), 'totalSupply': str(10**24), 'transferable': True,
+        'name': f'Token {i}', 'symbol': f'T{i}', 'orgAddress': address(i), 'appAddress': address(i + 1),
+        'lastUpdateAt': _timestamp(i),
+    }
+
+def _token_holder(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'address': address(i * 7), 'tokenAddress': address(i // ROWS_PER_DAO),
+        'lastUpdateAt': _timestamp(i), 'balance': str(i % 1000 * 10**18),
+    }
+
+def _transaction(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'orgAddress': address(i // ROWS_PER_DAO), 'appAddress': address(i // ROWS_PER_DAO + 1),
+        'token': address(i % 20), 'entity': address(i * 7), 'isIncoming': bool(i % 2),
+        'amount': str(i * 10**15), 'date': _timestamp(i), 'reference': f'Payment {i}',
+    }
+
+ARAGON_ENTITIES: dict[str, Callable[[int], dict[str, Any]]] = {
+    'apps': _app,
+    'organizations': _organization,
+    'repos': _repo,
+    'casts': _cast,
+    'votes': _aragon_vote,
+    'miniMeTokens': _minime_token,
+    'tokenHolders': _token_holder,
+    'transactions': _transaction,
+}
+
+def _reputation(dao: int) -> str:
+    """ Address of the reputation contract of a DAO """
+    return address(dao + 16**39)
+
+def _dao(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'name': f'DAO {i}', 'register': 'registered',
+        'nativeToken': {'id': address(i + 16**38)}, 'nativeReputation': {'id': _reputation(i)},
+    }
+
+def _daostack_proposal(i: int) -> dict[str, Any]:
+    executed = _timestamp(i) if i % 2 else None
+    return {
+        'id': _block_hash(i), 'proposer': address(i * 3), 'stage': ['Executed', 'Queued', 'Boosted'][i % 3],
+        'createdAt': _timestamp(i), 'preBoostedAt': None, 'boostedAt': _timestamp(i) if i % 3 == 2 else None,
+        'quietEndingPeriodBeganAt': None, 'closingAt': _timestamp(i + 100), 'preBoostedClosingAt': None,
+        'executedAt': executed, 'totalRepWhenExecuted': str(10**21) if executed else None,
+        'totalRepWhenCreated': str(10**21), 'executionState': 'BoostedBarCrossed' if executed else 'None',
+        'expiresInQueueAt': _timestamp(i + 1000), 'votesFor': str(i % 1000 * 10**18), 'votesAgainst': str(i % 100 * 10**18),
+        'winningOutcome': 'Pass' if i % 4 else 'Fail', 'stakesFor': str(i * 10**15), 'stakesAgainst': '0',
+        'title': f'Proposal {i}', 'description': 'Synthetic proposal', 'url': None,
+        'confidence': '1.5', 'confidenceThreshold': str(2**40),
+        'genesisProtocolParams': {
+            'queuedVoteRequiredPercentage': '50', 'queuedVotePeriodLimit': '2592000',
+            'boostedVotePeriodLimit': '345600', 'thresholdConst': '2000',
+            'minimumDaoBounty': str(10**20), 'daoBountyConst': '10',
+        },
+        'dao': {'id': address(i // ROWS_PER_DAO)}, 'competition': None,
+    }
+
+def _reputation_holder(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'contract': _reputation(i // ROWS_PER_DAO), 'address': address(i * 7),
+        'balance': str(i % 1000 * 10**18), 'createdAt': _timestamp(i), 'dao': {'id': address(i // ROWS_PER_DAO)},
+    }
+
+def _stake(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'staker': address(i * 7),
+        'outcome': 'Pass' if i % 3 else 'Fail', 'amount': str(i * 10**15),
+        'dao': {'id': address(i // ROWS_PER_DAO)}, 'proposal': {'id': _block_hash(i // 10)},
+    }
+
+def _proposal_vote(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'createdAt': _timestamp(i), 'voter': address(i * 7),
+        'outcome': 'Pass' if i % 3 else 'Fail', 'reputation': str(i % 1000 * 10**18),
+        'dao': {'id': address(i // ROWS_PER_DAO)}, 'proposal': {'id': _block_hash(i // 10)},
+    }
+
+def _reputation_event(i: int) -> dict[str, Any]:
+    return {
+        'id': address(i), 'contract': _reputation(i // ROWS_PER_DAO), 'address': address(i * 7),
+        'amount': str((i % 1000 + 1) * 10**18), 'createdAt': _timestamp(i),
+    }
+
+DAOSTACK_ENTITIES: dict[str, Callable[[int], dict[str, Any]]] = {
+    'daos': _dao,
+    'proposals': _daostack_proposal,
+    'reputationHolders': _reputation_holder,
+    'proposalStakes': _stake,
+    'proposalVotes': _proposal_vote,
+    'reputationMints': _reputation_event,
+    'reputationBurns': _reputation_event,
+}
+
+class Subgraph:
+    """ Schema and row generators of a subgraph, and the ENDPOINTS keys it replaces """
+    def __init__(self, sdl: str, entities: dict[str, Callable[[int], dict[str, Any]]], endpoints: list[str]):
+        self.schema = build_schema(COMMON_SDL + sdl)
+        self.entities = entities
+        self.endpoints = endpoints
+
+SUBGRAPHS: dict[str, Subgraph] = {
+    'daohaus': Subgraph(DAOHAUS_SDL, DAOHAUS_ENTITIES, ['daohaus']),
+    'aragon': Subgraph(ARAGON_SDL, ARAGON_ENTITIES, ['aragon', 'aragon_voting', 'aragon_tokens', 'aragon_finance']),
+    'daostack': Subgraph(DAOSTACK_SDL, DAOSTACK_ENTITIES, ['daostack']),
+}
+
+class SyntheticSubgraph:
+    """ Generates the rows of every entity by their index, without storing them
+
+    The row `i` of every entity has an id ordered by `i` (usually `address(i)`)
+    and was last changed in the block `i // ROWS_PER_BLOCK + 1`.
+    """
+    def __init__(self, rows: int, entities: dict[str, Callable[[int], dict[str, Any]]] = DAOHAUS_ENTITIES):
+        self.rows = rows
+        self.entities = entities
+
+    @property
+    def head(self) -> int:
+        return (self.rows - 1) // ROWS_PER_BLOCK + 1
+
+    def _block_number(self, block: Optional[dict]) -> int:
+        if not block:
+            return self.head
+        if block.get('hash'):
+            return int(block['hash'], 16)
+        return block['number']
+
+    def meta(self, _info, block: Optional[dict] = None) -> dict[str, Any]:
+        number = self._block_number(block)
+        return {
+            'deployment': 'QmBenchmark',
+            'hasIndexingErrors': False,
+            'block': {'hash': _block_hash(number), 'number': number, 'timestamp': BASE_TIMESTAMP + number * 12},
+        }
+
+    def resolver(self, entity: str):
+        make_row = self.entities[entity]
+
+        def resolve(_info, first: int = 100, where: Optional[dict] = None, block: Optional[dict] = None):
+            where = where or {}
+            start = int(where['id_gt'], 16) + 1 if where.get('id_gt') else 0
+            if '_change_block' in where:
+                start = max(start, (where['_change_block']['number_gte'] - 1) * ROWS_PER_BLOCK)
+            end = min(self.rows, self._block_number(block) * ROWS_PER_BLOCK, start + first)
+
+            return [make_row(i) for i in range(start, end)]
+
+        return resolve
+
+    def root(self) -> dict[str, Any]:
+        return {'_meta': self.meta} | {e: self.resolver(e) for e in self.entities}
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """ Answers every request with the JSON returned by `respond`
+
+    If the server has a fault injector, the faults are applied before responding
+    """
+    protocol_version = 'HTTP/1.1'
+    server: 'BackgroundServer'
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self) -> Any:
+        raise NotImplementedError
+
+    def error_response(self) -> Any:
+        """ Response of the API when it fails while processing the request """
+        return {'error': 'Internal error'}
+
+    def json_body(self) -> Any:
+        return json.loads(self._body)
+
+    def _handle(self):
+        # Always read the body, even if we fail, to keep the connection usable
+        self._body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        fault = self.server.injector.inject() if self.server.injector else None
+
+        start = time.perf_counter()
+        status = HTTPStatus.OK
+        if fault and fault.isdigit():
+            status = HTTPStatus(int(fault))
+            body = {'message': status.phrase}
+        elif fault == 'error':
+            body = self.error_response()
+        else:
+            body = self.respond()
+
+        out = json.dumps(body).encode()
+        if fault == 'truncated':
+            out = out[:len(out) // 2]
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+        self.server.add_busy(time.perf_counter() - start)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+class BackgroundServer(ThreadingHTTPServer):
+    """ HTTP server running in a background thread while inside the context """
+    daemon_threads = True
+
+    def __init__(self, handler: type[JSONHandler], host: str = '127.0.0.1', port: int = 0, injector: Optional['FaultInjector'] = None):
+        super().__init__((host, port), handler)
+        self.injector = injector
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._lock = threading.Lock()
+        # Time spent generating the responses, to tell apart the client's throughput
+        self.busy_seconds: float = 0
+
+    def add_busy(self, seconds: float):
+        with self._lock:
+            self.busy_seconds += seconds
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+class _SubgraphHandler(JSONHandler):
+    server: 'SubgraphServer'
+
+    def respond(self) -> Any:
+        body = self.json_body()
+        result = graphql_sync(
+            self.server.schema,
+            body['query'],
+            root_value=self.server.root,
+            variable_values=body.get('variables'),
+        )
+
+        response = {'data': result.data}
+        if result.errors:
+            response['errors'] = [{'message': e.message} for e in result.errors]
+        return response
+
+    def error_response(self) -> Any:
+        return {'errors': [{'message': 'Store error: database unavailable'}]}
+
+class SubgraphServer(BackgroundServer):
+    """ Serves a SyntheticSubgraph of `rows` rows per entity in a background thread
+
+    The schema is the one of the subgraphs of `platform` (see SUBGRAPHS)
+
+    Usage:
+        with SubgraphServer(rows=10_000) as server:
+            requests.post(server.url, ...)
+    """
+    def __init__(self, rows: int, host: str = '127.0.0.1', port: int = 0, injector: Optional['FaultInjector'] = None, platform: str = 'daohaus'):
+        super().__init__(_SubgraphHandler, host, port, injector)
+        self.schema = SUBGRAPHS[platform].schema
+        self.subgraph = SyntheticSubgraph(rows, SUBGRAPHS[platform].entities)
+        self.root = self.subgraph.root()
@@ -0,0 +1,243 @@
+"""
+    Descp: Micro-benchmarks of Collector._update_data, the write path of every collector
+
+    Usage: python -m benchmarks.storage --rows 10k 100k 1M --update-ratios 0.01 0.5 -o storage.json
+
+    The table layouts (column mix, number of DAOs and networks, key skew) are
+    drawn with hypothesis, and then scaled to the requested size with numpy.
+    Every layout is written and read with storage.write_df and read_df, with
+    each of the ENCODINGS of the .arr files.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+import argparse
+import json
+import platform
+import tempfile
+import time
+
+from hypothesis import HealthCheck, Phase, given, seed, settings, strategies as st
+import numpy as np
+import pandas as pd
+
+from .throughput import parse_rows
+
+COLUMN_KINDS = ['address', 'bigint', 'timestamp', 'bool', 'int', 'float', 'category', 'text']
+NETWORKS = ['mainnet', 'xdai', 'matic', 'arbitrum-one']
+
+DEFAULT_ROWS = ['10k', '100k', '1M']
+DEFAULT_UPDATE_RATIOS = [0.01, 0.1, 0.5]
+DEFAULT_LAYOUTS = 3
+REPEATS = 3
+SKIPPED_LAYOUTS = 2
+
+# Settings of every encoding of the .arr files compared
+ENCODINGS: dict[str, dict[str, Any]] = {
+    'plain': {'DICTIONARY_THRESHOLD': 0, 'BINARY_ADDRESSES': False},
+    'dictionary': {'DICTIONARY_THRESHOLD': 0.1, 'BINARY_ADDRESSES': False},
+    'binary': {'DICTIONARY_THRESHOLD': 0.1, 'BINARY_ADDRESSES': True},
+}
+
+# Similar to the collectors' tables: a few keys and addresses, and values
+# that The Graph returns as strings
+layouts = st.fixed_dictionaries({
+    'columns': st.lists(
+        st.tuples(st.sampled_from(COLUMN_KINDS), st.floats(0, 0.3)),
+        min_size=4, max_size=20,
+    ),
+    'daos': st.integers(1, 5000),
+    # Exponent of the zipf distribution of rows per DAO
+    'skew': st.floats(1.1, 3),
+    'networks': st.integers(1, len(NETWORKS)),
+})
+
+def draw_layouts(n: int, random_seed: int = 0) -> list[dict[str, Any]]:
+    """ Draws n table layouts, always the same ones for the same seed """
+    drawn: dict[str, dict[str, Any]] = {}
+
+    @seed(random_seed)
+    @settings(max_examples=n + 2*SKIPPED_LAYOUTS, database=None, phases=[Phase.generate], deadline=None,
+              suppress_health_check=list(HealthCheck))
+    @given(layouts)
+    def _draw(layout):
+        # Hypothesis can repeat examples
+        drawn[json.dumps(layout)] = layout
+
+    _draw()
+    # The first examples of hypothesis are the simplest ones, so we skip them
+    return list(drawn.values())[SKIPPED_LAYOUTS:SKIPPED_LAYOUTS + n]
+
+def _hex(values: np.ndarray, width: int) -> np.ndarray:
+    return np.char.add('0x', np.char.zfill(np.char.mod('%x', values), width))
+
+def _column(kind: str, n: int, rng: np.random.Generator) -> np.ndarray:
+    if kind == 'address':
+        return _hex(rng.integers(0, 2**62, n), 40)
+    if kind == 'bigint':
+        return np.char.mod('%d', rng.integers(0, 2**62, n)).astype(object)
+    if kind == 'timestamp':
+        return np.char.mod('%d', rng.integers(1_500_000_000, 1_800_000_000, n)).astype(object)
+    if kind == 'bool':
+        return rng.random(n) < 0.5
+    if kind == 'int':
+        return rng.integers(0, 1000, n)
+    if kind == 'float':
+        return rng.random(n) * 1e6
+    if kind == 'category':
+        return rng.choice(['ERC-20', 'DAI', 'WETH', 'USDC', 'YES', 'NO'], n).astype(object)
+    if kind == 'text':
+        return np.char.mod('Proposal %d: synthetic description', rng.integers(0, n, n)).astype(object)
+    raise ValueError(f"Unknown column kind {kind}")
+
+def make_table(layout: dict[str, Any], ids: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    """ Generates the rows with the given ids (as integers) following a layout """
+    n = len(ids)
+    daos = np.minimum(rng.zipf(layout['skew'], n), layout['daos']) - 1
+
+    df = pd.DataFrame({
+        'id': _hex(ids, 40),
+        'network': rng.choice(NETWORKS[:layout['networks']], n),
+        'dao': _hex(daos, 40),
+    })
+    for i, (kind, nulls) in enumerate(layout['columns']):
+        col = pd.Series(_column(kind, n, rng))
+        df[f'{kind}{i}'] = col.mask(rng.random(n) < nulls)
+
+    return df
+
+class _Runner:
+    name = 'storage'
+
+    def __init__(self, dw: Path):
+        self.basedir = dw
+        self.cache = dw / '.cache'
+
+def _collector(dw: Path, network: str):
+    from dao_analyzer.cache_scripts.common.common import NetworkCollector
+
+    class _StorageCollector(NetworkCollector):
+        def run(self, force=False, **kwargs):
+            pass
+
+    return _StorageCollector('storage', _Runner(dw), network)
+
+@contextmanager
+def encoding_config(encoding: str) -> Iterator[None]:
+    from dao_analyzer.cache_scripts import config
+
+    settings = config.get_settings()
+    prev = {k:settings.get(k) for k in ENCODINGS[encoding]}
+    for k, v in ENCODINGS[encoding].items():
+        settings.set(k, v)
+
+    try:
+        yield
+    finally:
+        for k, v in prev.items():
+            settings.set(k, v)
+
+def _min_time(setup: Callable[[], None], f: Callable[[], Any], repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        setup()
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_layout(
+    layout: dict[str, Any], rows: int, update_ratio: float, encoding: str = 'dictionary',
+    repeats: int = REPEATS, random_seed: int = 0,
+) -> dict[str, Any]:
+    from dao_analyzer.cache_scripts.common.storage import read_df, write_df
+
+    rng = np.random.default_rng(random_seed)
+
+    old = make_table(layout, np.arange(rows), rng)
+
+    # The new data updates some existing rows of the collector's network and adds new ones
+    network_rows = np.flatnonzero(old['network'] == NETWORKS[0])
+    updates = min(int(rows * update_ratio), len(network_rows))
+    new = make_table(layout, np.concatenate([
+        rng.choice(network_rows, updates, replace=False),
+        np.arange(rows, rows + max(1, rows // 100)),
+    ]), rng)
+    new['network'] = NETWORKS[0]
+
+    with tempfile.TemporaryDirectory(prefix='storage_dw_') as dw, encoding_config(encoding):
+        c = _collector(Path(dw), NETWORKS[0])
+        write_old = lambda: write_df(old, c.data_path, c.CATEGORICAL_COLUMNS)  # noqa: E731
+
+        timings = {
+            'merge': _min_time(write_old, lambda: c._update_data(new), repeats),
+            'force': _min_time(write_old, lambda: c._update_data(new, force=True), repeats),
+            'write': _min_time(lambda: None, write_old, repeats),
+            'read': _min_time(lambda: None, lambda: read_df(c.data_path), repeats),
+        }
+        file_size = c.data_path.stat().st_size
+
+    return {
+        'encoding': encoding,
+        'rows': rows,
+        'new_rows': len(new),
+        'update_ratio': update_ratio,
+        'columns': len(old.columns),
+        'daos': layout['daos'],
+        'networks': layout['networks'],
+        'file_size': file_size,
+        **{f'{k}_seconds': v for k, v in timings.items()},
+        'merge_rows_per_second': (rows + len(new)) / timings['merge'],
+    }
+
+def run_benchmarks(
+    sizes: list[int], update_ratios: list[float], n_layouts: int = DEFAULT_LAYOUTS,
+    encodings: list[str] = list(ENCODINGS), repeats: int = REPEATS, random_seed: int = 0,
+) -> dict[str, Any]:
+    from dao_analyzer.cache_scripts._version import __version__
+
+    results = []
+    for i, layout in enumerate(draw_layouts(n_layouts, random_seed)):
+        for rows in sizes:
+            for ratio in update_ratios:
+                for encoding in encodings:
+                    print(f"Layout {i} with {len(layout['columns'])} columns, {rows} rows and {ratio} updated ({encoding})")
+                    results.append({'layout': i} | bench_layout(layout, rows, ratio, encoding, repeats, random_seed))
+
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'date': datetime.now(timezone.utc).isoformat(),
+        'seed': random_seed,
+        'results': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', nargs='+', default=DEFAULT_ROWS, help='Rows of the existing table, like 10k 1M')
+    parser.add_argument('--update-ratios', nargs='+', type=float, default=DEFAULT_UPDATE_RATIOS,
+        help='Fraction of the existing rows updated by the new data')
+    parser.add_argument('--layouts', type=int, default=DEFAULT_LAYOUTS, help='Number of table layouts to draw')
+    parser.add_argument('--encodings', nargs='+', choices=list(ENCODINGS), default=list(ENCODINGS),
+        help='Encodings of the .arr files to compare')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='The minimum time of the repeats is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', type=Path, default=Path('storage.json'))
+    args = parser.parse_args()
+
+    report = run_benchmarks([parse_rows(r) for r in args.rows], args.update_ratios, args.layouts, args.encodings, args.repeats, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    with pd.option_context('display.width', None, 'display.max_rows', None, 'display.float_format', '{:.3f}'.format):
+        print(pd.DataFrame(report['results']).set_index(['layout', 'rows', 'update_ratio', 'encoding']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+    Descp: Throughput (rows/s) of The Graph collectors against a local subgraph
+
+    Usage: python -m benchmarks.throughput --platform daohaus --rows 10k 1M -o throughput.json
+
+    The collectors of a platform are run against the local subgraph (see
+    server.py) serving its schema.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from contextlib import contextmanager
+from functools import partial
+from datetime import datetime, timezone
+from pathlib import Path
+from platform import python_version
+from typing import Any, Callable, Iterator, Optional
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from .server import SUBGRAPHS, SubgraphServer
+
+DEFAULT_ROWS = ['10k', '1M']
+# The daostack collectors need the daos to remove the phantom DAOs
+DEFAULT_COLLECTORS = {
+    'daohaus': ['members', 'proposals', 'votes'],
+    'aragon': ['organizations', 'casts', 'votes'],
+    'daostack': ['daos', 'proposals', 'votes'],
+}
+NETWORK = 'mainnet'
+
+_SUFFIXES = {'k': 10**3, 'M': 10**6, 'G': 10**9}
+
+def parse_rows(s: str) -> int:
+    """ Parses a number of rows like 10000, 10k or 1M """
+    if s[-1] in _SUFFIXES:
+        return int(float(s[:-1]) * _SUFFIXES[s[-1]])
+    return int(s)
+
+@contextmanager
+def subgraph_endpoint(url: str, platform: str = 'daohaus') -> Iterator[None]:
+    """ Makes the collectors of the platform use `url` as their subgraphs """
+    from dao_analyzer.cache_scripts.common import ENDPOINTS
+
+    prev = {k:ENDPOINTS[NETWORK][k] for k in SUBGRAPHS[platform].endpoints}
+    ENDPOINTS[NETWORK].update({k:url for k in prev})
+    try:
+        yield
+    finally:
+        ENDPOINTS[NETWORK].update(prev)
+
+class _Stages:
+    """ Times the stages of a collector, and the time the server was busy during them """
+    def __init__(self, collector: str, rows: int, server: SubgraphServer):
+        self.collector = collector
+        self.rows = rows
+        self.server = server
+        self.results: list[dict[str, Any]] = []
+
+    def time(self, stage: str, f: Callable[[], Any]) -> Any:
+        busy = self.server.busy_seconds
+        start = time.perf_counter()
+        ret = f()
+        seconds = time.perf_counter() - start
+
+        self.results.append({
+            'collector': self.collector,
+            'stage': stage,
+            'rows': self.rows,
+            'seconds': seconds,
+            'server_seconds': self.server.busy_seconds - busy,
+            'rows_per_second': self.rows / seconds if seconds else None,
+        })
+        return ret
+
+def bench_collector(c, rows: int, server: SubgraphServer) -> list[dict[str, Any]]:
+    """ Measures every stage of a collector, returning one result per stage """
+    stages = _Stages(c.name, rows, server)
+
+    stages.time('run', lambda: c.run(force=True))
+    data = stages.time('n_requests', lambda: c._requester.n_requests(query=c.query_cb(), index=c._index_col))
+    df = stages.time('transform_to_df', partial(c.transform_to_df, data))
+    del data
+
+    c.data_path.unlink()
+    stages.time('_update_data', lambda: c._update_data(df))
+    stages.time('_update_data (merge)', lambda: c._update_data(df))
+
+    return stages.results
+
+def run_benchmarks(sizes: list[int], collectors: Optional[list[str]] = None, platform: str = 'daohaus') -> dict[str, Any]:
+    # Avoid requesting the names of the DAOs to daohaus
+    os.environ.setdefault('DAOA_DAOHAUS__SKIP_NAMES', 'true')
+
+    from dao_analyzer.cache_scripts._version import __version__
+    from dao_analyzer.cache_scripts.main import get_platform
+
+    collectors = collectors or DEFAULT_COLLECTORS[platform]
+    results = []
+    for rows in sizes:
+        with SubgraphServer(rows, platform=platform) as server, subgraph_endpoint(server.url, platform), \
+             tempfile.TemporaryDirectory(prefix='benchmark_dw_') as dw:
+            runner = get_platform(platform)(Path(dw))
+            runner.basedir.mkdir(parents=True)
+
+            for c in runner.network_collectors(NETWORK):
+                if c.name not in collectors:
+                    continue
+
+                c._pbar_enabled = False
+                print(f"Benchmarking {c.name} with {rows} rows")
+                results.extend(bench_collector(c, rows, server))
+
+    return {
+        'version': __version__,
+        'python': python_version(),
+        'platform': platform,
+        'date': datetime.now(timezone.utc).isoformat(),
+        'results': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', nargs='+', default=DEFAULT_ROWS, help='Rows served per entity, like 10k 1M 10M')
+    parser.add_argument('--platform', choices=list(SUBGRAPHS), default='daohaus')
+    parser.add_argument('--collectors', nargs='+', help='Names of the collectors of the platform to run (by default, those in DEFAULT_COLLECTORS)')
+    parser.add_argument('-o', '--output', type=Path, default=Path('throughput.json'))
+    args = parser.parse_args()
+
+    report = run_benchmarks([parse_rows(r) for r in args.rows], args.collectors, args.platform)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for r in report['results']:
+        print(f"{r['collector']:>12} {r['stage']:>22} {r['rows']:>10} rows {r['rows_per_second']:>12.0f} rows/s")
+
+if __name__ == '__main__':
+    main()
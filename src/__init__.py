@@ -4,3 +4,11 @@ try:
     __version__ = _version.version
 except ImportError:
     __version__ = 'Unknown'
+
+def __getattr__(name):
+    # Imported on demand, so the entry point doesn't import pandas and pyarrow
+    if name == 'DataWarehouse':
+        from .datawarehouse import DataWarehouse
+        return DataWarehouse
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
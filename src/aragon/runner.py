@@ -21,6 +21,8 @@ from ..common.thegraph import TheGraphCollector
 from ..common.blockscout import BlockscoutBallancesCollector
 
 class AppsCollector(TheGraphCollector):
+    CATEGORICAL_COLUMNS = ['repoName']
+
     def __init__(self, runner, network: str):
         super().__init__('apps', network, ENDPOINTS[network]['aragon'], runner)
 
@@ -40,6 +42,10 @@ class BalancesCollector(BlockscoutBallancesCollector):
         super().__init__(runner, addr_key='recoveryVault', base=base, network=network)
 
 class CastsCollector(TheGraphCollector):
+    DAO_KEY = 'orgAddress'
+    INDEX_COLUMNS = ['orgAddress', 'voteId']
+    AGGREGATES = {'casts': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('casts', network, ENDPOINTS[network]['aragon_voting'], runner, pbar_enabled=False)
 
@@ -67,6 +73,7 @@ class CastsCollector(TheGraphCollector):
         )
 
 class OrganizationsCollector(TheGraphCollector):
+    DAO_KEY = 'orgAddress'
     DAO_NAMES=pkgutil.get_data(aragon_module_name, 'dao_names.json')
 
     def __init__(self, runner, network: str):
@@ -114,6 +121,8 @@ class OrganizationsCollector(TheGraphCollector):
         )
 
 class MiniMeTokensCollector(TheGraphCollector):
+    DAO_KEY = 'orgAddress'
+
     def __init__(self, runner, network: str):
         super().__init__('miniMeTokens', network, ENDPOINTS[network]['aragon_tokens'], runner, pbar_enabled=False)
 
@@ -132,6 +141,9 @@ class MiniMeTokensCollector(TheGraphCollector):
         )
 
 class TokenHoldersCollector(TheGraphCollector):
+    DAO_KEY = 'organizationAddress'
+    AGGREGATES = {'members': (None, 'count')}
+
     def __init__(self, runner: NetworkRunner, network: str):
         super().__init__('tokenHolders', network, ENDPOINTS[network]['aragon_tokens'], runner)
 
@@ -171,6 +183,8 @@ class ReposCollector(TheGraphCollector):
         )
 
 class TransactionsCollector(TheGraphCollector):
+    DAO_KEY = 'orgAddress'
+
     def __init__(self, runner, network: str):
         super().__init__('transactions', network, ENDPOINTS[network]['aragon_finance'], runner)
 
@@ -189,6 +203,9 @@ class TransactionsCollector(TheGraphCollector):
         )
 
 class VotesCollector(TheGraphCollector):
+    DAO_KEY = 'orgAddress'
+    AGGREGATES = {'proposals': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('votes', network, ENDPOINTS[network]['aragon_voting'], runner)
 
@@ -219,23 +236,19 @@ class AragonRunner(NetworkRunner):
 
     def __init__(self, dw=None):
         super().__init__(dw)
-        self._collectors: List[Collector] = []
-
-        for n in self.networks: 
-            self._collectors.extend([
-                AppsCollector(self, n),
-                CastsCollector(self, n),
-                MiniMeTokensCollector(self, n),
-                ReposCollector(self, n),
-                TransactionsCollector(self, n),
-                TokenHoldersCollector(self, n),
-                VotesCollector(self, n),
-                oc := OrganizationsCollector(self, n),
-                BalancesCollector(self, oc, n),
-            ])
-        
-        self._collectors.append(CCPricesCollector(self))
-
-    @property
-    def collectors(self) -> List[Collector]:
-        return self._collectors
\ No newline at end of file
+
+    def build_collectors(self, n: str) -> List[Collector]:
+        return [
+            AppsCollector(self, n),
+            CastsCollector(self, n),
+            MiniMeTokensCollector(self, n),
+            ReposCollector(self, n),
+            TransactionsCollector(self, n),
+            TokenHoldersCollector(self, n),
+            VotesCollector(self, n),
+            oc := OrganizationsCollector(self, n),
+            BalancesCollector(self, oc, n),
+        ]
+
+    def build_global_collectors(self) -> List[Collector]:
+        return [CCPricesCollector(self)]
\ No newline at end of file
@@ -4,8 +4,6 @@ from typing import List
 from datetime import datetime
 import pathlib
 
-from . import config
-
 class CacheScriptsArgParser(ArgumentParser):
     def __init__(self, available_platforms: List[str], available_networks: List[str]):
         super().__init__(description="Main script to populate dao-analyzer cache")
@@ -16,6 +14,11 @@ class CacheScriptsArgParser(ArgumentParser):
             dest='display_version',
             help="Displays the version and exits"
         )
+        self.add_argument(
+            "--report",
+            action='store_true',
+            help="Displays a summary of the time and data used by each collector in the last runs and exits"
+        )
         self.add_argument(
             "-p", "--platforms",
             choices=available_platforms,
@@ -34,6 +37,11 @@ class CacheScriptsArgParser(ArgumentParser):
             dest="DEBUG", action='store_true', default=False,
             help="Shows debug info"
         )
+        self.add_argument(
+            "--profile",
+            action='store_true', default=False,
+            help="Profiles every collector and writes the profiles to the logs folder"
+        )
         self.add_argument(
             "-f", "--force",
             action='store_true', default=False,
@@ -71,10 +79,10 @@ class CacheScriptsArgParser(ArgumentParser):
         )
         self.add_argument(
             "-D", "--datawarehouse",
-            help="Specifies the destination folder of the datawarehouse",
+            help="Specifies the destination folder of the datawarehouse (default: $DAOA_DEFAULT_DATAWAREHOUSE or datawarehouse)",
             required=False,
             type=pathlib.Path,
-            default=config.DEFAULT_DATAWAREHOUSE
+            default=None,
         )
         self.add_argument(
             "--only-updatable",
@@ -7,12 +7,25 @@
         <david@ddavo.me>
 """
 
-from .common import Collector, Runner, ENDPOINTS, NetworkRunner, NetworkCollector
-
 __all__ = [
     'Collector',
     'Runner',
     'ENDPOINTS',
     'NetworkRunner',
     'NetworkCollector',
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    """
+    Imports the submodules on demand, so importing the package doesn't
+    import pandas, gql, etc.
+    """
+    if name == 'ENDPOINTS':
+        from .endpoints import ENDPOINTS
+        return ENDPOINTS
+
+    if name in __all__:
+        from . import common
+        return getattr(common, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,109 @@
+"""
+    Descp: Per-DAO aggregates of the collectors (number of proposals, votes,
+    treasury value...), maintained incrementally as the collectors update
+    their data.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+AGGREGATES_FILE = 'aggregates.arr'
+AGGREGATES_INDEX = ['network', 'dao']
+
+# Name of the aggregate -> (column, function). The function can be 'count',
+# the number of rows of the DAO, or 'sum', the sum of the column
+Aggregates = dict[str, tuple[Optional[str], str]]
+
+def _decoded(s: pd.Series) -> pd.Series:
+    # The keys are stored as strings, even if the column of the collector is categorical
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype(s.cat.categories.dtype)
+    return s
+
+def aggregate(df: pd.DataFrame, dao_key: str, aggregates: Aggregates) -> pd.DataFrame:
+    """ Computes the aggregates of the rows of df by network and DAO """
+    values = pd.DataFrame({'network': _decoded(df['network']), 'dao': _decoded(df[dao_key])})
+    for name, (column, func) in aggregates.items():
+        if func == 'count':
+            values[name] = 1
+        elif func == 'sum':
+            values[name] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(float)
+        else:
+            raise ValueError(f"Unknown aggregate function {func}")
+
+    return values.groupby(AGGREGATES_INDEX).sum()
+
+class AggregatesTable:
+    """ The aggregates of every collector of a runner, by network and DAO """
+    def __init__(self, path: Path):
+        self.path = path
+        if path.is_file():
+            self.df = pd.read_feather(path).set_index(AGGREGATES_INDEX)
+        else:
+            self.df = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=AGGREGATES_INDEX))
+
+    def has(self, aggregates: Aggregates) -> bool:
+        return all(name in self.df.columns for name in aggregates)
+
+    def reset(self, aggregates: Aggregates, network: Optional[str] = None):
+        """ Sets the aggregates to 0, in every network or only in the given one """
+        for name in aggregates:
+            if name not in self.df.columns:
+                self.df[name] = pd.Series(0, index=self.df.index, dtype=int if aggregates[name][1] == 'count' else float)
+            elif network is None:
+                self.df[name] = 0
+            else:
+                self.df.loc[self.df.index.get_level_values('network') == network, name] = 0
+
+    def add(self, delta: pd.DataFrame):
+        # reindex keeps the dtype of the aggregates of other collectors
+        index = self.df.index.union(delta.index)
+        self.df = self.df.reindex(index, fill_value=0)
+        for name in delta.columns:
+            self.df[name] = self.df[name] + delta[name].reindex(index, fill_value=0)
+
+    def save(self):
+        # DAOs without rows
+        self.df = self.df[(self.df != 0).any(axis=1)]
+        self.df.reset_index().to_feather(self.path)
+
+def update_aggregates(
+    path: Path,
+    aggregates: Aggregates,
+    dao_key: str,
+    data: pd.DataFrame,
+    added: Optional[pd.DataFrame] = None,
+    removed: Optional[pd.DataFrame] = None,
+    network: Optional[str] = None,
+):
+    """ Updates the aggregates with the rows changed by an update of the data
+
+    Parameters:
+        data: every row of the collector after the update
+        added: rows added or updated, None if every row of data is new
+        removed: previous version of the rows updated or deleted
+        network: if set, every row of the network was replaced (force)
+
+    The aggregates are computed from data when the table doesn't have them yet.
+    """
+    table = AggregatesTable(path)
+
+    if added is None or not table.has(aggregates):
+        table.reset(aggregates)
+        table.add(aggregate(data, dao_key, aggregates))
+    elif network is not None:
+        table.reset(aggregates, network)
+        table.add(aggregate(data[data['network'] == network], dao_key, aggregates))
+    else:
+        delta = aggregate(added, dao_key, aggregates)
+        if removed is not None and not removed.empty:
+            delta = delta.sub(aggregate(removed, dao_key, aggregates), fill_value=0).astype(delta.dtypes)
+        table.add(delta)
+
+    table.save()
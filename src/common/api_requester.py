@@ -8,16 +8,101 @@
 """
 
 from gql import Client, gql
+from gql.client import SyncClientSession
 from gql.dsl import DSLField, DSLQuery, DSLSchema, DSLType, dsl_gql
 from gql.transport.requests import RequestsHTTPTransport
+from gql.transport.exceptions import (
+    TransportConnectionFailed,
+    TransportProtocolError,
+    TransportQueryError,
+    TransportServerError,
+)
+import pyarrow as pa
 import re
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from functools import partial
 
 import logging
 import sys
+from tenacity import Retrying, RetryCallState, retry_if_exception, wait_random_exponential
 from tqdm import tqdm
-from typing import Optional, Union, Iterable, Callable
+from typing import Optional, Union, Iterable, Iterator, Callable
+
+from .scheduler import RequestScheduler
+from .spill import SpillBuffer
+from .. import config
+
+# Error messages returned by The Graph gateway/indexers that are worth retrying
+TRANSIENT_ERRORS_RE = re.compile(
+    r"timeout|timed out|bad indexers|indexer not available|no indexers|"
+    r"too many requests|service unavailable|store error|database unavailable|"
+    r"query has been cancel",
+    re.IGNORECASE,
+)
+OVERLOAD_ERRORS_RE = re.compile(r"timeout|timed out|too many requests", re.IGNORECASE)
+
+def is_transient_error(e: BaseException) -> bool:
+    """ Whether the error is a temporary failure and the request can be retried """
+    if isinstance(e, (TransportConnectionFailed, TransportProtocolError, requests.ConnectionError, requests.Timeout)):
+        return True
+
+    if isinstance(e, TransportServerError):
+        return e.code is None or e.code == 429 or e.code >= 500
+
+    if isinstance(e, (TransportQueryError, GQLQueryException)):
+        return TRANSIENT_ERRORS_RE.search(str(e)) is not None
+
+    return False
+
+def is_overload_error(e: BaseException) -> bool:
+    """ Whether the error means that we are sending too many requests """
+    if isinstance(e, TransportServerError):
+        return e.code in (429, 503, 504)
+
+    if isinstance(e, (TransportQueryError, GQLQueryException)):
+        return OVERLOAD_ERRORS_RE.search(str(e)) is not None
+
+    return isinstance(e, requests.Timeout)
+
+class RetryBudget:
+    """ Maximum number of page retries, shared by every requester in the same run """
+    def __init__(self, total: int):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def consume(self) -> bool:
+        with self._lock:
+            if self.used >= self.total:
+                return False
+
+            self.used += 1
+            return True
+
+_retry_budget: Optional[RetryBudget] = None
+def get_retry_budget() -> RetryBudget:
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget(int(config.PAGE_RETRY_BUDGET))
+    return _retry_budget
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+def get_scheduler() -> RequestScheduler:
+    """ Returns the scheduler used by every GQLRequester in this process """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                max_concurrency=int(config.THE_GRAPH_MAX_CONCURRENCY),
+                endpoint_concurrency=int(config.THE_GRAPH_ENDPOINT_CONCURRENCY),
+                target_latency=float(config.THE_GRAPH_TARGET_LATENCY),
+                cooldown=float(config.THE_GRAPH_COOLDOWN),
+                is_overload=is_overload_error,
+            )
+        return _scheduler
 
 class GQLQueryException(Exception):
     def __init__(self, errors, msg="Errors in GraphQL Query"):
@@ -30,6 +115,90 @@ class GQLQueryException(Exception):
     def __str__(self):
         return super().__str__() + ":\n" + self.errorsString()
 
+# Size of the last response received by each thread
+_last_response = threading.local()
+
+def _record_response_size(r: requests.Response, *args, **kwargs):
+    _last_response.size = len(r.content)
+
+def last_response_size() -> int:
+    return getattr(_last_response, 'size', 0)
+
+class PooledHTTPTransport(RequestsHTTPTransport):
+    """ RequestsHTTPTransport keeping up to `pool_maxsize` connections to the endpoint """
+    def __init__(self, url: str, pool_maxsize: int, **kwargs):
+        super().__init__(url, **kwargs)
+        self.pool_maxsize = pool_maxsize
+
+    def connect(self):
+        super().connect()
+
+        # Keeping the retries of the adapter mounted by the transport
+        for prefix in ('http://', 'https://'):
+            retries = self.session.get_adapter(prefix).max_retries
+            self.session.mount(prefix, HTTPAdapter(pool_maxsize=self.pool_maxsize, max_retries=retries))
+        self.session.hooks['response'].append(_record_response_size)
+
+class EndpointClient:
+    """ A gql client with a pooled keep-alive connection to a single endpoint """
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.client = Client(
+            transport=PooledHTTPTransport(endpoint, pool_maxsize=int(config.THE_GRAPH_ENDPOINT_CONCURRENCY)),
+            fetch_schema_from_transport=False,
+            introspection_args={
+                "input_value_deprecation": False,
+            },
+        )
+        self._session: Optional[SyncClientSession] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> SyncClientSession:
+        with self._lock:
+            if self._session is None:
+                self._session = self.client.connect_sync()
+
+            return self._session
+
+    def fetch_schema(self):
+        session = self.session
+        with self._lock:
+            if self.client.schema is None:
+                session.fetch_schema()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self.client.close_sync()
+                self._session = None
+
+class ClientRegistry:
+    """ Hands out the same EndpointClient to every requester of an endpoint """
+    def __init__(self):
+        self._clients: dict[str, EndpointClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> EndpointClient:
+        with self._lock:
+            if endpoint not in self._clients:
+                self._clients[endpoint] = EndpointClient(endpoint)
+            return self._clients[endpoint]
+
+    def close(self):
+        with self._lock:
+            for c in self._clients.values():
+                c.close()
+            self._clients.clear()
+
+_client_registry = ClientRegistry()
+def get_client(endpoint: str) -> EndpointClient:
+    return _client_registry.get(endpoint)
+
+def close_clients():
+    """ Closes every open connection. Should be called at the end of the run """
+    _client_registry.close()
+
 class IndexProgressBar(tqdm):
     def __init__(self, total=0xffff):
         super().__init__(delay=1, total=total, file=sys.stdout, desc="Requesting",
@@ -79,25 +248,32 @@ class RequestProgressSpinner:
 
 class GQLRequester:
     ELEMS_PER_CHUNK: int = 1000
+    METRICS = ['requests', 'retries', 'rows', 'bytes']
 
     def __init__(self, endpoint: str, pbar_enabled: bool=True, introspection=True) -> None:
-        self.__transport = RequestsHTTPTransport(endpoint)
-        self.__client: Client = Client(
-            transport=self.__transport, 
-            fetch_schema_from_transport=introspection,
-            introspection_args={
-                "input_value_deprecation": False,
-            },
-        )
+        self.endpoint = endpoint
+        self.introspection = introspection
+        self.__client: EndpointClient = get_client(endpoint)
         self.pbar = IndexProgressBar if pbar_enabled else RequestProgressSpinner
         self.logger = logging.getLogger('dao-scripts.gql-requester')
+        # Metrics
+        self.requests: int = 0
+        self.retries: int = 0
+        self.rows: int = 0
+        self.bytes: int = 0
 
         self.logger.debug(f"Invoked ApiRequester with endpoint: {endpoint}")
 
+    def metrics(self) -> dict[str, int]:
+        return {m:getattr(self, m) for m in self.METRICS}
+
     def get_schema(self) -> DSLSchema:
-        with self.__client:
-            assert(self.__client.schema is not None)
-            return DSLSchema(self.__client.schema)
+        if self.introspection and self.__client.client.schema is None:
+            with get_scheduler().slot(self.endpoint):
+                self.__client.fetch_schema()
+
+        assert(self.__client.client.schema is not None)
+        return DSLSchema(self.__client.client.schema)
 
     def request(self, query: Union[DSLQuery, DSLField, str]) -> dict:
         """
@@ -108,10 +284,11 @@ class GQLRequester:
 
         self.logger.debug(f"Requesting: {query}")
 
-        if isinstance(query, DSLQuery):
-            result = self.__client.execute(dsl_gql(query))
-        else:
-            result = self.__client.execute(gql(query))
+        document = dsl_gql(query) if isinstance(query, DSLQuery) else gql(query)
+        with get_scheduler().slot(self.endpoint):
+            self.requests += 1
+            result = self.__client.session.execute(document)
+            self.bytes += last_response_size()
         
         if "errors" in result:
             raise GQLQueryException(result["errors"])
@@ -125,9 +302,110 @@ class GQLRequester:
         else:
             raise 
 
-    def n_requests(self, query: Callable[..., DSLField], index='id', last_index: str = "", block_hash: Optional[str] = None) -> list[dict]:
+    def _stop_retrying(self, retry_state: RetryCallState) -> bool:
+        if retry_state.attempt_number >= int(config.PAGE_MAX_ATTEMPTS):
+            return True
+
+        if not get_retry_budget().consume():
+            self.logger.error("Page retry budget exhausted, not retrying anymore")
+            return True
+
+        return False
+
+    def _before_retry(self, retry_state: RetryCallState):
+        self.retries += 1
+        self.logger.warning(
+            f"Retrying page after error ({retry_state.attempt_number}/{config.PAGE_MAX_ATTEMPTS}): "
+            f"{retry_state.outcome.exception()}"
+        )
+
+    def _retrying(self) -> Retrying:
+        return Retrying(
+            retry=retry_if_exception(is_transient_error),
+            wait=wait_random_exponential(multiplier=1, max=int(config.PAGE_RETRY_MAX_WAIT)),
+            stop=self._stop_retrying,
+            before_sleep=self._before_retry,
+            reraise=True,
+        )
+
+    def request_page(self, q: Union[DSLQuery, DSLField, str]) -> list[dict]:
         """
-        Requests all chunks from endpoint.
+        Requests a single page, retrying with exponential backoff and jitter
+        if the request failed because of a transient error.
+        """
+        return self._retrying()(self.request_single, q)
+
+    def n_requests_batched(self,
+        queries: dict[str, Callable[..., DSLField]],
+        index='id',
+        block_hash: Optional[str] = None,
+        buffers: Optional[dict[str, SpillBuffer]] = None,
+    ) -> dict[str, Union[list[dict], pa.Table]]:
+        """
+        Requests all chunks of several queries to the same endpoint, packing the
+        next page of every unfinished query into a single request using aliases.
+
+        Parameters:
+            * queries: the queries to request, by name
+            * index: dict key to use as index
+            * block_hash: make the request to that block hash
+            * buffers: a SpillBuffer for each query, that keeps its pages like
+              in n_requests. The bytes of every response are split among the
+              queries by their number of rows
+        """
+        elements: dict[str, list[dict]] = {k:[] for k in queries}
+        last_index: dict[str, str] = {k:"" for k in queries}
+        pending: list[str] = list(queries)
+        aliases: dict[str, str] = {f"q{i}":k for i,k in enumerate(queries)}
+
+        with self.pbar() as pbar:
+            while pending:
+                fields = []
+                for alias, k in aliases.items():
+                    if k not in pending:
+                        continue
+
+                    query_args = {
+                        "where": {index+"_gt": last_index[k]},
+                        "first": self.ELEMS_PER_CHUNK
+                    }
+                    if block_hash:
+                        query_args["block"] = {"hash": block_hash}
+
+                    fields.append(queries[k](**query_args).alias(alias))
+
+                # The progress is the index of the query that is further behind
+                progress = min(last_index[k] for k in pending)
+                prev_bytes = self.bytes
+                result = self._retrying()(self.request, DSLQuery(*fields))
+
+                new_items = sum(len(page) for page in result.values())
+                for alias, page in result.items():
+                    k = aliases[alias]
+                    if buffers is None:
+                        elements[k].extend(page)
+                    else:
+                        buffers[k].append(page, (self.bytes - prev_bytes) * len(page) // max(new_items, 1))
+
+                    # if a query returns no elements, it has finished
+                    if page:
+                        assert(last_index[k] != page[-1][index])
+                        last_index[k] = page[-1][index]
+                    else:
+                        pending.remove(k)
+
+                self.rows += new_items
+                pbar.progress(last_index=progress, new_items=new_items)
+
+            pbar.complete()
+
+        if buffers is None:
+            return elements
+        return {k:buffers[k].result() for k in queries}
+
+    def iter_pages(self, query: Callable[..., DSLField], index='id', last_index: str = "", block_hash: Optional[str] = None) -> Iterator[list[dict]]:
+        """
+        Requests all chunks from endpoint, yielding each page as soon as it's received.
 
         Parameters:
             * query: json to request
@@ -135,9 +413,6 @@ class GQLRequester:
             * last_index: used to continue the request
             * block_hash: make the request to that block hash
         """
-        elements: list[dict] = list()
-        result = dict()
-        
         # do-while structure
         exit: bool = False
 
@@ -150,19 +425,52 @@ class GQLRequester:
                 if block_hash:
                     query_args["block"] = {"hash": block_hash}
 
-                result = self.request_single(query(**query_args))
-                elements.extend(result)
+                result = self.request_page(query(**query_args))
+                self.rows += len(result)
 
                 # if return data (result) has no elements, we have finished
                 if result: 
                     assert(last_index != result[-1][index])
                     pbar.progress(last_index=last_index, new_items=len(result))
                     last_index = result[-1][index]
+                    yield result
                 else:
                     pbar.complete()
                     exit = True
 
-        return elements
+        if self.retries:
+            self.logger.info(f"Needed {self.retries} page retries")
+
+    def n_requests(self,
+        query: Callable[..., DSLField],
+        index='id',
+        last_index: str = "",
+        block_hash: Optional[str] = None,
+        buffer: Optional[SpillBuffer] = None,
+    ) -> Union[list[dict], pa.Table]:
+        """
+        Requests all chunks from endpoint.
+
+        Parameters:
+            * query: json to request
+            * index: dict key to use as index
+            * last_index: used to continue the request
+            * block_hash: make the request to that block hash
+            * buffer: keeps the pages, and spills them to disk if needed. If
+              it spills, a table is returned instead of a list
+        """
+        if buffer is None:
+            elements: list[dict] = list()
+            for page in self.iter_pages(query, index=index, last_index=last_index, block_hash=block_hash):
+                elements.extend(page)
+            return elements
+
+        prev_bytes = self.bytes
+        for page in self.iter_pages(query, index=index, last_index=last_index, block_hash=block_hash):
+            buffer.append(page, self.bytes - prev_bytes)
+            prev_bytes = self.bytes
+
+        return buffer.result()
 
 class CryptoCompareQueryException(Exception):
     def __init__(self, errors, msg="Errors in CryptoCompare Query"):
@@ -188,6 +496,8 @@ class CryptoCompareRequester:
             api_key = ""
 
         self.api_key = api_key
+        self.requests: int = 0
+        self.bytes: int = 0
 
     def _build_headers(self) -> dict[str, str]:
         return {
@@ -201,6 +511,8 @@ class CryptoCompareRequester:
         params['extraParams'] = 'dao-analyzer'
 
         r = requests.get(url, params=params, headers=self._build_headers())
+        self.requests += 1
+        self.bytes += len(r.content)
         self.logger.debug(f'Response status: {r.status_code}, ok: {r.ok}, content: {r.content}')
 
         # There are two kinds of requests
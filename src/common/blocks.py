@@ -0,0 +1,187 @@
+"""
+    Descp: Resolution of the block to use for each network
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+import logging
+import threading
+
+from tenacity import retry, retry_if_exception_type, wait_exponential, stop_after_attempt
+from gql.dsl import DSLQuery
+from gql.transport.exceptions import TransportQueryError
+import numpy as np
+import pandas as pd
+
+from .api_requester import GQLRequester
+from .endpoints import ENDPOINTS, get_graph_url
+from ..metadata import Block
+from .. import config
+
+logger = logging.getLogger('dao_analyzer.blocks')
+
+BLOCK_INDEX_TEMPLATE = 'blocks_{network}.arr'
+
+class BlockIndex:
+    """ Sampled blocks (number, timestamp and hash) of a network, stored in the cache
+
+    Every block obtained from the blocks subgraph is added to the index, so
+    dates can be resolved locally once the blocks around them are known.
+    """
+    COLUMNS = ['number', 'timestamp', 'id']
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._df: Optional[pd.DataFrame] = None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._df is None:
+            if self.path.is_file():
+                self._df = pd.read_feather(self.path)
+            else:
+                self._df = pd.DataFrame({'number': [], 'timestamp': [], 'id': []}).astype({'number': 'int64', 'timestamp': 'int64'})
+        return self._df
+
+    def add(self, blocks: list[dict[str, Any]]):
+        """ Adds the blocks, as returned by the blocks subgraph """
+        if not blocks:
+            return
+
+        new = pd.DataFrame(blocks)[self.COLUMNS].astype({'number': 'int64', 'timestamp': 'int64'})
+        self._df = (pd.concat([self.df, new], ignore_index=True)
+            .drop_duplicates('number')
+            .sort_values('number', ignore_index=True)
+        )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._df.to_feather(self.path)
+
+    def _block(self, i: int) -> dict[str, Any]:
+        row = self.df.iloc[i]
+        return {'number': int(row['number']), 'timestamp': int(row['timestamp']), 'id': row['id']}
+
+    def bracket(self, timestamp: int) -> tuple[Optional[dict[str, Any]], Optional[dict[str, Any]]]:
+        """ Returns the last known block at or before timestamp, and the first known one after it """
+        i = int(np.searchsorted(self.df['timestamp'].to_numpy(), timestamp, side='right'))
+        return (
+            self._block(i - 1) if i > 0 else None,
+            self._block(i) if i < len(self.df) else None,
+        )
+
+    def lookup(self, timestamp: int) -> Optional[Block]:
+        """ Returns the last block at or before timestamp, if it can be known without requesting it """
+        before, after = self.bracket(timestamp)
+        if before and after and after['number'] == before['number'] + 1:
+            return Block(before)
+        return None
+
+def _block_at_date(requester: GQLRequester, index: BlockIndex, until_date: datetime) -> Optional[Block]:
+    """ Obtains the last block at or before until_date, using the index to narrow the search """
+    timestamp = int(until_date.timestamp())
+    if block := index.lookup(timestamp):
+        return block
+
+    before, after = index.bracket(timestamp)
+    where_before: dict[str, Any] = {"timestamp_lte": timestamp}
+    where_after: dict[str, Any] = {"timestamp_gt": timestamp}
+    if before:
+        where_before["number_gte"] = before['number']
+    if after:
+        where_after["number_lte"] = after['number']
+
+    # Also requesting the next block, to be able to resolve this date locally next time
+    ds = requester.get_schema()
+    fields = (ds.Block.id, ds.Block.number, ds.Block.timestamp)
+    response = requester.request(DSLQuery(
+        ds.Query.blocks(first=1, orderBy="number", orderDirection="desc", where=where_before).select(*fields).alias('before'),
+        ds.Query.blocks(first=1, orderBy="number", orderDirection="asc", where=where_after).select(*fields).alias('after'),
+    ))
+    index.add(response['before'] + response['after'])
+
+    if not response['before']:
+        logger.warning(f"Blocks query returned no response before {until_date}")
+        return None
+
+    return Block(response['before'][0])
+
+@retry(retry=retry_if_exception_type(TransportQueryError), wait=wait_exponential(max=10), stop=stop_after_attempt(3))
+def get_validated_block(network: str, prev_block: Optional[Block] = None, until_date: Optional[datetime] = None, index: Optional[BlockIndex] = None) -> Optional[Block]:
+    requester = GQLRequester(get_graph_url(ENDPOINTS[network]['_blocks']))
+    if until_date and index:
+        return _block_at_date(requester, index, until_date) or prev_block
+
+    ds = requester.get_schema()
+
+    number_gte = prev_block.number if prev_block else 0
+
+    args = {
+        "first": 1,
+        "skip": config.SKIP_INVALID_BLOCKS,
+        "orderBy": "number",
+        "orderDirection": "desc",
+        "where": {
+            "number_gte": number_gte
+        }
+    }
+
+    # TODO: SET THE UNTIL_DATE
+    if until_date:
+        del args["skip"]
+        del args["where"]["number_gte"]
+        args["where"]["timestamp_lte"] = int(until_date.timestamp())
+
+    response = requester.request(ds.Query.blocks(**args).select(
+        ds.Block.id,
+        ds.Block.number,
+        ds.Block.timestamp
+    ))["blocks"]
+
+    if len(response) == 0:
+        logger.warning(f"Blocks query returned no response with args {args}")
+        return prev_block
+
+    if index:
+        index.add(response)
+
+    return Block(response[0])
+
+class BlockResolver:
+    """ Resolves the block of each network once, so every runner uses the same one
+
+    Created once per run, and shared by every runner. If `cache` is set, the
+    blocks are also stored in a BlockIndex per network in that folder.
+    """
+    def __init__(self, until_date: Optional[datetime] = None, cache: Optional[Path] = None):
+        self.until_date = until_date
+        self.cache = cache
+        self._blocks: dict[str, Block] = {}
+        self._lock = threading.Lock()
+
+    def index(self, network: str) -> Optional[BlockIndex]:
+        if self.cache is None:
+            return None
+        return BlockIndex(self.cache / BLOCK_INDEX_TEMPLATE.format(network=network))
+
+    def resolve(self, network: str, prev_block: Optional[Block] = None) -> Optional[Block]:
+        """ Returns the block to use for the network
+
+        If the block can't be obtained, `prev_block` is returned instead (and
+        the block will be requested again for the next caller).
+        """
+        with self._lock:
+            if network not in self._blocks:
+                print("Requesting a block number...", end='\r')
+                block = get_validated_block(network, until_date=self.until_date, index=self.index(network))
+                if block is None:
+                    return prev_block
+
+                self._blocks[network] = block
+                logger.info(f"Using block {block} for {network}")
+
+            return self._blocks[network]
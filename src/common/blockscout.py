@@ -60,6 +60,8 @@ class BlockscoutBallancesCollector(NetworkCollector):
             'block': blockn,
             'address': addr
         })
+        self.stats.requests += 1
+        self.stats.bytes += len(r.content)
 
         if (r.ok):
             j = r.json()
@@ -85,10 +87,12 @@ class BlockscoutBallancesCollector(NetworkCollector):
                 return pd.DataFrame()
         elif r.status_code == 429: # Too many requests
             self.logger.warning(f"Too many requests, sleep and retry {retry}/{maxretries} time")
+            self.stats.retries += 1
             sleep(self.ERR_SLEEP)
             return self._get_from_address(addr, retry=retry+1, maxretries=maxretries)
         elif r.status_code == 503:
             self.logger.warning(f"Service unavailable, sleep and retry {retry}/{maxretries} time")
+            self.stats.retries += 1
             sleep(self.ERR_SLEEP)
             return self._get_from_address(addr, retry=retry+1, maxretries=maxretries)
         elif r.status_code == 504: # Gateway Time-out (Response too large)
@@ -112,9 +116,12 @@ class BlockscoutBallancesCollector(NetworkCollector):
         ptqdm = partial(tqdm, delay=1, desc="Requesting token balances", 
             unit='req', dynamic_ncols=True)
         toApply = partial(self._get_from_address, block=block, ignore_errors=True)
-        df = pd.concat(map(toApply, ptqdm(addresses)), ignore_index=True)
+        with self.stats.measure('fetch_time'):
+            df = pd.concat(map(toApply, ptqdm(addresses)), ignore_index=True)
+        self.stats.rows += len(df)
 
-        df = cc_postprocessor(df)
+        with self.stats.measure('transform_time'):
+            df = cc_postprocessor(df, stats=self.stats)
         df = df.rename(columns={
             'name': 'tokenName',
             # Replace only if addr_key is not 'id'
@@ -1,42 +1,25 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Iterable
+from typing import Optional, Iterable, Union
 import logging
 import sys
-import json
 from datetime import datetime, timezone
 import traceback
-import pkgutil
 
-from tenacity import retry, retry_if_exception_type, wait_exponential, stop_after_attempt
 import pandas as pd
 from tqdm import tqdm
-from gql.transport.exceptions import TransportQueryError
 
-from .api_requester import GQLRequester
-from ..metadata import RunnerMetadata, Block
+from .api_requester import GQLRequester # noqa: F401
+from .blocks import BlockResolver, get_validated_block
+from .endpoints import ENDPOINTS, get_graph_url # noqa: F401
+from ..metadata import RunnerMetadata, Block, CollectorRunStats
+from ..profiling import profile
+from .memory import MemoryMonitor
+from .aggregates import AGGREGATES_FILE, Aggregates, update_aggregates
+from .index import KeyIndex, file_columns
+from .storage import read_df, write_df
 from .. import config
-from dao_analyzer import cache_scripts
-
-# To be able to obtain endpoints.json
-ENDPOINTS: dict = json.loads(pkgutil.get_data(cache_scripts.__name__, 'endpoints.json'))
-THE_GRAPH_URL_TEMPLATE = 'https://gateway-arbitrum.network.thegraph.com/api/{api_key}/subgraphs/id/{subgraph_id}'
-THE_GRAPH_DEPLOYMENT_TEMPLATE = 'https://gateway-arbitrum.network.thegraph.com/api/{api_key}/deployments/id/{deployment_id}'
-
-def get_graph_url(subgraph_id: str) -> str:
-    if subgraph_id.startswith("http"):
-        return subgraph_id
-
-    if subgraph_id.startswith("Qm"):
-        return THE_GRAPH_DEPLOYMENT_TEMPLATE.format(
-            api_key=config.THE_GRAPH_API_KEY,
-            deployment_id=subgraph_id,
-        )
-
-    return THE_GRAPH_URL_TEMPLATE.format(
-        api_key=config.THE_GRAPH_API_KEY,
-        subgraph_id=subgraph_id,
-    )
 
 def solve_decimals(df: pd.DataFrame) -> pd.DataFrame:
     """ Adds the balanceFloat column to the dataframe
@@ -52,10 +35,20 @@ def solve_decimals(df: pd.DataFrame) -> pd.DataFrame:
 
 class Collector(ABC):
     INDEX = ['network', 'id']
-    
+    # Column with the DAO of every row
+    DAO_KEY: Optional[str] = None
+    # Aggregates by DAO maintained in the aggregates file of the runner
+    AGGREGATES: Aggregates = {}
+    # Columns with an index next to the data file (see index.py). By default, the DAO_KEY
+    INDEX_COLUMNS: Optional[list[str]] = None
+    # Columns always stored dictionary encoded (see storage.py)
+    CATEGORICAL_COLUMNS: list[str] = []
+
     def __init__(self, name:str, runner: 'Runner'):
         self.name: str = name
         self.runner = runner
+        self.stats: CollectorRunStats = CollectorRunStats()
+        self.memory: MemoryMonitor = MemoryMonitor()
 
     @property
     def logger(self):
@@ -77,6 +70,29 @@ class Collector(ABC):
     def df(self) -> pd.DataFrame:
         return pd.DataFrame()
 
+    @property
+    def index_columns(self) -> list[str]:
+        if self.INDEX_COLUMNS is not None:
+            return self.INDEX_COLUMNS
+        return [self.DAO_KEY] if self.DAO_KEY else []
+
+    def read_dao(self, dao: Union[str, list[str]], columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """ Reads the rows of a DAO (or list of DAOs) using the index of the DAO_KEY """
+        if not self.DAO_KEY:
+            raise ValueError(f"{self.collectorid} has no DAO_KEY")
+        if not self.data_path.is_file():
+            return pd.DataFrame()
+
+        return KeyIndex(self.data_path, self.DAO_KEY).take(dao, columns).to_pandas()
+
+    @property
+    def batch_key(self) -> Optional[tuple]:
+        """
+        Collectors with the same batch_key can request their data at once
+        using `prefetch_batch`. None if the collector can't be batched.
+        """
+        return None
+
     def verify(self) -> bool:
         """
         Checks if the Collector is in a valid state. This check is run for every
@@ -91,11 +107,32 @@ class Collector(ABC):
             self.logger.warning("Empty dataframe, not updating file")
             return
 
+        self.stats.update_rows += len(df)
+        with self.stats.measure('update_time'):
+            combined = self._write_data(df, force)
+            self._update_indexes()
+
+        self.stats.file_size = self.data_path.stat().st_size
+        return combined
+
+    def _update_indexes(self):
+        columns = file_columns(self.data_path)
+        for c in self.index_columns:
+            if c in columns:
+                KeyIndex(self.data_path, c).build()
+
+    def _update_aggregates(self, data: pd.DataFrame, **kwargs):
+        if self.AGGREGATES and self.DAO_KEY in data.columns:
+            update_aggregates(self.runner.basedir / AGGREGATES_FILE, self.AGGREGATES, self.DAO_KEY, data, **kwargs)
+
+    def _write_data(self, df: pd.DataFrame, force: bool) -> pd.DataFrame:
         if not self.data_path.is_file():
-            df.reset_index(drop=True).to_feather(self.data_path)
-            return
+            df = df.reset_index(drop=True)
+            write_df(df, self.data_path, self.CATEGORICAL_COLUMNS)
+            self._update_aggregates(df)
+            return df
 
-        prev_df: pd.DataFrame = pd.read_feather(self.data_path)
+        prev_df: pd.DataFrame = read_df(self.data_path)
 
         # If force is selected, we delete the ones of the same network only
         if force:
@@ -105,8 +142,17 @@ class Collector(ABC):
         df = df.set_index(self.INDEX, verify_integrity=True, drop=True)
 
         # Updating data
-        combined = df.combine_first(prev_df).reset_index()
-        combined.to_feather(self.data_path)
+        combined = df.combine_first(prev_df)
+        # Only the rows changed by this update are aggregated
+        self._update_aggregates(
+            combined.reset_index(),
+            added=combined[combined.index.isin(df.index)].reset_index(),
+            removed=prev_df[prev_df.index.isin(df.index)].reset_index(),
+            network=self.network if force else None,
+        )
+
+        combined = combined.reset_index()
+        write_df(combined, self.data_path, self.CATEGORICAL_COLUMNS)
         return combined
 
     @abstractmethod
@@ -123,6 +169,14 @@ class NetworkCollector(Collector):
     def collectorid(self) -> str:
         return '-'.join([super().collectorid, self.network])
 
+    def read_dao(self, dao: Union[str, list[str]], columns: Optional[list[str]] = None) -> pd.DataFrame:
+        read_columns = columns if columns is None or 'network' in columns else [*columns, 'network']
+        df = super().read_dao(dao, read_columns)
+        if df.empty:
+            return df
+
+        return df[df['network'] == self.network][columns or df.columns].reset_index(drop=True)
+
 class UpdatableCollector(Collector): # Flag class
     pass
 
@@ -154,6 +208,31 @@ class NetworkRunner(Runner, ABC):
     def __init__(self, dw):
         super().__init__(dw)
         self.networks = {n for n,v in ENDPOINTS.items() if self.name in v and not n.startswith('_')}
+        self._network_collectors: dict[str, list[Collector]] = {}
+        self._global_collectors: Optional[list[Collector]] = None
+
+    def build_collectors(self, network: str) -> list[Collector]:
+        """ Creates the collectors of a network. Only called the first time they are needed """
+        return []
+
+    def build_global_collectors(self) -> list[Collector]:
+        """ Creates the collectors that don't depend on the network """
+        return []
+
+    def network_collectors(self, network: str) -> list[Collector]:
+        if network not in self._network_collectors:
+            self._network_collectors[network] = self.build_collectors(network)
+        return self._network_collectors[network]
+
+    @property
+    def global_collectors(self) -> list[Collector]:
+        if self._global_collectors is None:
+            self._global_collectors = self.build_global_collectors()
+        return self._global_collectors
+
+    @property
+    def collectors(self) -> list[Collector]:
+        return [c for n in self.networks for c in self.network_collectors(n)] + self.global_collectors
 
     def filterCollectors(self, 
         networks: Iterable[str] = [],
@@ -161,6 +240,9 @@ class NetworkRunner(Runner, ABC):
         long_names: Iterable[str] = []
     ) -> Iterable[Collector]:
         result: Iterable[Collector] = self.collectors
+        if networks:
+            # Only building the collectors of the selected networks
+            result = [c for n in self.networks if n in networks for c in self.network_collectors(n)] + self.global_collectors
 
         if config.run_only_updatable:
             result = filter(lambda c: isinstance(c, UpdatableCollector), result)
@@ -191,56 +273,65 @@ class NetworkRunner(Runner, ABC):
             long_names=[long_name] if long_name else []
         ), None)
 
-    @retry(retry=retry_if_exception_type(TransportQueryError), wait=wait_exponential(max=10), stop=stop_after_attempt(3))
     def validated_block(self, network: str, prev_block: Optional[Block] = None, until_date: Optional[datetime] = None) -> Optional[Block]:
-        requester = GQLRequester(get_graph_url(ENDPOINTS[network]['_blocks']))
-        ds = requester.get_schema()
+        return get_validated_block(network, prev_block=prev_block, until_date=until_date)
 
-        number_gte = prev_block.number if prev_block else 0
-        
-        args = {
-            "first": 1,
-            "skip": config.SKIP_INVALID_BLOCKS,
-            "orderBy": "number",
-            "orderDirection": "desc",
-            "where": {
-                "number_gte": number_gte
-            }
-        }
-
-        # TODO: SET THE UNTIL_DATE
-        if until_date:
-            del args["skip"]
-            del args["where"]["number_gte"]
-            args["where"]["timestamp_lte"] = int(until_date.timestamp())
-
-        response = requester.request(ds.Query.blocks(**args).select(
-            ds.Block.id,
-            ds.Block.number,
-            ds.Block.timestamp
-        ))["blocks"]
-    
-        if len(response) == 0:
-            self.logger.warning(f"Blocks query returned no response with args {args}")
-            return prev_block
-
-        return Block(response[0])
+    @staticmethod
+    def _verify(c: Collector) -> tuple[bool, Optional[str]]:
+        try:
+            return c.verify(), None
+        except Exception:
+            return False, traceback.format_exc()
 
     @staticmethod
     def _verifyCollectors(tocheck: Iterable[Collector]) -> Iterable[Collector]:
+        tocheck = list(tocheck)
         verified = []
-        for c in tqdm(list(tocheck), desc="Verifying"):
-            try:
-                if c.verify():
+        # Most of the time is spent waiting for the APIs, and the results
+        # are printed in the same order as the collectors
+        with ThreadPoolExecutor(max_workers=int(config.THE_GRAPH_MAX_CONCURRENCY)) as executor:
+            results = executor.map(NetworkRunner._verify, tocheck)
+            for c, (ok, tb) in zip(tocheck, tqdm(results, total=len(tocheck), desc="Verifying")):
+                if ok:
                     verified.append(c)
+                elif tb:
+                    print(f"Won't run {c.collectorid}", file=sys.stderr)
+                    print(tb, end='', file=sys.stderr)
                 else:
                     print(f"Verified returned false for {c.collectorid} (view logs the see why)")
-            except Exception:
-                print(f"Won't run {c.collectorid}", file=sys.stderr)
-                traceback.print_exc()
         return verified
 
-    def run(self, networks: list[str] = [], force=False, collectors=None, until_date: Optional[datetime]=None):
+    def _prefetch_batch(self, c: Collector, pending: list[Collector], block: Block, metadata: RunnerMetadata, force: bool) -> list[str]:
+        """ Prefetches the data of the pending collectors with the same batch_key as c
+
+        Returns the ids of the collectors in the batch
+        """
+        group = [o for o in pending if o.batch_key == c.batch_key]
+        group = group[:int(config.BATCH_MAX_QUERIES)]
+        if len(group) < 2:
+            return []
+
+        prev_blocks: dict[str, Block] = {}
+        for o in group:
+            o_force = force or block < metadata[o.collectorid].block
+            prev_blocks[o.collectorid] = Block() if o_force else metadata[o.collectorid].block
+
+        try:
+            c.prefetch_batch(group, block=block, prev_blocks=prev_blocks)
+        except Exception:
+            # Each collector will request its own data
+            self.logger.exception(f"Could not prefetch {[o.collectorid for o in group]}")
+
+        return [o.collectorid for o in group]
+
+    def run(self, networks: list[str] = [], force=False, collectors=None, until_date: Optional[datetime]=None, blocks: Optional[BlockResolver]=None):
+        """ Runs the collectors
+
+        The blocks of each network are obtained from `blocks`, which should be
+        shared with the other runners to use the same blocks in the whole run.
+        """
+        blocks = blocks or BlockResolver(until_date=until_date, cache=self.cache)
+
         self.basedir.mkdir(parents=True, exist_ok=True)
 
         print("Verifying collectors")
@@ -254,47 +345,59 @@ class NetworkRunner(Runner, ABC):
 
         with RunnerMetadata(self) as metadata:
             print(f'--- Updating {self.name} datawarehouse ---')            
-            blocks: dict[str, Block] = {}
-            for c in verified:
+            network_blocks: dict[str, Block] = {}
+            batched: set[str] = set()
+            for i, c in enumerate(verified):
+                c.stats = CollectorRunStats()
+                c.memory = MemoryMonitor(int(config.MEMORY_BUDGET))
                 try:
                     if isinstance(c, NetworkCollector):
-                        if c.network not in blocks:
-                            # Getting a block more recent than the one in the metadata (just to narrow down the search)
-                            print("Requesting a block number...", end='\r')
-                            blocks[c.network] = self.validated_block(
-                                network=c.network, 
+                        if c.network not in network_blocks:
+                            network_blocks[c.network] = blocks.resolve(
+                                c.network,
                                 prev_block=None if force else metadata[c.collectorid].block,
-                                until_date=until_date,
                             )
-                            print(f"Using block number {blocks[c.network].number} ({blocks[c.network].id}) for {c.network} (ts: {blocks[c.network].timestamp.isoformat()})")
+                            print(f"Using block number {network_blocks[c.network].number} ({network_blocks[c.network].id}) for {c.network} (ts: {network_blocks[c.network].timestamp.isoformat()})")
 
                         print(f"Running collector {c.long_name} ({c.network})")
-                        olderBlock = blocks[c.network] < metadata[c.collectorid].block
+                        olderBlock = network_blocks[c.network] < metadata[c.collectorid].block
                         if not force and olderBlock:
                             print("Warning: Forcing because requesting an older block")
                             self.logger.warning("Forcing because using an older block")
 
+                        # Prefetching keeps the data of the whole batch in memory
+                        c.memory.sample()
+                        if config.BATCH_QUERIES and c.batch_key and c.collectorid not in batched and not c.memory.over_budget:
+                            pending = [o for o in verified[i:] if o.collectorid not in batched]
+                            batched.update(self._prefetch_batch(c, pending, network_blocks[c.network], metadata, force))
+
                         # Running the collector
-                        c.run(
-                            force=force or olderBlock, 
-                            block=blocks[c.network],
-                            prev_block=metadata[c.collectorid].block,
-                        )
+                        with c.stats.measure('duration'), c.memory, profile(c.collectorid):
+                            c.run(
+                                force=force or olderBlock, 
+                                block=network_blocks[c.network],
+                                prev_block=metadata[c.collectorid].block,
+                            )
 
                         # Updating the block in the metadata
-                        metadata[c.collectorid].block = blocks[c.network]
+                        metadata[c.collectorid].block = network_blocks[c.network]
                     else:
                         print(f"Running collector {c.long_name}")
-                        c.run(
-                            force=force,
-                        )
+                        with c.stats.measure('duration'), c.memory, profile(c.collectorid):
+                            c.run(
+                                force=force,
+                            )
 
                     metadata[c.collectorid].last_update = datetime.now(timezone.utc)
                 except Exception as e:
+                    c.stats.ok = False
                     metadata.errors[c.collectorid] = e.__str__()
                     if config.raise_runner_errors:
                         raise e
                     else:
                         # TODO: Use a logger instead
                         print(traceback.format_exc(), file=sys.stderr)
+                finally:
+                    c.stats.peak_memory = c.memory.peak
+                    metadata[c.collectorid].add_run(c.stats)
             print(f'--- {self.name}\'s datawarehouse updated ---')
\ No newline at end of file
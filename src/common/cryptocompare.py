@@ -1,10 +1,14 @@
+from typing import Optional
+
 import pandas as pd
 import numpy as np
 
 from .api_requester import CryptoCompareRequester
 
 from .. import config
+from ..metadata import CollectorRunStats
 from .common import Collector, NetworkRunner
+from .storage import read_df, write_df
 
 import logging
 
@@ -14,7 +18,7 @@ Empty CryptoCompare API key. You can obtain one from https://www.cryptocompare.c
 You can set the API key using the DAOA_CC_API_KEY env variable.
 """
 
-def cc_postprocessor(df: pd.DataFrame) -> pd.DataFrame:
+def cc_postprocessor(df: pd.DataFrame, stats: Optional[CollectorRunStats] = None) -> pd.DataFrame:
     ccrequester = CryptoCompareRequester(api_key=config.CC_API_KEY)
 
     tokenSymbols = df['symbol'].drop_duplicates()
@@ -36,6 +40,10 @@ def cc_postprocessor(df: pd.DataFrame) -> pd.DataFrame:
 
     df = df.apply(_apply_values, axis='columns')
 
+    if stats:
+        stats.requests += ccrequester.requests
+        stats.bytes += ccrequester.bytes
+
     return df
 
 class CCPricesCollector(Collector):
@@ -55,8 +63,15 @@ class CCPricesCollector(Collector):
         return self.runner.filterCollector(name='tokenBalances')
 
     def run(self, force=False, block=None):
-        tokenSymbols = pd.read_feather(self.base.data_path, columns=['symbol']).drop_duplicates()['symbol']
+        tokenSymbols = read_df(self.base.data_path, columns=['symbol']).drop_duplicates()['symbol']
         # TODO: Get only coins with available info (relaxedValidation=False)
 
-        df = pd.DataFrame.from_dict(self.requester.get_symbols_price(tokenSymbols, relaxedValidation=True), orient='index')
-        df.reset_index().to_feather(self.data_path)
\ No newline at end of file
+        requests, nbytes = self.requester.requests, self.requester.bytes
+        with self.stats.measure('fetch_time'):
+            df = pd.DataFrame.from_dict(self.requester.get_symbols_price(tokenSymbols, relaxedValidation=True), orient='index')
+        self.stats.requests += self.requester.requests - requests
+        self.stats.bytes += self.requester.bytes - nbytes
+        self.stats.rows += len(df)
+
+        with self.stats.measure('update_time'):
+            write_df(df.reset_index(), self.data_path)
\ No newline at end of file
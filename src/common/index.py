@@ -0,0 +1,225 @@
+"""
+    Descp: Sidecar indexes of the columns of the datawarehouse files
+
+    The index of the column `col` of `<name>.arr` is stored next to it, as
+    `<name>.arr.<col>.idx`. It has the sorted keys of the column, and the
+    ranges of rows with each key, so the rows of a key (like a DAO) are found
+    with a binary search, and only the record batches that contain them are
+    read. The index saves the size and modification time of the file it was
+    built from, and it is not used if the file changed.
+
+    The indexes are only written by the collectors when they update a file.
+    Without a valid index, the column is scanned to find the rows.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .storage import decode_table, hex_key
+from .. import config
+
+INDEX_SUFFIX = '.idx'
+
+# Columns with the DAO of every row, in order of preference
+DAO_KEYS = ['dao', 'molochAddress', 'orgAddress', 'organizationAddress']
+
+def index_path(path: Path, column: str) -> Path:
+    return path.with_name(f'{path.name}.{column}{INDEX_SUFFIX}')
+
+def _source_stat(path: Path) -> dict[str, int]:
+    st = path.stat()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def file_columns(path: Path) -> list[str]:
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).schema.names
+
+def _open(source: pa.MemoryMappedFile, columns: Optional[Iterable[str]] = None) -> pa.ipc.RecordBatchFileReader:
+    """ Opens an .arr file reading only the given columns """
+    if columns is None:
+        return pa.ipc.open_file(source)
+
+    schema = pa.ipc.open_file(source).schema
+    fields = [schema.get_field_index(c) for c in columns]
+    if -1 in fields:
+        missing = [c for c, i in zip(columns, fields) if i == -1]
+        raise KeyError(f"Columns {missing} not in the file")
+
+    return pa.ipc.open_file(source, options=pa.ipc.IpcReadOptions(included_fields=fields))
+
+def read_rows(path: Path, rows: np.ndarray, offsets: np.ndarray, columns: Optional[list[str]] = None) -> pa.Table:
+    """ Reads the given (sorted) rows of an .arr file, decoding only the batches that have them
+
+    offsets are the first row of every record batch of the file
+    """
+    with pa.memory_map(str(path)) as source:
+        reader = _open(source, columns)
+        batches = np.searchsorted(offsets, rows, side='right') - 1
+
+        tables = []
+        for b in np.unique(batches):
+            batch = reader.get_batch(int(b))
+            tables.append(pa.Table.from_batches([batch.take(pa.array(rows[batches == b] - offsets[b]))]))
+
+        if not tables:
+            return reader.schema.empty_table()
+        return pa.concat_tables(tables)
+
+def _dictionary_decode(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(column.type):
+        return column.cast(column.type.value_type)
+    return column
+
+def _key_ranges(keys: pa.ChunkedArray) -> tuple[pa.Array, np.ndarray, np.ndarray]:
+    """ Returns the distinct keys of every run of consecutive rows, sorted, with the start and stop of the run """
+    # Sorting the codes of the distinct keys is faster than sorting the strings
+    encoded = pc.dictionary_encode(keys).combine_chunks()
+    dictionary = encoded.dictionary
+    rank = np.empty(len(dictionary) + 1, dtype=np.int64)
+    rank[pc.sort_indices(dictionary).to_numpy()] = np.arange(len(dictionary))
+    # Nulls are left at the end, and not indexed
+    rank[-1] = len(dictionary)
+    codes = encoded.indices.fill_null(len(dictionary)).to_numpy()
+
+    # The sort is stable, so the rows of each key are in order
+    ranks = rank[codes]
+    rows = np.argsort(ranks, kind='stable')[:len(keys) - keys.null_count]
+    if not len(rows):
+        return dictionary[:0], rows, rows
+
+    ranks = ranks[rows]
+
+    starts = np.ones(len(rows), dtype=bool)
+    starts[1:] = (np.diff(rows) != 1) | (np.diff(ranks) != 0)
+    starts = np.flatnonzero(starts)
+    stops = np.append(starts[1:], len(rows)) - 1
+
+    return dictionary.take(pa.array(codes[rows[starts]])), rows[starts], rows[stops] + 1
+
+class KeyIndex:
+    """ The index of a column of an .arr file """
+    def __init__(self, path: Path, column: str):
+        self.path = path
+        self.column = column
+        self.index_path = index_path(path, column)
+        self._loaded: Optional[dict[str, Any]] = None
+        self._keys: Optional[np.ndarray] = None
+        self._binary = False
+
+    def _read_metadata(self) -> Optional[dict[str, Any]]:
+        if not self.index_path.is_file():
+            return None
+
+        with pa.memory_map(str(self.index_path)) as source:
+            schema = pa.ipc.open_file(source).schema
+        return json.loads(schema.metadata[b'dao_analyzer'])
+
+    def is_valid(self) -> bool:
+        """ If the index exists and is of the current version of the file """
+        metadata = self._read_metadata()
+        return metadata is not None and metadata['source'] == _source_stat(self.path)
+
+    def _read_column(self) -> tuple[pa.ChunkedArray, np.ndarray]:
+        """ Reads the column, and the first row of every record batch """
+        with pa.memory_map(str(self.path)) as source:
+            reader = _open(source, [self.column])
+            batches = [reader.get_batch(i).column(0) for i in range(reader.num_record_batches)]
+
+        offsets = np.cumsum([0] + [len(b) for b in batches])[:-1]
+        return pa.chunked_array(batches, reader.schema.field(0).type), offsets
+
+    def build(self, threshold: Optional[float] = None) -> 'KeyIndex':
+        """ Writes the index of the current version of the file
+
+        If the column has more than `threshold` (by default INDEX_THRESHOLD)
+        distinct keys per row, like a table with a row per DAO, the index
+        would be as big as the column, so it is removed instead.
+        """
+        threshold = config.INDEX_THRESHOLD if threshold is None else threshold
+        source_stat = _source_stat(self.path)
+        column, offsets = self._read_column()
+
+        self._loaded = None
+        if pc.count_distinct(_dictionary_decode(column)).as_py() > threshold * (len(column) - column.null_count):
+            self.index_path.unlink(missing_ok=True)
+            return self
+
+        keys, starts, stops = _key_ranges(column)
+        metadata = {
+            'source': source_stat,
+            'offsets': offsets.tolist(),
+        }
+        table = pa.table({'key': keys, 'start': starts, 'stop': stops})
+        table = table.replace_schema_metadata({'dao_analyzer': json.dumps(metadata)})
+
+        # Written to a temporary file, so readers don't see a partial index
+        tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+        with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        tmp.replace(self.index_path)
+
+        return self
+
+    def _load(self) -> Optional[dict[str, Any]]:
+        """ Reads the index, or returns None if there is no index of the current file """
+        if self._loaded is not None and self._loaded['source'] == _source_stat(self.path):
+            return self._loaded
+
+        if not self.is_valid():
+            return None
+
+        with pa.memory_map(str(self.index_path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+
+        self._loaded = json.loads(table.schema.metadata[b'dao_analyzer'])
+        self._loaded['offsets'] = np.array(self._loaded['offsets'], dtype=np.int64)
+        self._loaded['start'] = table['start'].to_numpy()
+        self._loaded['stop'] = table['stop'].to_numpy()
+        self._keys = table['key'].to_numpy()
+        self._binary = pa.types.is_fixed_size_binary(table.schema.field('key').type)
+        return self._loaded
+
+    def _scan(self, keys: list[Any]) -> tuple[np.ndarray, np.ndarray]:
+        """ Finds the rows with the keys reading the whole column. Returns the rows and the offsets of the batches """
+        column, offsets = self._read_column()
+        column = _dictionary_decode(column)
+        if pa.types.is_fixed_size_binary(column.type):
+            keys = [k for k in map(hex_key, keys) if len(k) == column.type.byte_width]
+
+        found = pc.is_in(column, value_set=pa.array(keys, column.type))
+        return np.flatnonzero(found.to_numpy()), offsets
+
+    def _rows(self, key: Any) -> tuple[np.ndarray, np.ndarray]:
+        keys = list(key) if isinstance(key, (list, tuple, set)) else [key]
+        loaded = self._load()
+        if loaded is None:
+            return self._scan(keys)
+
+        ranges = []
+        for k in keys:
+            if self._binary:
+                k = hex_key(k)
+            lo, hi = np.searchsorted(self._keys, k, side='left'), np.searchsorted(self._keys, k, side='right')
+            ranges.extend(np.arange(s, e) for s, e in zip(loaded['start'][lo:hi], loaded['stop'][lo:hi]))
+
+        if not ranges:
+            return np.array([], dtype=np.int64), loaded['offsets']
+        return np.sort(np.concatenate(ranges)), loaded['offsets']
+
+    def rows(self, key: Any) -> np.ndarray:
+        """ The (sorted) rows of the file with the given key, or keys if it is a list """
+        return self._rows(key)[0]
+
+    def take(self, key: Any, columns: Optional[list[str]] = None) -> pa.Table:
+        """ Reads the rows of the file with the given key (or keys), with the binary columns as hex """
+        rows, offsets = self._rows(key)
+        return decode_table(read_rows(self.path, rows, offsets, columns))
@@ -0,0 +1,70 @@
+"""
+    Descp: Memory usage accounting of the collectors
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+import os
+import resource
+import sys
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_STATM = Path('/proc/self/statm')
+
+def current_rss() -> int:
+    """ Returns the resident set size of the process in bytes """
+    if psutil:
+        return psutil.Process().memory_info().rss
+
+    if _STATM.is_file():
+        return int(_STATM.read_text().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    # Not the current RSS but the peak one
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+class MemoryMonitor:
+    """ Samples the RSS of the process in a background thread while inside the context
+
+    Keeps the peak RSS, and tells if the memory budget (in bytes) has been reached.
+    A budget of 0 means no budget.
+    """
+    INTERVAL: float = 0.1
+
+    def __init__(self, budget: int = 0):
+        self.budget = budget
+        self.peak: int = 0
+        self.last: int = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, name='memory-monitor', daemon=True)
+
+    def sample(self) -> int:
+        self.last = current_rss()
+        self.peak = max(self.peak, self.last)
+        return self.last
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.INTERVAL):
+            self.sample()
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget > 0 and self.last >= self.budget
+
+    def __enter__(self):
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
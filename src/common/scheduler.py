@@ -0,0 +1,141 @@
+"""
+    Descp: Process-wide scheduler to limit the concurrent requests to The Graph
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+import logging
+import threading
+import time
+
+class EndpointLimit:
+    """ Concurrency limit of a single endpoint, adapted using AIMD
+
+    The limit grows by one every `limit` successful requests (additive increase)
+    and is halved (multiplicative decrease) when the endpoint is overloaded:
+    when it returns an overload error, or a request is much slower than the
+    smoothed latency of the previous ones.
+    """
+    DECREASE_FACTOR = 0.5
+    # Weight of every new latency in the smoothed baseline
+    BASELINE_WEIGHT = 0.1
+    # Requests slower than this many times the baseline mean the endpoint is overloaded
+    SLOW_FACTOR = 3
+
+    def __init__(self, maximum: int, clock: Callable[[], float] = time.monotonic):
+        self.maximum = maximum
+        self.limit: float = maximum
+        self.in_flight: int = 0
+        self.baseline: Optional[float] = None
+        self.clock = clock
+        self._last_decrease: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def is_slow(self, latency: float, min_latency: float = 0) -> bool:
+        """ If the latency is well above the baseline, and above min_latency """
+        return self.baseline is not None and latency > max(min_latency, self.SLOW_FACTOR * self.baseline)
+
+    def observe(self, latency: float):
+        if self.baseline is None:
+            self.baseline = latency
+        else:
+            self.baseline += self.BASELINE_WEIGHT * (latency - self.baseline)
+
+    def increase(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def decrease(self, cooldown: float):
+        # Requests in flight when the endpoint got overloaded will fail too, so
+        # we only decrease once per cooldown period
+        now = self.clock()
+        if self._last_decrease is not None and now - self._last_decrease < cooldown:
+            return
+
+        self._last_decrease = now
+        self.limit = max(1, self.limit * self.DECREASE_FACTOR)
+
+class RequestScheduler:
+    """ Limits the number of requests in flight, globally and per endpoint
+
+    Every request must be done inside a `slot`. The per-endpoint limits are
+    adapted from the overload errors and the latency of the requests. Requests
+    faster than `target_latency` are never considered slow, and the limit is
+    decreased at most once every `cooldown` seconds, measured with `clock`.
+    """
+    def __init__(self,
+        max_concurrency: int,
+        endpoint_concurrency: int,
+        target_latency: float,
+        cooldown: float,
+        is_overload: Callable[[BaseException], bool],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.endpoint_concurrency = endpoint_concurrency
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.is_overload = is_overload
+        self.clock = clock
+        self.logger = logging.getLogger('dao_analyzer.scheduler')
+
+        self._cond = threading.Condition()
+        self._in_flight: int = 0
+        self._endpoints: dict[str, EndpointLimit] = {}
+
+    def limit(self, endpoint: str) -> EndpointLimit:
+        with self._cond:
+            if endpoint not in self._endpoints:
+                self._endpoints[endpoint] = EndpointLimit(self.endpoint_concurrency, self.clock)
+            return self._endpoints[endpoint]
+
+    def _acquire(self, limit: EndpointLimit):
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_flight < self.max_concurrency and limit.available)
+            self._in_flight += 1
+            limit.in_flight += 1
+
+    def _release(self, limit: EndpointLimit):
+        with self._cond:
+            self._in_flight -= 1
+            limit.in_flight -= 1
+            self._cond.notify_all()
+
+    def _feedback(self, endpoint: str, limit: EndpointLimit, latency: Optional[float]):
+        """ Adapts the limit after a request. The latency is None if the request failed with an overload error """
+        with self._cond:
+            prev = int(limit.limit)
+            if latency is None or limit.is_slow(latency, self.target_latency):
+                limit.decrease(cooldown=self.cooldown)
+            else:
+                limit.increase()
+
+            if latency is not None:
+                limit.observe(latency)
+
+            if int(limit.limit) != prev:
+                self.logger.debug(f"Concurrency limit of {endpoint} changed from {prev} to {int(limit.limit)}")
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, endpoint: str) -> Iterator[None]:
+        limit = self.limit(endpoint)
+        self._acquire(limit)
+
+        start = self.clock()
+        try:
+            yield
+        except BaseException as e:
+            if self.is_overload(e):
+                self._feedback(endpoint, limit, latency=None)
+            raise
+        else:
+            self._feedback(endpoint, limit, latency=self.clock() - start)
+        finally:
+            self._release(limit)
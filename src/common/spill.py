@@ -0,0 +1,118 @@
+"""
+    Descp: Buffer of requested pages that spills to disk when it grows too big
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+import logging
+
+import pandas as pd
+import pyarrow as pa
+
+SEGMENT_SUFFIX = '.arrows'
+
+class SpillBuffer:
+    """ Keeps the received pages in memory until `threshold` bytes are exceeded
+    or `pressure()` returns True, then writes them to Arrow IPC stream files
+
+    The pages are flattened (like `json_normalize`) before being written. A new
+    segment file is started every time the schema changes (e.g. a column that
+    was null in the previous pages now has values).
+
+    Must be used as a context manager (or closed), the segment files are removed on exit.
+
+    Only the memory of the fetch phase is bounded: the collector converts the
+    whole result to pandas afterwards, as the postprocessors and the merge
+    with the previous data need every row at once.
+    """
+    def __init__(self,
+        directory: Path,
+        name: str,
+        threshold: int,
+        pressure: Optional[Callable[[], bool]] = None,
+    ):
+        self.directory = directory
+        self.name = name.replace('/', '_')
+        self.threshold = threshold
+        self.pressure = pressure or (lambda: False)
+        self.logger = logging.getLogger('dao_analyzer.spill')
+
+        # Number of rows received
+        self.rows: int = 0
+        self._rows: list[dict[str, Any]] = []
+        self._size: int = 0
+        self._writer: Optional[pa.ipc.RecordBatchStreamWriter] = None
+        self._schema: Optional[pa.Schema] = None
+        self._segments: list[Path] = []
+
+    @property
+    def spilled(self) -> bool:
+        return bool(self._segments)
+
+    def append(self, page: list[dict[str, Any]], size: int = 0):
+        """ Adds a page of `size` bytes to the buffer """
+        self._rows.extend(page)
+        self.rows += len(page)
+        self._size += size
+
+        if (self.threshold and self._size > self.threshold) or self.pressure():
+            self.spill()
+
+    def _new_segment(self, schema: pa.Schema):
+        self._close_writer()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{self.name}-{len(self._segments):04d}{SEGMENT_SUFFIX}'
+        self._segments.append(path)
+        self._writer = pa.ipc.new_stream(path, schema)
+        self._schema = schema
+
+    def _close_writer(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def spill(self):
+        """ Writes the rows in memory to the current segment """
+        if not self._rows:
+            return
+
+        table = pa.Table.from_pandas(pd.json_normalize(self._rows), preserve_index=False)
+        if not self._writer or not self._schema.equals(table.schema):
+            self._new_segment(table.schema)
+
+        self.logger.debug(f"Spilling {len(self._rows)} rows ({self._size} bytes) to {self._segments[-1]}")
+        self._writer.write_table(table)
+        self._rows, self._size = [], 0
+
+    def result(self) -> Union[list[dict[str, Any]], pa.Table]:
+        """ Returns every row received
+
+        If nothing was spilled, the rows are returned as is. Otherwise, the
+        table is assembled from the memory mapped segments.
+        """
+        if not self.spilled:
+            return self._rows
+
+        self.spill()
+        self._close_writer()
+
+        tables = [pa.ipc.open_stream(pa.memory_map(str(p))).read_all() for p in self._segments]
+        return pa.concat_tables(tables, promote_options='permissive')
+
+    def close(self):
+        """ Removes the segment files """
+        self._close_writer()
+        for p in self._segments:
+            p.unlink(missing_ok=True)
+        self._rows, self._segments = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
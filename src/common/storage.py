@@ -0,0 +1,158 @@
+"""
+    Descp: Reading and writing the .arr files of the datawarehouse
+
+    String columns with few distinct values (network, stage, symbol, the DAO
+    of the rows...) are stored dictionary encoded, and read as pandas
+    categoricals. A column is encoded if the collector declares it, or if its
+    distinct values are at most DICTIONARY_THRESHOLD times its rows.
+
+    With BINARY_ADDRESSES, the columns whose values are all lowercase hex
+    addresses (0x + 40 digits) or hashes (0x + 64 digits) are stored as
+    fixed_size_binary(20) and fixed_size_binary(32), and marked in the
+    metadata of the field. They are converted back to hex strings when read.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from .. import config
+
+ENCODING_KEY = b'dao_analyzer.encoding'
+# Name of the encoding -> number of bytes
+BINARY_ENCODINGS = {'address': 20, 'hash': 32}
+
+# The two hex digits of every byte, and the byte of every two hex digits
+_HEX_PAIRS = np.frombuffer(b''.join(b'%02x' % i for i in range(256)), dtype=np.uint16)
+_BYTES = np.zeros(2**16, dtype=np.uint8)
+_BYTES[_HEX_PAIRS] = np.arange(256)
+
+def _is_string(t: pa.DataType) -> bool:
+    return pa.types.is_string(t) or pa.types.is_large_string(t)
+
+def decode_column(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(column.type):
+        return column.cast(column.type.value_type)
+    return column
+
+def _binary_encoding(column: pa.ChunkedArray) -> Optional[str]:
+    """ The binary encoding of the column, if every value is an address or every value is a hash """
+    if column.null_count == len(column):
+        return None
+
+    for name, size in BINARY_ENCODINGS.items():
+        if pc.all(pc.match_substring_regex(column, f'^0x[0-9a-f]{{{2*size}}}$')).as_py():
+            return name
+    return None
+
+def _with_nulls(array: pa.Array, values: pa.Array) -> pa.Array:
+    if not array.null_count:
+        return values
+    return pc.if_else(array.is_valid(), values, pa.scalar(None, values.type))
+
+def hex_to_binary(array: pa.Array, size: int) -> pa.Array:
+    """ Converts an array of 0x-prefixed hex strings of size bytes to fixed_size_binary(size) """
+    filled = pc.fill_null(array, '0x' + '00' * size).cast(pa.large_string())
+    offsets = np.frombuffer(filled.buffers()[1], dtype=np.int64)[filled.offset:filled.offset + len(filled) + 1]
+    digits = np.frombuffer(filled.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]].view(np.uint16)
+
+    values = _BYTES[digits.reshape(-1, 1 + size)[:, 1:]]
+    binary = pa.Array.from_buffers(pa.binary(size), len(array), [None, pa.py_buffer(values.tobytes())])
+    return _with_nulls(array, binary)
+
+def binary_to_hex(array: pa.Array) -> pa.Array:
+    """ Converts a fixed_size_binary array to 0x-prefixed hex strings """
+    if isinstance(array, pa.DictionaryArray):
+        return pa.DictionaryArray.from_arrays(array.indices, binary_to_hex(array.dictionary))
+
+    size = array.type.byte_width
+    if not len(array):
+        return pa.array([], pa.large_string())
+
+    values = np.frombuffer(array.buffers()[1], dtype=np.uint8)[array.offset*size:(array.offset + len(array))*size]
+    values = values.reshape(-1, size)
+
+    digits = np.empty((len(array), 1 + size), dtype=np.uint16)
+    digits[:, 0] = np.frombuffer(b'0x', dtype=np.uint16)[0]
+    digits[:, 1:] = _HEX_PAIRS[values]
+
+    offsets = np.arange(len(array) + 1, dtype=np.int64) * (2 + 2*size)
+    strings = pa.Array.from_buffers(pa.large_string(), len(array), [None, pa.py_buffer(offsets), pa.py_buffer(digits)])
+    return _with_nulls(array, strings)
+
+def hex_key(value: Any) -> Any:
+    """ The value of a key in a binary encoded column """
+    if isinstance(value, str):
+        return bytes.fromhex(value.removeprefix('0x'))
+    return value
+
+def is_binary_encoded(field: pa.Field) -> bool:
+    return bool(field.metadata) and ENCODING_KEY in field.metadata
+
+def encode_table(
+    table: pa.Table,
+    categorical: Iterable[str] = (),
+    threshold: Optional[float] = None,
+    binary: Optional[bool] = None,
+) -> pa.Table:
+    """ Dictionary encodes the categorical columns, and the string columns under the threshold
+
+    If binary (BINARY_ADDRESSES by default), the address and hash columns are converted to binary
+    """
+    threshold = config.DICTIONARY_THRESHOLD if threshold is None else threshold
+    binary = config.BINARY_ADDRESSES if binary is None else binary
+    categorical = set(categorical)
+
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        # Categorical columns of pandas are encoded again, as their values may have changed
+        if pa.types.is_dictionary(field.type) and _is_string(field.type.value_type):
+            column = decode_column(column)
+        elif not _is_string(field.type):
+            continue
+
+        metadata = None
+        if binary and (encoding := _binary_encoding(column)):
+            size = BINARY_ENCODINGS[encoding]
+            column = pa.chunked_array([hex_to_binary(c, size) for c in column.chunks], pa.binary(size))
+            metadata = {ENCODING_KEY: encoding.encode()}
+
+        encoded = pc.dictionary_encode(column)
+        distinct = max((len(c.dictionary) for c in encoded.chunks), default=0)
+        if field.name in categorical or distinct <= threshold * table.num_rows:
+            column = encoded
+
+        table = table.set_column(i, pa.field(field.name, column.type, metadata=metadata), column)
+
+    return table
+
+def decode_table(table: pa.Table) -> pa.Table:
+    """ Converts the binary encoded columns back to hex strings """
+    for i, field in enumerate(table.schema):
+        if is_binary_encoded(field):
+            t = pa.large_string()
+            if pa.types.is_dictionary(field.type):
+                t = pa.dictionary(field.type.index_type, t)
+            column = pa.chunked_array([binary_to_hex(c) for c in table.column(i).chunks], t)
+            table = table.set_column(i, field.name, column)
+    return table
+
+def write_df(df: pd.DataFrame, path: Path, categorical: Iterable[str] = ()):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(encode_table(table, categorical), path)
+
+def read_arrow(path: Path, columns: Optional[list[str]] = None) -> pa.Table:
+    return decode_table(feather.read_table(path, columns=columns))  # noqa: PDO12
+
+def read_df(path: Path, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """ Reads an .arr file, with the dictionary encoded columns as categoricals """
+    return read_arrow(path, columns).to_pandas()
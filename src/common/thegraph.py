@@ -1,11 +1,18 @@
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, Union
 from abc import ABC, abstractmethod
+from functools import cached_property
+import threading
+import time
 
 from gql.dsl import DSLField
 from graphql.language import visit, Visitor
 
 import pandas as pd
+import pyarrow as pa
 
+from .memory import MemoryMonitor
+from .spill import SpillBuffer
+from .storage import read_df
 from .common import ENDPOINTS, Runner, NetworkCollector, UpdatableCollector, GQLRequester, get_graph_url
 from ..metadata import Block
 from .. import config
@@ -16,6 +23,35 @@ EMPTY_KEY_MSG = """
 Empty The Graph API key. You can obtain one from https://thegraph.com/docs/en/querying/managing-api-keys/
 """
 
+class SubgraphMetaCache:
+    """ Caches the `_meta` of every endpoint, so the collectors that share one only request it once """
+    # Seconds before the _meta of an endpoint is requested again
+    TTL = 60
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._meta: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, fetch: Callable[[], dict[str, Any]], refresh: bool = False) -> dict[str, Any]:
+        with self._lock:
+            lock = self._locks.setdefault(endpoint, threading.Lock())
+
+        # Concurrent callers of the same endpoint wait for the first request
+        with lock:
+            cached = self._meta.get(endpoint)
+            if refresh or cached is None or self.clock() - cached[0] > self.TTL:
+                cached = (self.clock(), fetch())
+                self._meta[endpoint] = cached
+            return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._meta.clear()
+
+_meta_cache = SubgraphMetaCache()
+
 def add_where(d: dict[str, Any], **kwargs):
     """
     Adds the values specified in kwargs to the where inside d
@@ -68,6 +104,15 @@ def get_bases_for_query(q: DSLField) -> list[str]:
     c = ColumnsVisitor()
     visit(q.ast_field.selection_set, c)
     return c.bases
+
+def _split(total: int, weights: list[int]) -> list[int]:
+    """ Splits an integer proportionally to the weights, giving the remainder to the largest fractions """
+    shares = [total * w // sum(weights) for w in weights]
+    fractions = sorted(range(len(weights)), key=lambda i: total * weights[i] % sum(weights), reverse=True)
+    for i in fractions[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
 class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
     def __init__(
         self, 
@@ -85,9 +130,16 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
         self._result_key: str = result_key or name
         self._postprocessors: list[Postprocessor] = []
         self._indexer_block: Optional[Block] = None
-        self._requester = GQLRequester(
-            endpoint=get_graph_url(subgraph_id),
-            pbar_enabled=pbar_enabled,
+        self._prefetched: Optional[tuple[tuple, SpillBuffer, dict[str, float]]] = None
+        self._subgraph_id: str = subgraph_id
+        self._pbar_enabled: bool = pbar_enabled
+
+    @cached_property
+    def _requester(self) -> GQLRequester:
+        # Created the first time it's used
+        return GQLRequester(
+            endpoint=get_graph_url(self._subgraph_id),
+            pbar_enabled=self._pbar_enabled,
         )
 
     def postprocessor(self, f: Postprocessor):
@@ -95,8 +147,12 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
         return f
 
     @property
-    def endpoint(self):
-        return self._endpoint
+    def endpoint(self) -> str:
+        return get_graph_url(self._subgraph_id)
+
+    @property
+    def batch_key(self) -> Optional[tuple]:
+        return (self.endpoint, self.network, self._index_col)
 
     @property
     def schema(self):
@@ -111,14 +167,17 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
         if not self.data_path.is_file():
             return pd.DataFrame()
 
-        df = pd.read_feather(self.data_path)
+        df = read_df(self.data_path)
         if self.network:
             df = df[df['network'] == self.network]
         
         return df
 
-    def transform_to_df(self, data: list[dict[str, Any]], skip_post: bool=False) -> pd.DataFrame:
-        if data:
+    def transform_to_df(self, data: Union[list[dict[str, Any]], pa.Table], skip_post: bool=False) -> pd.DataFrame:
+        if isinstance(data, pa.Table):
+            # Already flattened when spilled
+            df = data.to_pandas()
+        elif data:
             df = pd.DataFrame.from_dict(pd.json_normalize(data))
         else:
             df = pd.DataFrame(columns=get_columns_from_query(self.query()))
@@ -192,7 +251,7 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
 
         return no_errors
 
-    def check_subgraph_health(self, check_deployment: bool = True) -> bool:
+    def _request_meta(self) -> dict[str, Any]:
         ds = self.schema
         q = ds.Query._meta().select(
             ds._Meta_.deployment,
@@ -204,7 +263,10 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
             ),
         )
 
-        r = self._requester.request_single(q)
+        return self._requester.request_single(q)
+
+    def check_subgraph_health(self, check_deployment: bool = True, refresh: bool = False) -> bool:
+        r = _meta_cache.get(self.endpoint, self._request_meta, refresh=refresh)
 
         if r['hasIndexingErrors']:
             self.logger.error('Subgraph has indexing errors')
@@ -233,19 +295,96 @@ class TheGraphCollector(NetworkCollector, UpdatableCollector, ABC):
         else:
             return self.query
 
-    def run(self, force=False, block: Optional[Block] = None, prev_block: Optional[Block] = None):
-        self.logger.info(f"Running The Graph collector with block: {block}, prev_block: {prev_block}")
-        assert self.check_subgraph_health(check_deployment=False) # Just update the _indexer_block
+    def _check_indexed(self, block: Optional[Block]):
+        # The _indexer_block obtained in verify() is reused unless it is behind the block
+        if self._indexer_block is None or (block and self._indexer_block < block):
+            assert self.check_subgraph_health(check_deployment=False, refresh=True)
         if block and self._indexer_block:
             assert self._indexer_block >= block, f"Block number {block} is not indexed yet ({self._indexer_block})"
+
+    @staticmethod
+    def _fetch_key(block: Block, prev_block: Block) -> tuple:
+        return (block.id, prev_block.number)
+
+    def _spill_buffer(self, pressure: Callable[[], bool]) -> SpillBuffer:
+        return SpillBuffer(
+            self.runner.cache / 'spill',
+            self.collectorid,
+            threshold=int(config.SPILL_THRESHOLD),
+            pressure=pressure,
+        )
+
+    def prefetch_batch(self, collectors: list['TheGraphCollector'], block: Block, prev_blocks: dict[str, Block]):
+        """ Requests the data of several collectors with the same batch_key at once
+
+        The pages of each collector are kept in its own SpillBuffer until it
+        is run with the same block and prev_block
+        """
+        self.logger.info(f"Prefetching {[c.collectorid for c in collectors]} with block: {block}")
+        self._check_indexed(block)
+
+        # The collectors are not running yet, so the memory is sampled here
+        monitor = MemoryMonitor(self.memory.budget)
+        queries = {c.collectorid:c.query_cb(prev_blocks[c.collectorid]) for c in collectors}
+        buffers = {c.collectorid:c._spill_buffer(lambda: monitor.over_budget) for c in collectors}
+        before = self._requester.metrics()
+        start = time.perf_counter()
+        try:
+            with monitor:
+                self._requester.n_requests_batched(queries, index=self._index_col, block_hash=block.id, buffers=buffers)
+        except BaseException:
+            for b in buffers.values():
+                b.close()
+            raise
+        finally:
+            for c in collectors:
+                c.memory.peak = max(c.memory.peak, monitor.peak)
+        fetch_time = time.perf_counter() - start
+        after = self._requester.metrics()
+
+        # The requests are shared, so the metrics are split by the number of rows
+        rows = [buffers[c.collectorid].rows for c in collectors]
+        weights = rows if sum(rows) else [1] * len(collectors)
+        shared = {k:_split(after[k] - before[k], weights) for k in ['requests', 'retries', 'bytes']}
+        for i, c in enumerate(collectors):
+            metrics = {k:v[i] for k, v in shared.items()}
+            metrics |= {'rows': rows[i], 'fetch_time': fetch_time * weights[i] / sum(weights)}
+
+            c._prefetched = (self._fetch_key(block, prev_blocks[c.collectorid]), buffers[c.collectorid], metrics)
+
+    def _add_metrics(self, metrics: dict[str, float]):
+        for k, v in metrics.items():
+            setattr(self.stats, k, getattr(self.stats, k) + v)
+
+    def run(self, force=False, block: Optional[Block] = None, prev_block: Optional[Block] = None):
+        self.logger.info(f"Running The Graph collector with block: {block}, prev_block: {prev_block}")
         
         if block is None:
             block = Block()
         if prev_block is None or force:
             prev_block = Block()
 
-        data = self._requester.n_requests(query=self.query_cb(prev_block), block_hash=block.id)
-
-        # transform to df
-        df: pd.DataFrame = self.transform_to_df(data)
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched:
+            key, buffer, metrics = prefetched
+            with buffer:
+                if key == self._fetch_key(block, prev_block):
+                    self._add_metrics(metrics)
+                    self._save(buffer.result(), force)
+                    return
+
+        self._check_indexed(block)
+        before = self._requester.metrics()
+        with self._spill_buffer(lambda: self.memory.over_budget) as buffer:
+            with self.stats.measure('fetch_time'):
+                data = self._requester.n_requests(query=self.query_cb(prev_block), block_hash=block.id, buffer=buffer)
+            self._add_metrics({k:v - before[k] for k,v in self._requester.metrics().items()})
+
+            if buffer.spilled:
+                self.logger.info(f"Spilled {data.num_rows} rows to disk while requesting")
+            self._save(data, force)
+
+    def _save(self, data: Union[list[dict[str, Any]], pa.Table], force: bool):
+        with self.stats.measure('transform_time'):
+            df: pd.DataFrame = self.transform_to_df(data)
         self._update_data(df, force)
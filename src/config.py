@@ -5,8 +5,6 @@ import re
 from pathlib import Path
 from argparse import Namespace
 
-from dynaconf import Dynaconf, Validator
-
 _units = {
     "B": 1, 
     "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12,
@@ -19,38 +17,69 @@ def parse_size(size):
 
     size = size.upper()
     if not re.match(r' ', size):
-        size = re.sub(r'([KMGT]?B)', r' \1', size)
+        size = re.sub(r'([KMGT]?I?B)', r' \1', size)
     number, unit = [string.strip() for string in size.split()]
-    return int(float(number)*_units[unit])
+    return int(float(number)*{k.upper():v for k,v in _units.items()}[unit])
 
 # TODO: Add some way of making very Runner capable of definig its config
 # there somehow
-_RUNNER_VALIDATORS: list[Validator] = [
-    Validator('daohaus.skip_names', cast=bool, default=False),
-    
-    Validator('daostack.registered_only', cast=bool, default=True),
-]
-
-settings = Dynaconf(
-    envvar_prefix="DAOA",
-    validate_on_update=True,
-    validators=[
-        Validator('SKIP_INVALID_BLOCKS', cast=int, default=300),
-        Validator('DEFAULT_DATAWAREHOUSE', cast=Path, default=Path("datawarehouse")),
-        Validator('LOGGING_BACKUP_COUNT', cast=int, default=3),
-        Validator('LOGGING_MAX_SIZE', cast=parse_size, default="100MB"),
-        Validator('CC_API_KEY', default=""),
-        Validator('THE_GRAPH_API_KEY', default=""),
-
-        # Can be overriden by argparser
-        Validator('run_only_updatable', cast=bool, default=False),
-        Validator('DEBUG', cast=bool, default=False),
-        Validator('raise_runner_errors', cast=bool, default=False),
-        Validator('skip_token_balances', cast=bool, default=False),
-
-        *_RUNNER_VALIDATORS,
+def _runner_validators() -> list:
+    from dynaconf import Validator
+
+    return [
+        Validator('daohaus.skip_names', cast=bool, default=False),
+        
+        Validator('daostack.registered_only', cast=bool, default=True),
     ]
-)
+
+_settings = None
+def get_settings():
+    """ Builds the settings the first time they are used """
+    global _settings
+    if _settings is not None:
+        return _settings
+
+    from dynaconf import Dynaconf, Validator
+
+    _settings = Dynaconf(
+        envvar_prefix="DAOA",
+        validate_on_update=True,
+        validators=[
+            Validator('SKIP_INVALID_BLOCKS', cast=int, default=300),
+            Validator('DEFAULT_DATAWAREHOUSE', cast=Path, default=Path("datawarehouse")),
+            Validator('LOGGING_BACKUP_COUNT', cast=int, default=3),
+            Validator('LOGGING_MAX_SIZE', cast=parse_size, default="100MB"),
+            Validator('LOGGING_BODY_MAX_SIZE', cast=parse_size, default="64KB"),
+            Validator('LOGGING_BODY_SAMPLE_RATE', cast=float, default=1.0),
+            Validator('CC_API_KEY', default=""),
+            Validator('THE_GRAPH_API_KEY', default=""),
+            Validator('PAGE_MAX_ATTEMPTS', cast=int, default=5),
+            Validator('PAGE_RETRY_BUDGET', cast=int, default=100),
+            Validator('PAGE_RETRY_MAX_WAIT', cast=int, default=60),
+            Validator('THE_GRAPH_MAX_CONCURRENCY', cast=int, default=8),
+            Validator('THE_GRAPH_ENDPOINT_CONCURRENCY', cast=int, default=4),
+            Validator('THE_GRAPH_TARGET_LATENCY', cast=float, default=15),
+            Validator('THE_GRAPH_COOLDOWN', cast=float, default=5),
+            Validator('BATCH_QUERIES', cast=bool, default=True),
+            Validator('BATCH_MAX_QUERIES', cast=int, default=5),
+            Validator('METRICS_HISTORY', cast=int, default=30),
+            Validator('MEMORY_BUDGET', cast=parse_size, default="0B"),
+            Validator('SPILL_THRESHOLD', cast=parse_size, default="256MB"),
+            Validator('DICTIONARY_THRESHOLD', cast=float, default=0.1),
+            Validator('INDEX_THRESHOLD', cast=float, default=0.5),
+            Validator('BINARY_ADDRESSES', cast=bool, default=False),
+
+            # Can be overriden by argparser
+            Validator('run_only_updatable', cast=bool, default=False),
+            Validator('DEBUG', cast=bool, default=False),
+            Validator('profile', cast=bool, default=False),
+            Validator('raise_runner_errors', cast=bool, default=False),
+            Validator('skip_token_balances', cast=bool, default=False),
+
+            *_runner_validators(),
+        ]
+    )
+    return _settings
 
 def _sanitize_argname(name: str) -> str:
     return name.replace(".", "__")
@@ -58,6 +87,7 @@ def _sanitize_argname(name: str) -> str:
 def args2config(args: Namespace):
     argsdict: dict[str, Any] = vars(args)
 
+    settings = get_settings()
     all_names = [ (vn,_sanitize_argname(vn)) for v in settings.validators for vn in v.names ]
     settings_update = { vn:(argsdict[an] or settings[vn]) for vn, an in all_names if an in argsdict }
 
@@ -67,4 +97,10 @@ def __getattr__(name):
     """
     Called when no function has been defined. Defaults to search argsparser.
     """
-    return settings[name]
+    if name.startswith('__'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    if name == 'settings':
+        return get_settings()
+
+    return get_settings()[name]
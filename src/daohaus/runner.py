@@ -25,6 +25,9 @@ from ..common.thegraph import TheGraphCollector, add_where
 DATA_ENDPOINT: str = "https://data.daohaus.club/dao/{id}"
 
 class MembersCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+    AGGREGATES = {'members': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('members', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -43,6 +46,8 @@ class MembersCollector(TheGraphCollector):
         )
 
 class MolochesCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+
     def __init__(self, runner, network: str):
         super().__init__('moloches', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -93,6 +98,9 @@ class MolochesCollector(TheGraphCollector):
         )
 
 class ProposalsCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+    AGGREGATES = {'proposals': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('proposals', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -124,6 +132,9 @@ class ProposalsCollector(TheGraphCollector):
         )
     
 class RageQuitCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+    AGGREGATES = {'rageQuits': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('rageQuits', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -139,6 +150,10 @@ class RageQuitCollector(TheGraphCollector):
         )
 
 class TokenBalancesCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+    AGGREGATES = {'treasuryUSD': ('usdValue', 'sum')}
+    CATEGORICAL_COLUMNS = ['bank', 'symbol']
+
     def __init__(self, runner, network: str):
         super().__init__('tokenBalances', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -164,7 +179,10 @@ class TokenBalancesCollector(TheGraphCollector):
             return df
         
         self.postprocessor(solve_decimals)
-        self.postprocessor(cc_postprocessor)
+
+        @self.postprocessor
+        def add_prices(df: pd.DataFrame) -> pd.DataFrame:
+            return cc_postprocessor(df, stats=self.stats)
 
     def query(self, **kwargs) -> DSLField:
         ds = self.schema
@@ -185,6 +203,10 @@ class TokenBalancesCollector(TheGraphCollector):
         )
 
 class VoteCollector(TheGraphCollector):
+    DAO_KEY = 'molochAddress'
+    INDEX_COLUMNS = ['molochAddress', 'proposalAddress']
+    AGGREGATES = {'votes': (None, 'count')}
+
     def __init__(self, runner, network: str):
         super().__init__('votes', network, ENDPOINTS[network]['daohaus'], runner)
 
@@ -207,19 +229,12 @@ class VoteCollector(TheGraphCollector):
 class DaohausRunner(NetworkRunner):
     name: str = 'daohaus'
 
-    def __init__(self, dw):
-        super().__init__(dw)
-        self._collectors: List[Collector] = []
-        for n in self.networks:
-            self._collectors.extend([
-                MembersCollector(self, n),
-                MolochesCollector(self, n),
-                ProposalsCollector(self, n),
-                RageQuitCollector(self, n),
-                TokenBalancesCollector(self, n),
-                VoteCollector(self, n)
-            ])
-
-    @property
-    def collectors(self) -> List[Collector]:
-        return self._collectors
\ No newline at end of file
+    def build_collectors(self, n: str) -> List[Collector]:
+        return [
+            MembersCollector(self, n),
+            MolochesCollector(self, n),
+            ProposalsCollector(self, n),
+            RageQuitCollector(self, n),
+            TokenBalancesCollector(self, n),
+            VoteCollector(self, n)
+        ]
\ No newline at end of file
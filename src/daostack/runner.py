@@ -35,10 +35,15 @@ def _remove_phantom_daos_wr(daoc: 'DaosCollector') -> Callable[[pd.DataFrame], p
     return _remove_phantom_daos
 
 class BalancesCollector(BlockscoutBallancesCollector):
+    DAO_KEY = 'dao'
+    AGGREGATES = {'treasuryUSD': ('usdValue', 'sum')}
+
     def __init__(self, runner, base, network: str):
         super().__init__(runner, base=base, network=network, addr_key='dao')
 
 class DaosCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+
     def __init__(self, runner, network: str):
         super().__init__('daos', network, ENDPOINTS[network]['daostack'], runner)
         
@@ -73,6 +78,10 @@ class DaosCollector(TheGraphCollector):
         )
 
 class ProposalsCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+    AGGREGATES = {'proposals': (None, 'count')}
+    CATEGORICAL_COLUMNS = ['stage', 'executionState']
+
     def __init__(self, runner, network: str, daoC: DaosCollector):
         super().__init__('proposals', network, ENDPOINTS[network]['daostack'], runner)
 
@@ -140,6 +149,9 @@ class ProposalsCollector(TheGraphCollector):
         )
 
 class ReputationHoldersCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+    AGGREGATES = {'members': (None, 'count')}
+
     def __init__(self, runner, network: str, daoC: DaosCollector):
         super().__init__('reputationHolders', network, ENDPOINTS[network]['daostack'], runner)
         self.postprocessor(_changeProposalColumnNames)
@@ -157,6 +169,10 @@ class ReputationHoldersCollector(TheGraphCollector):
         )
 
 class StakesCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+    INDEX_COLUMNS = ['dao', 'proposal']
+    AGGREGATES = {'stakes': (None, 'count')}
+
     def __init__(self, runner, network: str, daoC: DaosCollector):
         super().__init__('stakes',network, ENDPOINTS[network]['daostack'], runner)
         self.postprocessor(_changeProposalColumnNames)
@@ -178,6 +194,10 @@ class TokenPricesCollector(CCPricesCollector):
     pass
 
 class VotesCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+    INDEX_COLUMNS = ['dao', 'proposal']
+    AGGREGATES = {'votes': (None, 'count')}
+
     def __init__(self, runner, network: str, daoC: DaosCollector):
         super().__init__('votes', network, ENDPOINTS[network]['daostack'], runner)
         self.postprocessor(_changeProposalColumnNames)
@@ -196,6 +216,8 @@ class VotesCollector(TheGraphCollector):
         )
 
 class CommonRepEventCollector(TheGraphCollector):
+    DAO_KEY = 'dao'
+
     def __init__(self, name, runner, base, network: str): 
         super().__init__(name, network, ENDPOINTS[network]['daostack'], runner)
         self.base = base
@@ -262,23 +284,16 @@ class ReputationBurnsCollector(CommonRepEventCollector):
 class DaostackRunner(NetworkRunner):
     name: str = 'daostack'
 
-    def __init__(self, dw):
-        super().__init__(dw)
-        self._collectors: List[Collector] = []
-        for n in self.networks:
-            dc = DaosCollector(self, n)
-
-            self._collectors.extend([
-                dc,
-                ProposalsCollector(self, n, dc),
-                ReputationHoldersCollector(self, n, dc),
-                StakesCollector(self, n, dc),
-                VotesCollector(self, n, dc),
-                BalancesCollector(self, dc, n),
-                ReputationMintsCollector(self, dc, n),
-                ReputationBurnsCollector(self, dc, n),
-            ])
-
-    @property
-    def collectors(self) -> List[Collector]:
-        return self._collectors
+    def build_collectors(self, n: str) -> List[Collector]:
+        dc = DaosCollector(self, n)
+
+        return [
+            dc,
+            ProposalsCollector(self, n, dc),
+            ReputationHoldersCollector(self, n, dc),
+            StakesCollector(self, n, dc),
+            VotesCollector(self, n, dc),
+            BalancesCollector(self, dc, n),
+            ReputationMintsCollector(self, dc, n),
+            ReputationBurnsCollector(self, dc, n),
+        ]
@@ -0,0 +1,143 @@
+"""
+    Descp: Reader of the datawarehouse, for the dashboard, notebooks, etc.
+
+    Tables are named `runner/collector`, like `daostack/votes`. Reads only
+    decode the columns and rows they need: filters and projections are pushed
+    down to the scan of the file, and the rows of a DAO are found with an
+    index of the column (see common/index.py).
+
+    Usage:
+        dw = DataWarehouse('datawarehouse')
+        dw.read('daostack/proposals', columns=['id', 'dao'], filter={'network': 'xdai'})
+        dw.read_dao('daohaus/votes', '0x...')
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .common.aggregates import AGGREGATES_FILE
+from .common.index import DAO_KEYS, KeyIndex
+from .common.storage import decode_table, hex_key, is_binary_encoded
+
+Filter = Union[pc.Expression, dict[str, Any], None]
+Result = Union[pd.DataFrame, pa.Table]
+
+def _expression(filter: Filter, schema: pa.Schema) -> Optional[pc.Expression]:
+    """ Converts a {column: value or list of values} dict into an expression
+
+    The hex values of binary encoded columns are converted to bytes
+    """
+    if filter is None or isinstance(filter, pc.Expression):
+        return filter
+
+    expr = None
+    for column, value in filter.items():
+        binary = column in schema.names and is_binary_encoded(schema.field(column))
+        if isinstance(value, (list, tuple, set)):
+            e = pc.field(column).isin([hex_key(v) for v in value] if binary else list(value))
+        else:
+            e = pc.field(column) == (hex_key(value) if binary else value)
+        expr = e if expr is None else expr & e
+    return expr
+
+def _result(table: pa.Table, as_pandas: bool) -> Result:
+    return table.to_pandas() if as_pandas else table
+
+class DataWarehouse:
+    def __init__(self, path: Union[str, Path, None] = None):
+        if path is None:
+            from . import config
+            path = config.DEFAULT_DATAWAREHOUSE
+
+        self.path = Path(path)
+        self._indexes: dict[tuple[str, str], KeyIndex] = {}
+
+    def tables(self) -> list[str]:
+        """ The names (runner/collector) of the tables of the datawarehouse """
+        return sorted(
+            f'{p.parent.name}/{p.stem}' for p in self.path.glob('*/*.arr')
+            if not p.parent.name.startswith('.') and p.name != AGGREGATES_FILE
+        )
+
+    def table_path(self, table: str) -> Path:
+        runner, _, collector = table.partition('/')
+        path = self.path / runner / f'{collector}.arr'
+        if not collector or not path.is_file():
+            raise KeyError(f"Table {table} not found in {self.path}")
+        return path
+
+    def dataset(self, table: str) -> ds.Dataset:
+        return ds.dataset(self.table_path(table), format='ipc')
+
+    def schema(self, table: str) -> pa.Schema:
+        return self.dataset(table).schema
+
+    def read(
+        self,
+        table: str,
+        columns: Optional[list[str]] = None,
+        filter: Filter = None,
+        as_pandas: bool = True,
+    ) -> Result:
+        """ Reads the given columns of the rows that match the filter
+
+        The filter can be a pyarrow expression, or a dict of column to value
+        (or list of values), like `{'network': 'mainnet'}`. Expressions on
+        binary encoded columns (see BINARY_ADDRESSES) must use bytes
+        """
+        dataset = self.dataset(table)
+        result = dataset.to_table(columns=columns, filter=_expression(filter, dataset.schema))
+        return _result(decode_table(result), as_pandas)
+
+    def dao_key(self, table: str) -> str:
+        """ The column with the DAO of the rows of the table """
+        names = self.schema(table).names
+        for k in DAO_KEYS:
+            if k in names:
+                return k
+        raise ValueError(f"Table {table} has no DAO column, use the key argument")
+
+    def index(self, table: str, column: str) -> KeyIndex:
+        """ The index of the column. If it doesn't exist or is outdated, the column is scanned """
+        if (table, column) not in self._indexes:
+            self._indexes[(table, column)] = KeyIndex(self.table_path(table), column)
+        return self._indexes[(table, column)]
+
+    def read_dao(
+        self,
+        table: str,
+        dao: Union[str, list[str]],
+        columns: Optional[list[str]] = None,
+        network: Optional[str] = None,
+        key: Optional[str] = None,
+        as_pandas: bool = True,
+    ) -> Result:
+        """ Reads the rows of a DAO (or list of DAOs), using the index of the DAO column
+
+        Every DAO with that address is returned, unless a network is given
+        """
+        key = key or self.dao_key(table)
+        read_columns = columns
+        if columns is not None and network is not None and 'network' not in columns:
+            read_columns = [*columns, 'network']
+
+        result = self.index(table, key).take(dao, read_columns)
+        if network is not None:
+            result = result.filter(pc.equal(result['network'], network))
+        if read_columns is not columns:
+            result = result.select(columns)
+
+        return _result(result, as_pandas)
+
+    def aggregates(self, runner: str, as_pandas: bool = True) -> Result:
+        """ The aggregates by network and DAO of the collectors of a runner """
+        return _result(ds.dataset(self.path / runner / AGGREGATES_FILE, format='ipc').to_table(), as_pandas)
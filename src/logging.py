@@ -1,72 +1,136 @@
+from typing import Iterable
 import sys
 import logging
+import logging.handlers
 from pathlib import Path
 import datetime as dt
+import copy
+import queue
+import random
+import shutil
+import threading
 
 from . import config
 
 LOG_FILE_FORMAT = "[%(levelname)s] - %(asctime)s - %(name)s - : %(message)s in %(pathname)s:%(lineno)d"
 LOG_STREAM_FORMAT = "%(levelname)s: %(message)s"
 
-class AuxDatawarehouseHandler(logging.Handler):
-    # Inspired by MemoryHandler
+class AuxDatawarehouseHandler(logging.FileHandler):
+    """ Writes the logs to the aux datawarehouse, and moves the file to the real one in dump() """
 
     def __init__(self, aux_dw: Path, real_dw: Path, name: str, level=logging.NOTSET):
-        super().__init__(level=level)
-        self._aux_dw = aux_dw
         self._real_dw = real_dw
         self._fname = name
-        
-        self._auxHandler = logging.FileHandler(self._aux_dw / 'logs' / f'{self._fname}.log')
-        self._buffer: list[logging.LogRecord] = []
+        super().__init__(aux_dw / 'logs' / f'{name}.log')
 
+        self.setLevel(level)
         self.set_name(f'aux_dw_{name}')
 
-    def setFormatter(self, fmt):
-        self._auxHandler.setFormatter(fmt)
-        return super().setFormatter(fmt)
+    def _append_rotating(self, src: Path, dst: Path):
+        """ Appends the lines of src to dst, rotating it like a RotatingFileHandler
+
+        The file is rotated before the line that would make it exceed
+        LOGGING_MAX_SIZE, even in the middle of the run.
+        """
+        rotating = logging.handlers.RotatingFileHandler(
+            dst,
+            maxBytes=int(config.LOGGING_MAX_SIZE),
+            backupCount=int(config.LOGGING_BACKUP_COUNT),
+            delay=True,
+        )
+        # Like RotatingFileHandler, it is never rotated if any of them is 0
+        max_size = rotating.maxBytes if rotating.backupCount > 0 else 0
+        size = dst.stat().st_size if dst.is_file() else 0
 
-    def setLevel(self, level):
-        super().setLevel(level)
-        self._auxHandler.setLevel(level)
-
-    def emit(self, record):
-        self._auxHandler.emit(record)
-        self._buffer.append(record)
+        try:
+            if size == 0 and (not max_size or src.stat().st_size <= max_size):
+                shutil.move(src, dst)
+                return
+
+            fdst = open(dst, 'ab')
+            try:
+                with open(src, 'rb') as fsrc:
+                    for line in fsrc:
+                        if max_size and size and size + len(line) > max_size:
+                            fdst.close()
+                            rotating.doRollover()
+                            fdst = open(dst, 'ab')
+                            size = 0
+
+                        fdst.write(line)
+                        size += len(line)
+            finally:
+                fdst.close()
+            src.unlink()
+        finally:
+            rotating.close()
 
     def dump(self, errors: bool):
-        if errors:
-            target: logging.Handler = logging.handlers.RotatingFileHandler(
-                self._real_dw / 'logs' / f'{self._fname}_error_{dt.datetime.now().isoformat()}.log',
-            )
-        else:
-            target: logging.Handler = logging.handlers.RotatingFileHandler(
-                self._real_dw / 'logs' / f'{self._fname}.log',
-                maxBytes=int(config.LOGGING_MAX_SIZE),
-                backupCount=int(config.LOGGING_BACKUP_COUNT),
-            )
+        self.close()
 
-        target.setLevel(self.level)
-        target.setFormatter(self.formatter)
+        src = Path(self.baseFilename)
+        if not src.is_file():
+            return
 
-        self.acquire()
-        try:
-            for record in self._buffer:
-                target.handle(record)
-            self._buffer.clear()
-        finally:
-            self.release()
+        if errors:
+            shutil.move(src, self._real_dw / 'logs' / f'{self._fname}_error_{dt.datetime.now().isoformat()}.log')
+        else:
+            self._append_rotating(src, self._real_dw / 'logs' / f'{self._fname}.log')
+
+class BodyLogFilter(logging.Filter):
+    """ Truncates the request and response bodies logged by gql, and keeps only a sample of them
+
+    The response of a sampled out request is also dropped.
+    """
+    def __init__(self, max_size: int, sample_rate: float = 1.0):
+        super().__init__()
+        self.max_size = max_size
+        self.sample_rate = sample_rate
+        self._rng = random.Random()
+        self._local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        msg = record.getMessage()
+        if msg.startswith('>>>'):
+            self._local.sampled = self.sample_rate >= 1 or self._rng.random() < self.sample_rate
+
+        if not getattr(self._local, 'sampled', True):
+            return False
+
+        if self.max_size and len(msg) > self.max_size:
+            record.msg = f'{msg[:self.max_size]}... ({len(msg) - self.max_size} more characters)'
+            record.args = None
+
+        return True
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler, the exception is kept to be formatted like the other handlers do
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 _all_dw_handlers: list[AuxDatawarehouseHandler] = []
-def _setup_handler_in_logger(logger: str | logging.Logger, aux_dw, real_dw, name):
+_all_listeners: list[tuple[logging.Logger, logging.Handler, logging.handlers.QueueListener]] = []
+def _setup_handler_in_logger(logger: str | logging.Logger, aux_dw, real_dw, name, filters: Iterable[logging.Filter] = ()):
     _all_dw_handlers.append(h := AuxDatawarehouseHandler(aux_dw, real_dw, name))
     h.setFormatter(logging.Formatter(LOG_FILE_FORMAT))
 
-    if isinstance(logger, logging.Logger):
-        logger.addHandler(h)
-    else:
-        logging.getLogger(logger).addHandler(h)
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
 
+    # The records are written to the file in a background thread
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    qh = _QueueHandler(q)
+    for f in filters:
+        qh.addFilter(f)
+
+    listener = logging.handlers.QueueListener(q, h, respect_handler_level=True)
+    listener.start()
+    _all_listeners.append((logger, qh, listener))
+
+    logger.addHandler(qh)
     return h
 
 def setup_logging(aux_dw: Path, real_dw: Path, debug: bool):
@@ -79,7 +143,9 @@ def setup_logging(aux_dw: Path, real_dw: Path, debug: bool):
     gqlLogger = logging.getLogger('gql.transport.requests')
 
     _setup_handler_in_logger(logger, aux_dw, real_dw, 'cache_scripts')
-    _setup_handler_in_logger(gqlLogger, aux_dw, real_dw, 'gql_requests')
+    _setup_handler_in_logger(gqlLogger, aux_dw, real_dw, 'gql_requests', filters=[
+        BodyLogFilter(int(config.LOGGING_BODY_MAX_SIZE), float(config.LOGGING_BODY_SAMPLE_RATE)),
+    ])
 
     streamhandler = logging.StreamHandler(sys.stderr)
     streamhandler.setLevel(logging.WARNING if debug else logging.ERROR)
@@ -93,6 +159,13 @@ def setup_logging(aux_dw: Path, real_dw: Path, debug: bool):
         gqlLogger.setLevel(logging.DEBUG)
 
 def finish_logging(errors: bool):
+    for logger, qh, listener in _all_listeners:
+        # Writes the records left in the queue
+        logger.removeHandler(qh)
+        listener.stop()
+    _all_listeners.clear()
+
     for h in _all_dw_handlers:
         h.dump(errors)
         h.close()
+    _all_dw_handlers.clear()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
+from contextlib import contextmanager
 from datetime import datetime
+import importlib
 import logging.handlers
 from pathlib import Path
-import portalocker as pl
 import os
 import tempfile
 import shutil
@@ -12,28 +13,36 @@ from sys import stderr
 import logging
 
 from argparse import Namespace
+from typing import TYPE_CHECKING, Optional
 
-from .aragon.runner import AragonRunner
-from .daohaus.runner import DaohausRunner
-from .daostack.runner import DaostackRunner
-from .common import ENDPOINTS, NetworkRunner
+from .common.endpoints import ENDPOINTS
 from .argparser import CacheScriptsArgParser
 from ._version import __version__
 from .logging import setup_logging, finish_logging
+from .profiling import disable_profiling, enable_profiling, write_summary
 from . import config
 
-AVAILABLE_PLATFORMS: dict[str, type[NetworkRunner]] = {
-    AragonRunner.name: AragonRunner,
-    DaohausRunner.name: DaohausRunner,
-    DaostackRunner.name: DaostackRunner
+if TYPE_CHECKING:
+    from .common import NetworkRunner
+    from .common.blocks import BlockResolver
+
+# The runners are imported only when used
+AVAILABLE_PLATFORMS: dict[str, str] = {
+    'aragon': '.aragon.runner:AragonRunner',
+    'daohaus': '.daohaus.runner:DaohausRunner',
+    'daostack': '.daostack.runner:DaostackRunner',
 }
 
 # Get available networks from Runners
 AVAILABLE_NETWORKS = {n for n in ENDPOINTS.keys() if not n.startswith('_')}
 
-def _call_platform(platform: str, datawarehouse: Path, force: bool=False, networks=None, collectors=None, block_datetime=None):
-    p = AVAILABLE_PLATFORMS[platform](datawarehouse)
-    p.run(networks=networks, force=force, collectors=collectors, until_date=block_datetime)
+def get_platform(platform: str) -> type['NetworkRunner']:
+    module, cls = AVAILABLE_PLATFORMS[platform].split(':')
+    return getattr(importlib.import_module(module, __package__), cls)
+
+def _call_platform(platform: str, datawarehouse: Path, force: bool=False, networks=None, collectors=None, block_datetime=None, blocks: Optional['BlockResolver']=None):
+    p = get_platform(platform)(datawarehouse)
+    p.run(networks=networks, force=force, collectors=collectors, until_date=block_datetime, blocks=blocks)
 
 def _is_good_version(datawarehouse: Path) -> bool:
     versionfile = datawarehouse / 'version.txt'
@@ -53,9 +62,18 @@ def run_all(
     if not platforms:
         platforms = list(AVAILABLE_PLATFORMS.keys())
 
+    from .common.api_requester import close_clients
+    from .common.blocks import BlockResolver
+
+    # Every runner uses the same block of each network
+    blocks = BlockResolver(until_date=block_datetime, cache=datawarehouse / '.cache')
+
     # Now calling the platform and deleting if needed
-    for platform in platforms:
-        _call_platform(platform, datawarehouse, force, networks, collectors, block_datetime)
+    try:
+        for platform in platforms:
+            _call_platform(platform, datawarehouse, force, networks, collectors, block_datetime, blocks)
+    finally:
+        close_clients()
 
     # write date
     data_date: str = str(datetime.now().isoformat())
@@ -69,8 +87,24 @@ def run_all(
     with open(datawarehouse / 'version.txt', 'w') as f:
         print(__version__, file=f)
 
+@contextmanager
+def _profiling(datawarehouse: Path):
+    """ Profiles the collectors run inside the context if --profile was given, and writes the summary """
+    if not config.profile:
+        yield
+        return
+
+    enable_profiling(datawarehouse / 'logs' / f'profile_{datetime.now():%Y%m%dT%H%M%S}')
+    try:
+        yield
+    finally:
+        write_summary()
+        disable_profiling()
+
 def lock_and_run(args: Namespace):
-    datawarehouse: Path = args.datawarehouse
+    import portalocker as pl
+
+    datawarehouse: Path = args.datawarehouse or config.DEFAULT_DATAWAREHOUSE
     datawarehouse.mkdir(exist_ok=True)
     
     # Lock for the datawarehouse (also used by the dash)
@@ -122,14 +156,15 @@ def lock_and_run(args: Namespace):
                 logger.info(">>> Running dao-scripts with arguments: %s", sys.orig_argv)
 
                 # Execute the scripts in the aux datawarehouse
-                run_all(
-                    datawarehouse=tmp_dw,
-                    platforms=args.platforms,
-                    networks=args.networks,
-                    collectors=args.collectors,
-                    block_datetime=args.block_datetime,
-                    force=args.force,
-                )
+                with _profiling(datawarehouse):
+                    run_all(
+                        datawarehouse=tmp_dw,
+                        platforms=args.platforms,
+                        networks=args.networks,
+                        collectors=args.collectors,
+                        block_datetime=args.block_datetime,
+                        force=args.force,
+                    )
 
                 # Copying back the dw
                 logger.info(f"<<< Copying back the datawarehouse from {tmp_dw} to {datawarehouse}")
@@ -159,12 +194,18 @@ def main():
         available_networks=AVAILABLE_NETWORKS)
 
     args = parser.parse_args()
-    config.args2config(args)
 
     if args.display_version:
         print(__version__)
         exit(0)
 
+    config.args2config(args)
+
+    if args.report:
+        from .report import print_report
+        print_report(args.datawarehouse or config.DEFAULT_DATAWAREHOUSE)
+        exit(0)
+
     lock_and_run(args)
 
 if __name__ == '__main__':
@@ -8,7 +8,9 @@
 """
 from json.encoder import JSONEncoder
 from typing import Optional
+from contextlib import contextmanager
 import json
+import time
 from functools import total_ordering
 from datetime import datetime, timezone
 
@@ -54,23 +56,68 @@ class Block:
     def __str__(self):
         return self.toDict().__str__()
 
+class CollectorRunStats:
+    """ Timing (in seconds) and volume metrics of a single run of a collector """
+    def __init__(self, d = None):
+        self.start: datetime = datetime.now(timezone.utc)
+        self.ok: bool = True
+        self.duration: float = 0
+        # Requests to the API and data received
+        self.requests: int = 0
+        self.retries: int = 0
+        self.rows: int = 0
+        self.bytes: int = 0
+        self.fetch_time: float = 0
+        # json_normalize and postprocessors
+        self.transform_time: float = 0
+        # Writing the data file
+        self.update_time: float = 0
+        self.update_rows: int = 0
+        self.file_size: int = 0
+        # Peak RSS of the process (in bytes)
+        self.peak_memory: int = 0
+
+        if d:
+            self.__dict__.update(d)
+            self.start = datetime.fromisoformat(d["start"])
+
+    @contextmanager
+    def measure(self, field: str):
+        """ Adds the time spent inside the context to `field` """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, field, getattr(self, field) + time.perf_counter() - start)
+
+    def toDict(self):
+        return self.__dict__ | {"start": self.start.isoformat()}
+
 class CollectorMetaData:
     def __init__(self, c: str, d = None):
         self.block: Optional[Block] = Block()
         self._collector: str = c
         self.last_update: datetime = datetime.now(timezone.utc)
+        self.runs: list[CollectorRunStats] = []
 
         if d:
             self.block = Block(d["block"]) if "block" in d else None
             self.last_update = datetime.fromisoformat(d["last_update"])
+            self.runs = [CollectorRunStats(r) for r in d.get("runs", [])]
 
         if self.last_update.tzinfo is None:
             self.last_update = self.last_update.replace(tzinfo=timezone.utc)
 
+    def add_run(self, stats: CollectorRunStats):
+        """ Keeps the stats of the last METRICS_HISTORY runs """
+        self.runs.append(stats)
+        self.runs = self.runs[-int(config.METRICS_HISTORY):]
+
     def toDict(self):
         return {
             "block": self.block,
-            "last_update": self.last_update.isoformat()
+            "last_update": self.last_update.isoformat(),
+            "runs": self.runs,
         }
 
     def __eq__(self, other):
@@ -0,0 +1,102 @@
+"""
+    Descp: Optional profiling of every collector run
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional
+import cProfile
+import logging
+import pstats
+
+SUMMARY_FILE = 'summary.txt'
+SUMMARY_LINES = 50
+
+logger = logging.getLogger('dao_analyzer.profiling')
+
+# Directory where the profiles are written, None if profiling is disabled
+_profile_dir: Optional[Path] = None
+
+def _sampling_profiler_available() -> bool:
+    try:
+        import pyinstrument # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def enable_profiling(directory: Path):
+    global _profile_dir
+
+    directory.mkdir(parents=True, exist_ok=True)
+    _profile_dir = directory
+    logger.info(f"Writing profiles to {directory}")
+
+def disable_profiling():
+    global _profile_dir
+    _profile_dir = None
+
+def _profile_path(collectorid: str, suffix: str) -> Path:
+    return _profile_dir / (collectorid.replace('/', '_') + suffix)
+
+@contextmanager
+def _cprofile(collectorid: str):
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(_profile_path(collectorid, '.prof'))
+
+@contextmanager
+def _pyinstrument(collectorid: str):
+    from pyinstrument import Profiler
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        session = profiler.stop()
+        session.save(_profile_path(collectorid, '.pyisession'))
+
+def profile(collectorid: str):
+    """ Profiles the code inside the context if profiling is enabled
+
+    Uses pyinstrument (a sampling profiler) if it's installed, or cProfile otherwise.
+    """
+    if _profile_dir is None:
+        return nullcontext()
+
+    if _sampling_profiler_available():
+        return _pyinstrument(collectorid)
+
+    return _cprofile(collectorid)
+
+def write_summary():
+    """ Merges the profiles of every collector into a hot-spot summary """
+    if _profile_dir is None:
+        return
+
+    summary = _profile_dir / SUMMARY_FILE
+    with open(summary, 'w') as f:
+        if profs := sorted(_profile_dir.glob('*.prof')):
+            stats = pstats.Stats(*map(str, profs), stream=f)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LINES)
+
+        if sessions := sorted(_profile_dir.glob('*.pyisession')):
+            from pyinstrument.session import Session
+            from pyinstrument.renderers import ConsoleRenderer
+
+            merged = Session.load(sessions[0])
+            for s in sessions[1:]:
+                merged = Session.combine(merged, Session.load(s))
+
+            f.write(ConsoleRenderer(unicode=False, color=False, show_all=False).render(merged))
+
+    logger.info(f"Profiling summary written to {summary}")
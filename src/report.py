@@ -0,0 +1,62 @@
+"""
+    Descp: Summary of the collectors' performance metrics stored in the metadata
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from pathlib import Path
+import json
+
+import pandas as pd
+
+def load_runs(datawarehouse: Path) -> pd.DataFrame:
+    """ Returns the stats of every run recorded in the datawarehouse, one per row """
+    runs = []
+    for f in sorted(datawarehouse.glob('*/metadata.json')):
+        with open(f, 'r') as fd:
+            j = json.load(fd)
+
+        for collectorid, m in j['metadata'].items():
+            runs.extend({'collector': collectorid, **r} for r in m.get('runs', []))
+
+    return pd.DataFrame(runs)
+
+def summarize_runs(runs: pd.DataFrame) -> pd.DataFrame:
+    """ Aggregates the runs by collector, sorted by mean duration """
+    runs = runs.assign(
+        MB=runs['bytes'] / 1e6,
+        file_MB=runs['file_size'] / 1e6,
+        # Runs recorded before the memory was accounted don't have it
+        peak_MB=runs.get('peak_memory', 0) / 1e6,
+    )
+
+    summary = runs.groupby('collector').agg(
+        runs=('start', 'count'),
+        failed=('ok', lambda x: (~x).sum()),
+        last_run=('start', 'max'),
+        duration=('duration', 'mean'),
+        max_duration=('duration', 'max'),
+        fetch_time=('fetch_time', 'mean'),
+        transform_time=('transform_time', 'mean'),
+        update_time=('update_time', 'mean'),
+        requests=('requests', 'mean'),
+        retries=('retries', 'sum'),
+        rows=('rows', 'mean'),
+        MB=('MB', 'mean'),
+        file_MB=('file_MB', 'last'),
+        peak_MB=('peak_MB', 'max'),
+    )
+
+    return summary.sort_values('duration', ascending=False)
+
+def print_report(datawarehouse: Path):
+    runs = load_runs(datawarehouse)
+    if runs.empty:
+        print(f"No runs recorded in {datawarehouse}")
+        return
+
+    print(f"Mean metrics of the last runs of every collector in {datawarehouse} (times in seconds)")
+    with pd.option_context('display.width', None, 'display.max_rows', None, 'display.float_format', '{:.2f}'.format):
+        print(summarize_runs(runs))
@@ -0,0 +1,202 @@
+"""
+    Descp: Exports the datawarehouse to the formats we publish, used by dao-utils-upload-dw
+
+    Every .arr file is converted in a pool of processes. CSVs are written
+    with pandas one record batch at a time, so only one of them is in memory,
+    while Parquet files are sorted by network and DAO before being written.
+    The export directory keeps a manifest with the hash of every source, and
+    the files whose source hasn't changed since the last export are not
+    converted again.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+import hashlib
+import json
+import multiprocessing
+import shutil
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from ..common.index import DAO_KEYS
+from ..common.storage import decode_column, decode_table
+
+MANIFEST = 'manifest.json'
+
+PARQUET_ROW_GROUP_SIZE = 128 * 1024
+
+# Already compressed formats are stored in the zip as they are
+STORED_SUFFIXES = {'.parquet'}
+
+# The entries of the zip don't keep the modification time of the files, so
+# exporting the same datawarehouse again gives the same zip (and checksums)
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+def sha256sum(path: Path, chunk_size: int = 2**20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+def write_csv(src: Path, dst: Path) -> int:
+    """ Converts an .arr file to CSV batch by batch, returning the number of rows
+
+    Every batch is written with pandas' to_csv, so the file is the same one
+    that `pd.read_feather(src).to_csv(dst)` writes (floats, dates, quoting...)
+    """
+    rows = 0
+    with pa.memory_map(str(src)) as source, open(dst, 'w', newline='') as f:
+        reader = pa.ipc.open_file(source)
+        for i in range(max(reader.num_record_batches, 1)):
+            if reader.num_record_batches:
+                batch = pa.Table.from_batches([reader.get_batch(i)])
+            else:
+                batch = reader.schema.empty_table()
+
+            # Binary encoded addresses are written as hex
+            df = decode_table(batch).to_pandas()
+            df.index = pd.RangeIndex(rows, rows + len(df))
+            df.to_csv(f, header=(i == 0))
+            rows += len(df)
+
+    return rows
+
+def sort_keys(schema: pa.Schema) -> list[str]:
+    """ The network and DAO columns of the schema, if it has them """
+    keys = ['network'] if 'network' in schema.names else []
+    return keys + [k for k in DAO_KEYS if k in schema.names][:1]
+
+def write_parquet(src: Path, dst: Path) -> int:
+    """ Converts an .arr file to a zstd Parquet file sorted by network and DAO, returning the number of rows """
+    with pa.memory_map(str(src)) as source:
+        table = decode_table(pa.ipc.open_file(source).read_all())
+
+    # The statistics of the sorted row groups let readers skip the other networks and DAOs
+    keys = sort_keys(table.schema)
+    if keys:
+        # Dictionary columns can't be sorted, so the keys are decoded to compute the order
+        key_table = pa.table([decode_column(table[k]) for k in keys], names=keys)
+        table = table.take(pc.sort_indices(key_table, [(k, 'ascending') for k in keys]))
+
+    pq.write_table(
+        table, dst,
+        compression='zstd',
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+        sorting_columns=[pq.SortingColumn(table.schema.get_field_index(k)) for k in keys],
+    )
+    return table.num_rows
+
+FORMATS: dict[str, tuple[str, Callable[[Path, Path], int]]] = {
+    'csv': ('.csv', write_csv),
+    'parquet': ('.parquet', write_parquet),
+}
+
+def export_file(src: Path, dst: Path, fmt: str, prev: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """ Converts src into dst, unless src has the same hash as in the previous export
+
+    Returns the entry of the manifest for dst
+    """
+    digest = sha256sum(src)
+    if prev and prev.get('source_sha256') == digest and dst.is_file():
+        return prev | {'skipped': True}
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    rows = FORMATS[fmt][1](src, dst)
+    return {
+        'format': fmt,
+        'rows': rows,
+        'size': dst.stat().st_size,
+        'sha256': sha256sum(dst),
+        'source_sha256': digest,
+        'skipped': False,
+    }
+
+def _sources(dw: Path) -> Iterable[Path]:
+    for f in sorted(dw.glob('**/*.arr')):
+        # Skipping .cache and other internal folders
+        if not any(p.startswith('.') for p in f.relative_to(dw).parts):
+            yield f
+
+def load_manifest(outdir: Path) -> dict[str, dict[str, Any]]:
+    if not (outdir / MANIFEST).is_file():
+        return {}
+
+    with open(outdir / MANIFEST, 'r') as f:
+        return json.load(f)
+
+def export_dw(dw: Path, outdir: Path, formats: Iterable[str] = ('csv',), jobs: Optional[int] = None) -> list[Path]:
+    """ Exports the datawarehouse dw into outdir, returning the exported paths """
+    outdir.mkdir(parents=True, exist_ok=True)
+    paths = []
+
+    for f in dw.glob('*.txt'):
+        shutil.copy(f, outdir)
+        paths.append(outdir / f.name)
+
+    for f in dw.glob('*/metadata.json'):
+        newf = outdir / f.relative_to(dw)
+        newf.parent.mkdir(exist_ok=True)
+        shutil.copy(f, newf)
+        paths.append(newf)
+
+    prev_manifest = load_manifest(outdir)
+    manifest: dict[str, dict[str, Any]] = {}
+    # Forking after pyarrow started its threads can deadlock
+    with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {}
+        for f in _sources(dw):
+            for fmt in formats:
+                key = f.relative_to(dw).with_suffix(FORMATS[fmt][0]).as_posix()
+                futures[executor.submit(export_file, f, outdir / key, fmt, prev_manifest.get(key))] = key
+
+        skipped = 0
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Exporting"):
+            key = futures[future]
+            manifest[key] = future.result()
+            skipped += manifest[key].pop('skipped')
+            paths.append(outdir / key)
+
+    if skipped:
+        print(f"Skipped {skipped} files that didn't change since the last export")
+
+    # Files of a previous export whose source no longer exists
+    for key in prev_manifest.keys() - manifest.keys():
+        (outdir / key).unlink(missing_ok=True)
+
+    with open(outdir / MANIFEST, 'w') as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+    paths.append(outdir / MANIFEST)
+
+    return paths
+
+def package_zip(outdir: Path, dst: Path, exclude: Iterable[str] = ()) -> Path:
+    """ Writes the files of an export into a zip, reading each of them once
+
+    The zip only depends on the contents of the files, see ZIP_DATE_TIME
+    """
+    exclude = set(exclude)
+    with zipfile.ZipFile(dst, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for f in tqdm(sorted(outdir.rglob('*')), desc="Packaging"):
+            arcname = f.relative_to(outdir).as_posix()
+            if not f.is_file() or arcname in exclude:
+                continue
+
+            info = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_STORED if f.suffix in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            info.file_size = f.stat().st_size
+            with open(f, 'rb') as src, zf.open(info, 'w') as dst_file:
+                shutil.copyfileobj(src, dst_file, 2**20)
+
+    return dst
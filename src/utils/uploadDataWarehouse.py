@@ -3,15 +3,16 @@ import os
 import sys
 import tempfile
 from pathlib import Path
-import shutil
 import json
 import requests
 from time import sleep
 import logging
+from contextlib import nullcontext
 
-from tqdm import tqdm
+from ..config import parse_size
 
 DEFAULT_DATAWAREHOUSE = Path(os.getenv('DAOA_DW_PATH', 'datawarehouse'))
+KAGGLE_METADATA = 'dataset-metadata.json'
 
 def getDwPaths():
     """ Returns dw paths """
@@ -19,43 +20,33 @@ def getDwPaths():
         './datawarehouse/'
     ]
 
-def archivedw(dw, tmpdir):
-    import pandas as pd
+def archivedw(dw, tmpdir, formats=('csv',), jobs=None):
+    from .export import export_dw
 
-    paths = []
-    
-    for f in dw.glob('*.txt'):
-        shutil.copy(f, tmpdir)
-        paths.append(f)
-
-    for f in dw.glob('*/metadata.json'):
-        newp = tmpdir / Path(f).relative_to(dw).parent
-        newf = newp / Path(f).name
-
-        newp.mkdir(exist_ok=True)
-        shutil.copy(f, newf)
-        paths.append(newf)
-    
-    for f in tqdm(list(dw.glob('**/*.arr'))):
-        newp = tmpdir / Path(f).relative_to(dw).parent
-        newf = newp / Path(f).with_suffix('.csv').name
-
-        pd.read_feather(f).to_csv(newf)
-        paths.append(newf)
+    return export_dw(dw, tmpdir, formats=formats, jobs=jobs)
 
-    return paths
+def getZenodoUploader(chunk_size: int = 0, state_path=None):
+    from .zenodo import ResumableUploader, ZENODO_SANDBOX_URL, ZENODO_URL
 
-def uploadToZenodo(paths):
     ZENODO_DEPOSITION_ID = os.environ['ZENODO_DEPOSITION_ID']
     ZENODO_SANDBOX = bool(os.environ.get('ZENODO_SANDBOX', False))
 
-    from zenodo_client import Zenodo
+    return ResumableUploader(
+        ZENODO_DEPOSITION_ID,
+        os.environ['ZENODO_SANDBOX_API_TOKEN' if ZENODO_SANDBOX else 'ZENODO_API_TOKEN'],
+        base_url=ZENODO_SANDBOX_URL if ZENODO_SANDBOX else ZENODO_URL,
+        state_path=state_path,
+        chunk_size=chunk_size,
+    )
 
-    z = Zenodo(None, sandbox=ZENODO_SANDBOX)
+def uploadToZenodo(uploader, paths):
     try:
-        z.update(ZENODO_DEPOSITION_ID, paths)
+        uploader.upload(paths)
     except requests.exceptions.HTTPError as e:
-        r = e.response.json()
+        try:
+            r = e.response.json()
+        except ValueError:
+            r = {}
 
         if 'errors' in r:
             for error in r['errors']:
@@ -64,23 +55,33 @@ def uploadToZenodo(paths):
                     print('  ', msg, file=sys.stderr)
         raise e
 
-def archiveToZenodo(tmpdir, max_retries: int, sleep_seconds: int = 60):
+def _is_transient(e: requests.exceptions.RequestException) -> bool:
+    if isinstance(e, requests.exceptions.HTTPError):
+        return e.response is not None and (e.response.status_code >= 500 or e.response.status_code == 429)
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def archiveToZenodo(tmpdir, max_retries: int, sleep_seconds: int = 60, uploader=None):
+    """ Uploads the export as a zip. Each retry continues the upload where the previous one failed """
+    from .export import package_zip
+
+    uploader = uploader or getZenodoUploader()
     with tempfile.TemporaryDirectory() as zpath:
         zpath = Path(zpath)
-        shutil.make_archive(zpath / 'archive', 'zip', tmpdir)
+        package_zip(tmpdir, zpath / 'archive.zip', exclude=[KAGGLE_METADATA])
 
         i: int = 0
         success: bool = False
         while i < max_retries and not success:
             try:
-                uploadToZenodo([zpath / 'archive.zip'])
+                uploadToZenodo(uploader, [zpath / 'archive.zip'])
                 success = True
-            except requests.exceptions.HTTPError as e:
-                if e.errno == 504:
-                    print(f"Retrying upload to Zenodo {i}/{max_retries}")
+            except requests.exceptions.RequestException as e:
+                if _is_transient(e) and i + 1 < max_retries:
+                    print(f"Retrying upload to Zenodo {i+1}/{max_retries}: {e}")
                     sleep(sleep_seconds)
                 else:
-                    print("Errored response:", e.response.content, file=sys.stderr)
+                    if e.response is not None:
+                        print("Errored response:", e.response.content, file=sys.stderr)
                     raise e
             i += 1
 
@@ -90,19 +91,20 @@ def uploadToKaggle(path, version_notes):
     k.dataset_create_version(path, version_notes, dir_mode='zip')
 
 def archiveToKaggle(tmpdir):
-    with tempfile.TemporaryDirectory() as kpath:
-        kpath = Path(kpath)
-        shutil.copytree(tmpdir, kpath, dirs_exist_ok=True)
+    # The export already has the layout of the dataset, so it is uploaded in place
+    kpath = Path(tmpdir)
+    with open(kpath / KAGGLE_METADATA, 'w') as md:
+        json.dump({
+            "id": "daviddavo/dao-analyzer",
+        }, md)
 
-        with open(kpath / 'dataset-metadata.json', 'w') as md:
-            json.dump({
-                "id": "daviddavo/dao-analyzer",
-            }, md)
+    with open(kpath / 'update_date.txt', 'r') as ud:
+        update_date = ud.readline()
 
-        with open(kpath / 'update_date.txt', 'r') as ud:
-            update_date = ud.readline()
-        
+    try:
         uploadToKaggle(kpath, update_date)
+    finally:
+        (kpath / KAGGLE_METADATA).unlink()
 
 def main():
     import argparse
@@ -122,7 +124,7 @@ def main():
         '--zenodo-max-retries',
         type=int,
         default=5,
-        help="Zenodo is known to return 504 error, this program will try and upload it again",
+        help="Zenodo is known to return 504 error, this program will try and continue the upload",
     )
     parser.add_argument(
         '-D', '--debug',
@@ -131,6 +133,36 @@ def main():
         default=os.environ.get('DAOA_DEBUG', False),
     )
 
+    parser.add_argument(
+        '--export-dir',
+        type=Path,
+        help="Directory to export the datawarehouse to. It can be reused between runs to only convert the changed files",
+    )
+    parser.add_argument(
+        '--zenodo-chunk-size',
+        type=parse_size,
+        default=0,
+        help="Uploads the archive to Zenodo in parts of this size (like 2GB), to be joined with `cat`. Disabled by default",
+    )
+    parser.add_argument(
+        '--zenodo-state',
+        type=Path,
+        default=DEFAULT_DATAWAREHOUSE / '.cache' / 'zenodo_upload.json',
+        help="File with the progress of the upload to Zenodo, to continue it if it fails. The zip of an unchanged export is the same, so the upload continues even with a new export",
+    )
+    parser.add_argument(
+        '--formats',
+        nargs='+',
+        choices=['csv', 'parquet'],
+        default=['csv'],
+        help="Formats of the exported files. Parquet files are compressed with zstd, and sorted by network and DAO",
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help="Number of processes used to export the datawarehouse (default: number of CPUs)",
+    )
+
     args = parser.parse_args() 
     if args.repos == 'all':
         args.repos = available_repos
@@ -146,14 +178,17 @@ def main():
         requests_log.setLevel(logging.DEBUG)
         requests_log.propagate = True
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with nullcontext(args.export_dir) if args.export_dir else tempfile.TemporaryDirectory() as tmpdir:
         tmpdir = Path(tmpdir)
 
         print("Archiving datawarehouse")
-        archivedw(DEFAULT_DATAWAREHOUSE, tmpdir)
+        archivedw(DEFAULT_DATAWAREHOUSE, tmpdir, args.formats, args.jobs)
         if 'zenodo' in args.repos:
             print("Uploading to zenodo")
-            archiveToZenodo(tmpdir, args.zenodo_max_retries)
+            archiveToZenodo(tmpdir, args.zenodo_max_retries, uploader=getZenodoUploader(
+                chunk_size=args.zenodo_chunk_size,
+                state_path=args.zenodo_state,
+            ))
         if 'kaggle' in args.repos:
             print("Uploading to kaggle")
             archiveToKaggle(tmpdir)
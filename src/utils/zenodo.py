@@ -0,0 +1,197 @@
+"""
+    Descp: Resumable uploads of new versions of a Zenodo deposition
+
+    Zenodo doesn't have multipart uploads, so big files can be uploaded as
+    several parts (`<name>.partNNN`, to be joined with `cat`). The parts are
+    uploaded in parallel, and the state of the upload is saved to a JSON file,
+    so a retry reuses the same draft and skips the files Zenodo already has.
+
+    Created on: 19-oct-2026
+
+    Copyright 2026 David Davó
+        <david@ddavo.me>
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import hashlib
+import json
+import logging
+import threading
+
+import requests
+
+ZENODO_URL = 'https://zenodo.org/api/'
+ZENODO_SANDBOX_URL = 'https://sandbox.zenodo.org/api/'
+
+logger = logging.getLogger('dao_analyzer.zenodo')
+
+class FilePart:
+    """ A range of bytes of a file, that can be sent as the body of a request """
+    def __init__(self, name: str, path: Path, offset: int = 0, length: Optional[int] = None):
+        self.name = name
+        self.path = path
+        self.offset = offset
+        self.length = path.stat().st_size - offset if length is None else length
+        self._remaining = 0
+        self._f = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __enter__(self):
+        self._f = open(self.path, 'rb')
+        self._f.seek(self.offset)
+        self._remaining = self.length
+        return self
+
+    def __exit__(self, *args):
+        self._f.close()
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def md5(self, chunk_size: int = 2**20) -> str:
+        h = hashlib.md5()
+        with self:
+            while chunk := self.read(chunk_size):
+                h.update(chunk)
+        return h.hexdigest()
+
+def split_parts(paths: Iterable[Path], chunk_size: int = 0) -> list[FilePart]:
+    """ Splits the files into parts of chunk_size bytes (0 to upload the whole files) """
+    parts = []
+    for p in paths:
+        size = p.stat().st_size
+        if not chunk_size or size <= chunk_size:
+            parts.append(FilePart(p.name, p))
+            continue
+
+        for i, offset in enumerate(range(0, size, chunk_size)):
+            parts.append(FilePart(f'{p.name}.part{i:03d}', p, offset, min(chunk_size, size - offset)))
+    return parts
+
+def next_version(version: str) -> str:
+    if version.isnumeric():
+        return str(int(version) + 1)
+    return date.today().isoformat()
+
+class ResumableUploader:
+    """ Uploads files to a new version of a deposition, and publishes it
+
+    If an upload fails, calling upload() again (even from another process,
+    with the same state_path) continues it.
+    """
+    def __init__(
+        self,
+        deposition_id: str,
+        token: str,
+        base_url: str = ZENODO_URL,
+        state_path: Optional[Path] = None,
+        chunk_size: int = 0,
+        workers: int = 4,
+    ):
+        self.deposition_id = str(deposition_id)
+        self.base_url = base_url
+        self.state_path = state_path
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self._lock = threading.Lock()
+
+        self.state: dict[str, Any] = {}
+        if state_path and state_path.is_file():
+            with open(state_path, 'r') as f:
+                self.state = json.load(f)
+        if self.state.get('deposition_id') != self.deposition_id:
+            self.state = {'deposition_id': self.deposition_id, 'files': {}}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+
+        with self._lock:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.state_path, 'w') as f:
+                json.dump(self.state, f, indent=2)
+
+    def _request(self, method: str, url: str, **kwargs) -> Any:
+        if not url.startswith('http'):
+            url = self.base_url + url
+
+        r = self.session.request(method, url, **kwargs)
+        r.raise_for_status()
+        return r.json() if r.content else None
+
+    def _draft(self) -> dict[str, Any]:
+        """ Returns the draft of the new version, reusing the one of a previous attempt """
+        if draft_id := self.state.get('draft_id'):
+            try:
+                draft = self._request('GET', f'deposit/depositions/{draft_id}')
+                if not draft['submitted']:
+                    logger.info(f"Reusing draft {draft_id}")
+                    return draft
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+
+        draft = self._request('GET', f'deposit/depositions/{self.deposition_id}')
+        if draft['submitted']:
+            latest = self._request('POST', f'deposit/depositions/{self.deposition_id}/actions/newversion')
+            draft = self._request('GET', latest['links']['latest_draft'])
+
+            metadata = draft['metadata']
+            metadata['version'] = next_version(metadata.get('version', ''))
+            metadata['publication_date'] = date.today().isoformat()
+            draft = self._request('PUT', f'deposit/depositions/{draft["id"]}', json={'metadata': metadata})
+
+        self.state['draft_id'] = draft['id']
+        self.state['files'] = {}
+        self._save_state()
+        return draft
+
+    def _upload(self, bucket: str, part: FilePart, md5: str):
+        with part:
+            r = self._request('PUT', f'{bucket}/{part.name}', data=part)
+
+        if r['checksum'] != f'md5:{md5}':
+            raise ValueError(f"Checksum mismatch uploading {part.name}: {r['checksum']} != md5:{md5}")
+
+        with self._lock:
+            self.state['files'][part.name] = md5
+        self._save_state()
+        logger.info(f"Uploaded {part.name}")
+
+    def upload(self, paths: Iterable[Path], publish: bool = True) -> dict[str, Any]:
+        draft = self._draft()
+        parts = split_parts(paths, self.chunk_size)
+        md5s = {p.name: p.md5() for p in parts}
+
+        # New versions start with the files of the previous one
+        remote: dict[str, str] = {}
+        for f in self._request('GET', f'deposit/depositions/{draft["id"]}/files'):
+            if md5s.get(f['filename']) == f['checksum']:
+                remote[f['filename']] = f['checksum']
+            else:
+                self._request('DELETE', f['links']['self'])
+
+        pending = [p for p in parts if remote.get(p.name) != md5s[p.name]]
+        logger.info(f"Uploading {len(pending)} of {len(parts)} files to draft {draft['id']}")
+        with ThreadPoolExecutor(self.workers) as executor:
+            # Raises the first error, after the other uploads finish
+            list(executor.map(lambda p: self._upload(draft['links']['bucket'], p, md5s[p.name]), pending))
+
+        if not publish:
+            return draft
+
+        published = self._request('POST', f'deposit/depositions/{draft["id"]}/actions/publish')
+        if self.state_path:
+            self.state_path.unlink(missing_ok=True)
+        return published
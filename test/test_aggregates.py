@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dao_analyzer.cache_scripts.common.aggregates import AGGREGATES_FILE, aggregate
+from dao_analyzer.cache_scripts.common.common import NetworkCollector
+
+class _Runner:
+    name = 'test'
+
+    def __init__(self, dw):
+        self.basedir = dw
+        self.cache = dw / '.cache'
+
+class _Collector(NetworkCollector):
+    DAO_KEY = 'dao'
+    AGGREGATES = {'votes': (None, 'count'), 'power': ('power', 'sum')}
+
+    def run(self, force=False, **kwargs):
+        pass
+
+def _votes(ids, network='mainnet', seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': [f'v{i}' for i in ids],
+        'network': network,
+        'dao': rng.choice(['d0', 'd1', 'd2'], len(ids)),
+        'power': rng.integers(0, 100, len(ids)).astype(str),
+    })
+
+def _expected(c):
+    return aggregate(pd.read_feather(c.data_path), c.DAO_KEY, c.AGGREGATES)
+
+def _aggregates(c):
+    return pd.read_feather(c.runner.basedir / AGGREGATES_FILE).set_index(['network', 'dao'])
+
+@pytest.fixture
+def collectors(tmp_path):
+    runner = _Runner(tmp_path)
+    return _Collector('votes', runner, 'mainnet'), _Collector('votes', runner, 'xdai')
+
+def test_incremental_aggregates(collectors):
+    mainnet, xdai = collectors
+
+    mainnet._update_data(_votes(range(100)))
+    xdai._update_data(_votes(range(50), network='xdai'))
+    # Updates some votes (maybe changing their DAO) and adds new ones
+    mainnet._update_data(_votes(range(80, 150), seed=1))
+
+    pd.testing.assert_frame_equal(_aggregates(mainnet), _expected(mainnet))
+    assert _aggregates(mainnet)['votes'].dtype == 'int64'
+    assert _aggregates(mainnet).loc['mainnet', 'votes'].sum() == 150
+
+def test_force_resets_network(collectors):
+    mainnet, xdai = collectors
+
+    mainnet._update_data(_votes(range(100)))
+    xdai._update_data(_votes(range(50), network='xdai'))
+    mainnet._update_data(_votes(range(10), seed=2), force=True)
+
+    pd.testing.assert_frame_equal(_aggregates(mainnet), _expected(mainnet))
+    assert _aggregates(mainnet).loc['mainnet', 'votes'].sum() == 10
+    assert _aggregates(mainnet).loc['xdai', 'votes'].sum() == 50
+
+def test_aggregates_from_existing_data(collectors):
+    mainnet, _ = collectors
+
+    mainnet._update_data(_votes(range(100)))
+    (mainnet.runner.basedir / AGGREGATES_FILE).unlink()
+    mainnet._update_data(_votes(range(90, 110), seed=3))
+
+    pd.testing.assert_frame_equal(_aggregates(mainnet), _expected(mainnet))
@@ -0,0 +1,260 @@
+import re
+from pathlib import Path
+from typing import Optional
+
+from gql.dsl import dsl_gql
+from gql.transport.exceptions import TransportConnectionFailed, TransportProtocolError, TransportQueryError, TransportServerError
+from graphql import print_ast
+import pytest
+import requests
+
+from benchmarks.faults import FaultInjector, Scenario
+from benchmarks.resilience import scenario_config
+from benchmarks.server import SubgraphServer
+from benchmarks.throughput import NETWORK, subgraph_endpoint
+from dao_analyzer.cache_scripts import config
+from dao_analyzer.cache_scripts.common.api_requester import (
+    GQLQueryException,
+    GQLRequester,
+    PooledHTTPTransport,
+    RetryBudget,
+    close_clients,
+    get_client,
+    is_transient_error,
+)
+from dao_analyzer.cache_scripts.common import memory
+from dao_analyzer.cache_scripts.common.memory import MemoryMonitor
+from dao_analyzer.cache_scripts.common.thegraph import _split, partial_query
+from dao_analyzer.cache_scripts.daohaus.runner import DaohausRunner
+from dao_analyzer.cache_scripts.metadata import Block, CollectorRunStats, RunnerMetadata
+
+def _requester(server) -> GQLRequester:
+    r = GQLRequester(server.url, pbar_enabled=False)
+    r.ELEMS_PER_CHUNK = 100
+    return r
+
+def _record_aliases(r: GQLRequester) -> list[list[tuple[str, str]]]:
+    """ Records the (alias, field) of every request """
+    sent = []
+    request = r.request
+
+    def wrapper(q):
+        sent.append(re.findall(r'(q\d+): (\w+)', print_ast(dsl_gql(q).document)))
+        return request(q)
+
+    r.request = wrapper
+    return sent
+
+def test_n_requests_batched():
+    with SubgraphServer(rows=250) as server:
+        r = _requester(server)
+        ds = r.get_schema()
+        queries = {
+            'members': lambda **kw: ds.Query.members(**kw).select(ds.Member.id, ds.Member.shares),
+            # Only the last 50 proposals changed since block 21
+            'proposals': partial_query(lambda **kw: ds.Query.proposals(**kw).select(ds.Proposal.id), {'_change_block': {'number_gte': 21}}),
+        }
+        sent = _record_aliases(r)
+
+        data = r.n_requests_batched(queries)
+        assert sent == 2 * [[('q0', 'members'), ('q1', 'proposals')]] + 2 * [[('q0', 'members')]]
+        assert r.rows == 300
+
+        for k, q in queries.items():
+            assert data[k] == _requester(server).n_requests(q)
+
+def test_split():
+    assert _split(10, [1, 1, 1]) == [4, 3, 3]
+    assert _split(7, [0, 300, 100]) == [0, 5, 2]
+    assert _split(0, [5, 0]) == [0, 0]
+
+def _collectors(runner, names):
+    collectors = {c.name: c for c in runner.network_collectors(NETWORK)}
+    for c in collectors.values():
+        c._pbar_enabled = False
+        c.stats = CollectorRunStats()
+    return [collectors[n] for n in names]
+
+@pytest.fixture
+def daohaus(tmp_path):
+    with SubgraphServer(rows=250) as server, subgraph_endpoint(server.url):
+        runner = DaohausRunner(Path(tmp_path))
+        runner.basedir.mkdir(parents=True)
+        yield runner
+
+def test_prefetch_batch(daohaus):
+    members, proposals = _collectors(daohaus, ['members', 'proposals'])
+    block = Block(members._request_meta()['block'])
+    prev_blocks = {members.collectorid: Block(), proposals.collectorid: Block({'number': 21})}
+    members._requester.ELEMS_PER_CHUNK = 100
+
+    members.prefetch_batch([members, proposals], block=block, prev_blocks=prev_blocks)
+    requests = members._requester.requests
+    for c in [members, proposals]:
+        c.run(block=block, prev_block=prev_blocks[c.collectorid])
+        assert c._prefetched is None
+    assert members._requester.requests == requests
+
+    # Each collector received its rows, and the shared requests are split in whole numbers
+    assert (members.stats.rows, proposals.stats.rows) == (250, 50)
+    assert len(members.df) == 250 and len(proposals.df) == 50
+    assert isinstance(members.stats.requests, int) and isinstance(members.stats.bytes, int)
+    assert (members.stats.requests, proposals.stats.requests) == (3, 1)
+
+def test_prefetch_batch_fallback(daohaus, monkeypatch):
+    members, proposals = _collectors(daohaus, ['members', 'proposals'])
+    block = Block(members._request_meta()['block'])
+
+    def fail(*args, **kwargs):
+        raise GQLQueryException([{'message': 'Query too complex'}])
+    monkeypatch.setattr(GQLRequester, 'n_requests_batched', fail)
+
+    batched = daohaus._prefetch_batch(members, [members, proposals], block, RunnerMetadata(daohaus), force=False)
+    assert batched == [members.collectorid, proposals.collectorid]
+    assert members._prefetched is None and proposals._prefetched is None
+
+    # Every collector requests its own data
+    for c in [members, proposals]:
+        c.run(block=block)
+        assert len(c.df) == 250 and c.stats.rows == 250
+
+@pytest.mark.parametrize('error, transient', [
+    (TransportServerError('Bad gateway', 502), True),
+    (TransportServerError('Too many requests', 429), True),
+    (TransportServerError('Unknown', None), True),
+    (TransportServerError('Bad request', 400), False),
+    (TransportServerError('Unauthorized', 401), False),
+    (TransportConnectionFailed('Connection reset'), True),
+    (TransportProtocolError('Truncated JSON'), True),
+    (requests.Timeout('Read timed out'), True),
+    (requests.ConnectionError('Connection refused'), True),
+    (GQLQueryException([{'message': 'Store error: database unavailable'}]), True),
+    (GQLQueryException([{'message': 'bad indexers: {0x0: Timeout}'}]), True),
+    (TransportQueryError('Query has been cancelled'), True),
+    (GQLQueryException([{'message': 'Type `Query` has no field `foo`'}]), False),
+    (TransportQueryError('Subgraph not found'), False),
+    (ValueError('0x0 is not a block'), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) == transient
+
+def test_retry_budget():
+    budget = RetryBudget(2)
+    assert budget.consume() and budget.consume()
+    assert not budget.consume()
+    assert budget.used == 2
+
+def _page(fault: str, attempts: int = 5, budget: int = 100) -> tuple[FaultInjector, GQLRequester, Optional[BaseException]]:
+    """ Requests a page from a server that always fails with fault """
+    scenario = Scenario('test', faults={fault: 1}, config={'PAGE_MAX_ATTEMPTS': attempts, 'PAGE_RETRY_BUDGET': budget, 'PAGE_RETRY_MAX_WAIT': 0})
+    injector = FaultInjector(scenario)
+    with SubgraphServer(rows=10) as server, scenario_config(scenario):
+        r = _requester(server)
+        ds = r.get_schema()
+
+        server.injector = injector
+        try:
+            r.request_page(ds.Query.members().select(ds.Member.id))
+        except Exception as e:
+            return injector, r, e
+    return injector, r, None
+
+def test_request_page_retries():
+    injector, r, e = _page('503', attempts=3)
+    assert isinstance(e, TransportServerError) and e.code == 503
+    assert injector.requests == 3 and r.retries == 2
+
+    # Store errors are transient too
+    assert _page('error', attempts=2)[0].requests == 2
+
+def test_request_page_permanent_error():
+    calls = []
+    def request_single(q):
+        calls.append(q)
+        raise GQLQueryException([{'message': 'Type `Query` has no field `foo`'}])
+
+    r = GQLRequester('http://127.0.0.1:1/', pbar_enabled=False)
+    r.request_single = request_single
+    with pytest.raises(GQLQueryException):
+        r.request_page('{ foo { id } }')
+    assert len(calls) == 1 and r.retries == 0
+
+def test_request_page_budget():
+    injector, r, e = _page('503', budget=1)
+    assert e is not None
+    assert injector.requests == 2 and r.retries == 1
+
+def test_transport_pool():
+    transport = PooledHTTPTransport('http://127.0.0.1:1/', pool_maxsize=6, retries=3)
+    transport.connect()
+    try:
+        adapter = transport.session.get_adapter('http://127.0.0.1:1/')
+        assert adapter._pool_maxsize == 6
+        # The retries set up by RequestsHTTPTransport are kept
+        assert adapter.max_retries.total == 3
+    finally:
+        transport.close()
+
+def test_shared_clients():
+    with SubgraphServer(rows=10) as server:
+        r1, r2 = _requester(server), _requester(server)
+        ds = r1.get_schema()
+        r1.request(ds.Query.members().select(ds.Member.id))
+        r2.request(ds.Query.members().select(ds.Member.id))
+
+        client = get_client(server.url)
+        assert client is get_client(server.url) is r1._GQLRequester__client is r2._GQLRequester__client
+        # The schema is fetched once, and both use the same connection
+        assert r2._GQLRequester__client.client.schema is not None
+        transport = client.client.transport
+        session = transport.session
+        assert session is not None
+
+        closed = []
+        session.close = lambda: closed.append(session)
+        close_clients()
+
+        assert closed == [session] and transport.session is None
+        assert get_client(server.url) is not client
+
+def test_prefetch_batch_spill(daohaus):
+    members, proposals = _collectors(daohaus, ['members', 'proposals'])
+    block = Block(members._request_meta()['block'])
+    prev_blocks = {members.collectorid: Block(), proposals.collectorid: Block({'number': 21})}
+    members._requester.ELEMS_PER_CHUNK = 100
+
+    settings = config.get_settings()
+    prev = settings.SPILL_THRESHOLD
+    settings.set('SPILL_THRESHOLD', 1)
+    try:
+        members.prefetch_batch([members, proposals], block=block, prev_blocks=prev_blocks)
+    finally:
+        settings.set('SPILL_THRESHOLD', prev)
+
+    # Each collector keeps its pages in its own segments until it is run
+    spill = daohaus.cache / 'spill'
+    assert members._prefetched[1].spilled and proposals._prefetched[1].spilled
+    assert {p.name.split('-')[0] for p in spill.iterdir()} == {'daohaus_members', 'daohaus_proposals'}
+
+    for c in [members, proposals]:
+        c.run(block=block, prev_block=prev_blocks[c.collectorid])
+    assert len(members.df) == 250 and len(proposals.df) == 50
+    assert members.df['id'].is_unique
+    assert not list(spill.iterdir())
+
+def test_prefetch_batch_pressure(daohaus, monkeypatch):
+    members, proposals = _collectors(daohaus, ['members', 'proposals'])
+    block = Block(members._request_meta()['block'])
+    prev_blocks = {members.collectorid: Block(), proposals.collectorid: Block({'number': 21})}
+    for c in [members, proposals]:
+        c.memory = MemoryMonitor(budget=1000)
+
+    # Over the budget while prefetching, but under the spill threshold
+    monkeypatch.setattr(memory, 'current_rss', lambda: 2000)
+    members.prefetch_batch([members, proposals], block=block, prev_blocks=prev_blocks)
+    assert members._prefetched[1].spilled and proposals._prefetched[1].spilled
+    assert members.memory.peak == proposals.memory.peak == 2000
+
+    for c in [members, proposals]:
+        c.run(block=block, prev_block=prev_blocks[c.collectorid])
+    assert len(members.df) == 250 and len(proposals.df) == 50
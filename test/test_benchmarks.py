@@ -0,0 +1,48 @@
+import pytest
+import requests
+
+from benchmarks.server import SubgraphServer, ROWS_PER_BLOCK
+from benchmarks.throughput import DEFAULT_COLLECTORS, NETWORK, parse_rows, run_benchmarks, subgraph_endpoint
+from dao_analyzer.cache_scripts.common import ENDPOINTS
+
+def _ids(url: str, args: str) -> list[str]:
+    r = requests.post(url, json={'query': f'{{ members({args}) {{ id }} }}'})
+    r.raise_for_status()
+    return [m['id'] for m in r.json()['data']['members']]
+
+def test_server_pagination():
+    with SubgraphServer(rows=250) as server:
+        first = _ids(server.url, 'first: 100')
+        assert len(first) == 100
+        assert _ids(server.url, f'first: 1000, where: {{id_gt: "{first[-1]}"}}')[0] > first[-1]
+        assert len(_ids(server.url, 'first: 1000')) == 250
+        assert len(_ids(server.url, 'first: 1000, where: {_change_block: {number_gte: 21}}')) == 250 - 20 * ROWS_PER_BLOCK
+        assert len(_ids(server.url, 'first: 1000, block: {number: 3}')) == 3 * ROWS_PER_BLOCK
+
+def test_parse_rows():
+    assert parse_rows('10k') == 10_000
+    assert parse_rows('1M') == 1_000_000
+    assert parse_rows('123') == 123
+
+def test_throughput_smoke():
+    report = run_benchmarks([1500], ['members'])
+
+    stages = {r['stage']: r for r in report['results']}
+    assert set(stages) == {'run', 'n_requests', 'transform_to_df', '_update_data', '_update_data (merge)'}
+    assert all(r['rows'] == 1500 and r['rows_per_second'] > 0 for r in stages.values())
+
+def test_subgraph_endpoint():
+    prev = dict(ENDPOINTS[NETWORK])
+    with SubgraphServer(rows=10, platform='aragon') as server, subgraph_endpoint(server.url, 'aragon'):
+        assert all(ENDPOINTS[NETWORK][k] == server.url for k in ['aragon', 'aragon_voting', 'aragon_tokens', 'aragon_finance'])
+        assert ENDPOINTS[NETWORK]['daohaus'] == prev['daohaus']
+    assert ENDPOINTS[NETWORK] == prev
+
+@pytest.mark.parametrize('platform', ['aragon', 'daostack'])
+def test_throughput_platforms(platform):
+    report = run_benchmarks([250], platform=platform)
+
+    runs = [r for r in report['results'] if r['stage'] == 'run']
+    assert report['platform'] == platform
+    assert sorted(r['collector'] for r in runs) == sorted(DEFAULT_COLLECTORS[platform])
+    assert all(r['rows'] == 250 and r['rows_per_second'] > 0 for r in runs)
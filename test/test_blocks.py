@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+
+from gql.dsl import DSLQuery, DSLSchema, dsl_gql
+from graphql import build_schema, graphql_sync, print_ast
+
+from dao_analyzer.cache_scripts.common import blocks
+from dao_analyzer.cache_scripts.common.blocks import BLOCK_INDEX_TEMPLATE, BlockIndex, BlockResolver
+from dao_analyzer.cache_scripts.metadata import Block
+
+SDL = """
+input Block_filter { number_gte: BigInt, number_lte: BigInt, timestamp_lte: BigInt, timestamp_gt: BigInt }
+scalar BigInt
+type Block { id: ID!, number: BigInt!, timestamp: BigInt! }
+type Query {
+    blocks(first: Int, skip: Int, orderBy: String, orderDirection: String, where: Block_filter): [Block!]!
+}
+"""
+
+BASE_TIMESTAMP = 1_600_000_000
+
+def _block(number: int) -> dict:
+    return {'id': f'0x{number:064x}', 'number': str(number), 'timestamp': str(BASE_TIMESTAMP + 12 * number)}
+
+class _BlocksRequester:
+    """ Answers the queries to the blocks subgraph of a chain of `head` blocks """
+    def __init__(self, head: int):
+        self.head = head
+        self.schema = build_schema(SDL)
+        self.requests = 0
+
+    def get_schema(self) -> DSLSchema:
+        return DSLSchema(self.schema)
+
+    def _blocks(self, _info, first=100, skip=0, orderBy='number', orderDirection='asc', where=None):
+        where = where or {}
+        chain = [_block(i) for i in range(self.head + 1)]
+        chain = [b for b in chain if
+            int(b['number']) >= int(where.get('number_gte', 0)) and
+            int(b['number']) <= int(where.get('number_lte', self.head)) and
+            int(b['timestamp']) <= int(where.get('timestamp_lte', 2**62)) and
+            int(b['timestamp']) > int(where.get('timestamp_gt', -1))
+        ]
+        if orderDirection == 'desc':
+            chain.reverse()
+        return chain[skip:skip + first]
+
+    def request(self, query) -> dict:
+        self.requests += 1
+        if not isinstance(query, DSLQuery):
+            query = DSLQuery(query)
+        result = graphql_sync(self.schema, print_ast(dsl_gql(query).document), root_value={'blocks': self._blocks})
+        assert not result.errors, result.errors
+        return result.data
+
+def _date(number: int, offset: int = 0) -> datetime:
+    return datetime.fromtimestamp(BASE_TIMESTAMP + 12 * number + offset, timezone.utc)
+
+def test_index_persisted(tmp_path):
+    path = tmp_path / '.cache' / BLOCK_INDEX_TEMPLATE.format(network='mainnet')
+    index = BlockIndex(path)
+    index.add([_block(20), _block(10)])
+    index.add([_block(10), _block(15)])
+    index.add([])
+
+    df = BlockIndex(path).df
+    assert path.is_file()
+    assert df['number'].tolist() == [10, 15, 20]
+    assert df['timestamp'].tolist() == [BASE_TIMESTAMP + 12 * n for n in [10, 15, 20]]
+    assert df['id'].tolist() == [_block(n)['id'] for n in [10, 15, 20]]
+
+def test_index_bracket(tmp_path):
+    index = BlockIndex(tmp_path / 'blocks.arr')
+    assert index.bracket(BASE_TIMESTAMP) == (None, None)
+
+    index.add([_block(10), _block(15), _block(20)])
+    ts = lambda n: BASE_TIMESTAMP + 12 * n  # noqa: E731
+
+    assert index.bracket(ts(5)) == (None, index._block(0))
+    assert index.bracket(ts(10)) == (index._block(0), index._block(1))
+    assert index.bracket(ts(12)) == (index._block(0), index._block(1))
+    assert index.bracket(ts(20) + 1) == (index._block(2), None)
+
+def test_index_lookup(tmp_path):
+    index = BlockIndex(tmp_path / 'blocks.arr')
+    index.add([_block(10), _block(11), _block(20)])
+
+    # The blocks around the date are consecutive, so the block is known
+    assert index.lookup(BASE_TIMESTAMP + 12 * 10 + 5).number == 10
+    # Unknown blocks between 11 and 20, and outside of the index
+    assert index.lookup(BASE_TIMESTAMP + 12 * 15) is None
+    assert index.lookup(BASE_TIMESTAMP + 12 * 25) is None
+    assert index.lookup(BASE_TIMESTAMP) is None
+
+def test_block_at_date(tmp_path):
+    requester = _BlocksRequester(head=100)
+    index = BlockIndex(tmp_path / 'blocks.arr')
+
+    block = blocks._block_at_date(requester, index, _date(42, 5))
+    assert (block.number, block.id) == (42, _block(42)['id'])
+    assert requester.requests == 1
+    assert index.df['number'].tolist() == [42, 43]
+
+    # Resolved with the index
+    assert blocks._block_at_date(requester, index, _date(42, 11)).number == 42
+    assert requester.requests == 1
+
+    # Dates outside the index are requested
+    assert blocks._block_at_date(requester, index, _date(90)).number == 90
+    assert blocks._block_at_date(requester, index, _date(7, 1)).number == 7
+    assert requester.requests == 3
+    assert index.df['number'].tolist() == [7, 8, 42, 43, 90, 91]
+
+def test_block_at_date_fallback(tmp_path, monkeypatch):
+    requester = _BlocksRequester(head=100)
+    monkeypatch.setattr(blocks, 'GQLRequester', lambda endpoint: requester)
+    index = BlockIndex(tmp_path / 'blocks.arr')
+
+    # Dates before the first block return the previous block
+    prev = Block(_block(3))
+    assert blocks.get_validated_block('mainnet', prev_block=prev, until_date=_date(0, -100), index=index) is prev
+
+    resolver = BlockResolver(until_date=_date(50, 1), cache=tmp_path / '.cache')
+    assert resolver.resolve('mainnet').number == 50
+    assert (tmp_path / '.cache' / BLOCK_INDEX_TEMPLATE.format(network='mainnet')).is_file()
+
+class _Runner:
+    """ Resolves the block of its networks like NetworkRunner.run, recording them """
+    def __init__(self, name: str, resolved: dict, prev_block: Block):
+        self.name = name
+        self.resolved = resolved
+        self.prev_block = prev_block
+
+    def run(self, networks, force, collectors, until_date, blocks: BlockResolver):
+        for n in networks:
+            self.resolved[self.name, n] = blocks.resolve(n, prev_block=self.prev_block)
+
+def test_resolver_run_all(tmp_path, monkeypatch):
+    from dao_analyzer.cache_scripts import main
+
+    # Every runner has a different block in its metadata
+    prev_blocks = {'aragon': Block(_block(10)), 'daohaus': Block(_block(20))}
+    resolved = {}
+    monkeypatch.setattr(main, 'get_platform', lambda p: lambda dw: _Runner(p, resolved, prev_blocks[p]))
+
+    # The requester is the endpoint, and the blocks of xdai can't be obtained
+    xdai = blocks.get_graph_url(blocks.ENDPOINTS['xdai']['_blocks'])
+    calls = []
+    def block_at_date(requester, index, date):
+        calls.append(requester)
+        return None if requester == xdai else Block(_block(50))
+    monkeypatch.setattr(blocks, '_block_at_date', block_at_date)
+    monkeypatch.setattr(blocks, 'GQLRequester', lambda endpoint: endpoint)
+
+    main.run_all(tmp_path, ['aragon', 'daohaus'], ['mainnet', 'xdai'], [], _date(50), force=False)
+
+    # The block of mainnet is requested once, and used by both runners
+    assert calls.count(xdai) == 2 and len(calls) == 3
+    assert resolved['aragon', 'mainnet'] is resolved['daohaus', 'mainnet']
+    assert resolved['aragon', 'mainnet'].number == 50
+
+    # The previous block of each runner is only used when there is no block
+    assert resolved['aragon', 'xdai'] is prev_blocks['aragon']
+    assert resolved['daohaus', 'xdai'] is prev_blocks['daohaus']
@@ -0,0 +1,126 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import pytest
+
+from dao_analyzer.cache_scripts import DataWarehouse
+from dao_analyzer.cache_scripts.common.common import NetworkCollector
+from dao_analyzer.cache_scripts.common.index import KeyIndex, index_path
+
+class _Runner:
+    name = 'test'
+
+    def __init__(self, dw):
+        self.basedir = dw
+        self.cache = dw / '.cache'
+
+class _Collector(NetworkCollector):
+    DAO_KEY = 'dao'
+    INDEX_COLUMNS = ['dao', 'power']
+
+    def run(self, force=False, **kwargs):
+        pass
+
+@pytest.fixture
+def votes():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    return pd.DataFrame({
+        'id': [f'v{i}' for i in range(n)],
+        'network': rng.choice(['mainnet', 'xdai'], n),
+        'dao': pd.Series(rng.choice([f'0x{i:040x}' for i in range(50)], n)).mask(rng.random(n) < 0.01),
+        'power': rng.integers(0, 100, n),
+    })
+
+@pytest.fixture
+def dw(tmp_path, votes):
+    (tmp_path / 'daostack').mkdir()
+    (tmp_path / '.cache').mkdir()
+    votes.to_feather(tmp_path / 'daostack' / 'votes.arr')
+    votes.head().to_feather(tmp_path / '.cache' / 'blocks.arr')
+    return DataWarehouse(tmp_path)
+
+def test_read(dw, votes):
+    assert dw.tables() == ['daostack/votes']
+    with pytest.raises(KeyError):
+        dw.read('daostack/proposals')
+
+    df = dw.read('daostack/votes', columns=['id', 'power'], filter={'network': 'xdai', 'power': [1, 2]})
+    expected = votes[(votes['network'] == 'xdai') & votes['power'].isin([1, 2])][['id', 'power']]
+    pd.testing.assert_frame_equal(df, expected.reset_index(drop=True))
+
+    table = dw.read('daostack/votes', filter=pc.field('power') > 98, as_pandas=False)
+    assert table.num_rows == (votes['power'] > 98).sum()
+
+def test_read_dao(dw, votes):
+    dao = votes['dao'].dropna().iloc[0]
+    df = dw.read_dao('daostack/votes', dao)
+    pd.testing.assert_frame_equal(df, votes[votes['dao'] == dao].reset_index(drop=True))
+    # Without an index, reading scans the column, and doesn't write it
+    assert not index_path(dw.table_path('daostack/votes'), 'dao').exists()
+
+    df = dw.read_dao('daostack/votes', [dao, 'unknown'], columns=['id'], network='mainnet')
+    expected = votes[(votes['dao'] == dao) & (votes['network'] == 'mainnet')][['id']]
+    pd.testing.assert_frame_equal(df, expected.reset_index(drop=True))
+
+    assert dw.read_dao('daostack/votes', 'unknown').empty
+
+def test_index_outdated(dw, votes):
+    path = dw.table_path('daostack/votes')
+    index = KeyIndex(path, 'dao').build()
+    assert index.is_valid()
+
+    dao = votes['dao'].dropna().iloc[0]
+    pd.testing.assert_frame_equal(index.take([dao, 'unknown']).to_pandas(), votes[votes['dao'] == dao].reset_index(drop=True))
+
+    time.sleep(0.01)
+    votes = votes.iloc[::-1].reset_index(drop=True)
+    votes.to_feather(path)
+    assert not index.is_valid()
+
+    # The outdated index is not used, nor rebuilt
+    pd.testing.assert_frame_equal(index.take(dao).to_pandas(), votes[votes['dao'] == dao].reset_index(drop=True))
+    assert not index.is_valid()
+
+def test_index_unique_keys(dw, votes):
+    path = dw.table_path('daostack/votes')
+    index = KeyIndex(path, 'dao').build()
+    assert index.is_valid()
+
+    # A key per row, the index would be as big as the column
+    unique = KeyIndex(path, 'id').build()
+    assert not unique.index_path.exists()
+    assert unique.take(['v7', 'v3'])['id'].to_pylist() == ['v3', 'v7']
+
+    # The DAOs have more rows than the threshold allows
+    index.build(threshold=0.0001)
+    assert not index.index_path.exists()
+
+def test_collector_indexes(tmp_path, votes):
+    runner = _Runner(tmp_path)
+    mainnet, xdai = _Collector('votes', runner, 'mainnet'), _Collector('votes', runner, 'xdai')
+
+    mainnet._update_data(votes[votes['network'] == 'mainnet'])
+    xdai._update_data(votes[votes['network'] == 'xdai'])
+    assert KeyIndex(mainnet.data_path, 'dao').is_valid()
+    assert KeyIndex(mainnet.data_path, 'power').is_valid()
+
+    dao = votes['dao'].dropna().iloc[0]
+    expected = votes[(votes['dao'] == dao) & (votes['network'] == 'xdai')]
+    df = xdai.read_dao(dao, columns=['id', 'power'])
+    assert sorted(df['id']) == sorted(expected['id'])
+    assert list(df.columns) == ['id', 'power']
+
+def test_update_data_combined(tmp_path, votes):
+    c = _Collector('votes', _Runner(tmp_path), 'mainnet')
+    votes = votes.head(100)
+
+    # The first update writes the data as is
+    first = c._update_data(votes.iloc[:60])
+    pd.testing.assert_frame_equal(first, votes.iloc[:60])
+
+    combined = c._update_data(votes.iloc[40:])
+    assert sorted(combined['id']) == sorted(votes['id'])
+    assert sorted(pd.read_feather(c.data_path)['id']) == sorted(votes['id'])
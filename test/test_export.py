@@ -0,0 +1,104 @@
+import json
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather  # noqa: F401
+import pyarrow.parquet as pq
+
+from dao_analyzer.cache_scripts.utils.export import MANIFEST, export_dw, package_zip, sha256sum, write_csv
+
+def _write_dw(dw, n=1000):
+    (dw / 'daohaus').mkdir(parents=True)
+    (dw / '.cache').mkdir()
+    (dw / 'update_date.txt').write_text('2026-10-19')
+    (dw / 'daohaus' / 'metadata.json').write_text('{}')
+
+    df = pd.DataFrame({
+        'id': [f'0x{i:040x}' for i in range(n)],
+        'network': ['mainnet', 'xdai'] * (n // 2),
+        'molochAddress': [f'0x{i % 7:040x}' for i in range(n)],
+        'shares': range(n),
+        'kicked': [i % 2 == 0 for i in range(n)],
+    })
+    # Several record batches
+    pa.feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), dw / 'daohaus' / 'members.arr', chunksize=128)
+    df.to_feather(dw / '.cache' / 'blocks_mainnet.arr')
+    return df
+
+def test_export_csv(tmp_path):
+    dw, out = tmp_path / 'dw', tmp_path / 'out'
+    df = _write_dw(dw)
+
+    paths = export_dw(dw, out, jobs=2)
+    assert out / 'daohaus' / 'members.csv' in paths
+    assert not (out / '.cache').exists()
+
+    # The same data that pandas' to_csv wrote
+    pd.testing.assert_frame_equal(pd.read_csv(out / 'daohaus' / 'members.csv', index_col=0), df, check_names=False)
+
+    with open(out / MANIFEST) as f:
+        manifest = json.load(f)
+    assert manifest['daohaus/members.csv']['rows'] == len(df)
+
+def test_write_csv_like_pandas(tmp_path):
+    n = 1000
+    df = pd.DataFrame({
+        'id': [f'0x{i:040x}' for i in range(n)],
+        'value': [float(i % 3) for i in range(n)],
+        'ratio': [i / 7 if i % 5 else None for i in range(n)],
+        'kicked': [i % 2 == 0 for i in range(n)],
+        'name': [f'DAO, "{i}"' if i % 3 else None for i in range(n)],
+        'createdAt': pd.date_range('2021-01-01', periods=n, freq='h', tz='UTC'),
+    })
+    pa.feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp_path / 'dao.arr', chunksize=128)
+
+    assert write_csv(tmp_path / 'dao.arr', tmp_path / 'dao.csv') == n
+    assert (tmp_path / 'dao.csv').read_text() == df.to_csv()
+
+def test_export_skips_unchanged(tmp_path):
+    dw, out = tmp_path / 'dw', tmp_path / 'out'
+    _write_dw(dw)
+
+    export_dw(dw, out)
+    mtime = (out / 'daohaus' / 'members.csv').stat().st_mtime_ns
+    export_dw(dw, out)
+    assert (out / 'daohaus' / 'members.csv').stat().st_mtime_ns == mtime
+
+    (dw / 'daohaus' / 'members.arr').unlink()
+    export_dw(dw, out)
+    assert not (out / 'daohaus' / 'members.csv').exists()
+
+def test_export_parquet(tmp_path):
+    dw, out = tmp_path / 'dw', tmp_path / 'out'
+    df = _write_dw(dw)
+
+    export_dw(dw, out, formats=['csv', 'parquet'])
+    assert (out / 'daohaus' / 'members.csv').is_file()
+
+    path = out / 'daohaus' / 'members.parquet'
+    parquet = pd.read_parquet(path)
+    assert parquet[['network', 'molochAddress']].apply(tuple, axis=1).is_monotonic_increasing
+    pd.testing.assert_frame_equal(
+        parquet.sort_values('id', ignore_index=True),
+        df.sort_values('id', ignore_index=True),
+    )
+    assert [c.column_index for c in pq.ParquetFile(path).metadata.row_group(0).sorting_columns] == [1, 2]
+
+    with open(out / MANIFEST) as f:
+        entry = json.load(f)['daohaus/members.parquet']
+    assert entry['rows'] == len(df)
+    assert entry['sha256'] == sha256sum(path)
+
+def test_package_zip(tmp_path):
+    dw, out = tmp_path / 'dw', tmp_path / 'out'
+    _write_dw(dw)
+    export_dw(dw, out, formats=['csv', 'parquet'])
+    (out / 'dataset-metadata.json').write_text('{}')
+
+    with zipfile.ZipFile(package_zip(out, tmp_path / 'archive.zip', exclude=['dataset-metadata.json'])) as zf:
+        infos = {i.filename: i for i in zf.infolist()}
+        assert 'dataset-metadata.json' not in infos
+        assert infos['daohaus/members.parquet'].compress_type == zipfile.ZIP_STORED
+        assert infos['daohaus/members.csv'].compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read('daohaus/members.csv') == (out / 'daohaus' / 'members.csv').read_bytes()
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that should only be imported when a runner is used
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'gql', 'graphql', 'requests_cache', 'tqdm', 'dynaconf']
+
+# Generous limit to avoid failing on slow CI machines
+MAX_IMPORT_TIME_US = 500_000
+
+def _importtime(*args: str) -> dict[str, int]:
+    """ Returns the cumulative import time (in us) of every module imported """
+    p = subprocess.run([sys.executable, '-X', 'importtime', *args], capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in p.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+@pytest.mark.parametrize('module', ['dao_analyzer.cache_scripts.main', 'dao_analyzer.cache_scripts.common'])
+def test_no_heavy_imports(module):
+    imported = _importtime('-c', f'import {module}')
+    assert not set(HEAVY_MODULES) & set(imported)
+
+def test_version_import_time():
+    times = _importtime('-m', 'dao_analyzer.cache_scripts', '--version')
+
+    assert not set(HEAVY_MODULES) & set(times)
+    assert times['dao_analyzer.cache_scripts.main'] < MAX_IMPORT_TIME_US
@@ -0,0 +1,107 @@
+import logging
+import random
+
+import pytest
+
+from dao_analyzer.cache_scripts import config
+from dao_analyzer.cache_scripts.logging import AuxDatawarehouseHandler, BodyLogFilter
+
+LINE = 'x' * 99
+
+@pytest.fixture
+def settings():
+    settings = config.get_settings()
+    prev = {k: settings[k] for k in ['LOGGING_MAX_SIZE', 'LOGGING_BACKUP_COUNT']}
+    yield settings
+    for k, v in prev.items():
+        settings.set(k, v)
+
+@pytest.fixture
+def dws(tmp_path):
+    aux, real = tmp_path / 'aux', tmp_path / 'real'
+    (aux / 'logs').mkdir(parents=True)
+    (real / 'logs').mkdir(parents=True)
+    return aux, real
+
+def _run(dws, lines: int, errors: bool = False):
+    """ Logs `lines` lines of 100 bytes in a run, and moves them to the real datawarehouse """
+    aux, real = dws
+    h = AuxDatawarehouseHandler(aux, real, 'test')
+    h.setFormatter(logging.Formatter('%(message)s'))
+    for _ in range(lines):
+        h.emit(logging.makeLogRecord({'msg': LINE}))
+    h.dump(errors)
+    assert not (aux / 'logs' / 'test.log').exists()
+
+def _sizes(dws) -> dict[str, int]:
+    return {p.name: p.stat().st_size for p in (dws[1] / 'logs').iterdir()}
+
+def test_dump_empty_target(dws):
+    _run(dws, 3)
+    assert _sizes(dws) == {'test.log': 300}
+
+def test_dump_errors(dws):
+    _run(dws, 1)
+    _run(dws, 2, errors=True)
+
+    # The logs of a failed run are kept apart
+    sizes = _sizes(dws)
+    assert sizes.pop('test.log') == 100
+    [(name, size)] = sizes.items()
+    assert name.startswith('test_error_') and size == 200
+
+def test_dump_append(dws):
+    _run(dws, 3)
+    _run(dws, 2)
+    assert _sizes(dws) == {'test.log': 500}
+
+def test_dump_rotation(dws, settings):
+    settings.set('LOGGING_MAX_SIZE', 1000)
+    settings.set('LOGGING_BACKUP_COUNT', 2)
+
+    _run(dws, 3)
+    # A single run bigger than the limit is rotated while copying it
+    _run(dws, 25)
+    assert _sizes(dws) == {'test.log': 800, 'test.log.1': 1000, 'test.log.2': 1000}
+
+    # Only LOGGING_BACKUP_COUNT backups are kept
+    _run(dws, 5)
+    assert _sizes(dws) == {'test.log': 300, 'test.log.1': 1000, 'test.log.2': 1000}
+
+def test_dump_no_backups(dws, settings):
+    settings.set('LOGGING_MAX_SIZE', 1000)
+    settings.set('LOGGING_BACKUP_COUNT', 0)
+
+    _run(dws, 8)
+    _run(dws, 8)
+    assert _sizes(dws) == {'test.log': 1600}
+
+def _filter(f: BodyLogFilter, msg: str) -> logging.LogRecord | None:
+    record = logging.makeLogRecord({'msg': msg})
+    return record if f.filter(record) else None
+
+def test_body_truncation():
+    f = BodyLogFilter(max_size=10)
+    assert _filter(f, '>>> short').getMessage() == '>>> short'
+
+    record = _filter(f, '>>> %s' % ('a' * 100))
+    assert record.getMessage() == '>>> aaaaaa... (94 more characters)'
+
+    # Without limit
+    assert _filter(BodyLogFilter(max_size=0), 'a' * 100).getMessage() == 'a' * 100
+
+@pytest.mark.parametrize('rate', [0, 0.25, 1])
+def test_body_sampling(rate):
+    f = BodyLogFilter(max_size=0, sample_rate=rate)
+    f._rng = random.Random(0)
+
+    kept = []
+    for i in range(1000):
+        for msg in [f'>>> request {i}', f'<<< response {i}']:
+            if _filter(f, msg):
+                kept.append(msg)
+
+    # The response of every kept request is kept too
+    requests = [m for m in kept if m.startswith('>>>')]
+    assert kept == [m for r in requests for m in (r, r.replace('>>> request', '<<< response'))]
+    assert len(requests) == pytest.approx(1000 * rate, abs=50)
@@ -0,0 +1,55 @@
+import time
+
+from dao_analyzer.cache_scripts.common import memory
+from dao_analyzer.cache_scripts.common.memory import MemoryMonitor
+
+def _fake_rss(monkeypatch, values: list[int]):
+    """ Makes current_rss return the values in order, and then the last one """
+    values = list(values)
+    monkeypatch.setattr(memory, 'current_rss', lambda: values.pop(0) if len(values) > 1 else values[0])
+
+def test_current_rss(monkeypatch):
+    assert memory.current_rss() > 0
+
+    # Without psutil
+    monkeypatch.setattr(memory, 'psutil', None)
+    assert memory.current_rss() > 0
+
+def test_budget(monkeypatch):
+    _fake_rss(monkeypatch, [50, 150, 80])
+    m = MemoryMonitor(budget=100)
+    assert not m.over_budget
+
+    m.sample()
+    assert not m.over_budget
+    m.sample()
+    assert m.over_budget
+    # Only the current RSS counts, not the peak
+    m.sample()
+    assert not m.over_budget
+
+def test_no_budget(monkeypatch):
+    _fake_rss(monkeypatch, [2**40])
+    m = MemoryMonitor()
+    m.sample()
+    assert not m.over_budget
+
+def test_peak(monkeypatch):
+    _fake_rss(monkeypatch, [10, 300, 20])
+    m = MemoryMonitor()
+    for _ in range(3):
+        m.sample()
+    assert (m.peak, m.last) == (300, 20)
+
+def test_background_sampling(monkeypatch):
+    _fake_rss(monkeypatch, [10, 20, 500, 30, 40])
+    monkeypatch.setattr(MemoryMonitor, 'INTERVAL', 0.01)
+
+    with MemoryMonitor() as m:
+        deadline = time.monotonic() + 5
+        while m.last != 40 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # The peak between the samples of the collector is recorded too
+    assert m.peak == 500 and m.last == 40
+    assert not m._thread.is_alive()
@@ -0,0 +1,22 @@
+import re
+import sys
+
+from dao_analyzer.cache_scripts import main, config
+from dao_analyzer.cache_scripts.profiling import profile
+
+def test_profile_writes_output(tmp_path, monkeypatch):
+    def run_all(datawarehouse, **kwargs):
+        with profile('daohaus/members'):
+            sum(range(10_000))
+
+    monkeypatch.setattr(main, 'run_all', run_all)
+    monkeypatch.setattr(sys, 'argv', ['daoa-cache-scripts', '--profile', '-D', str(tmp_path / 'dw')])
+    try:
+        main.main()
+    finally:
+        config.settings.set('profile', False)
+
+    [profile_dir] = (tmp_path / 'dw' / 'logs').glob('profile_*')
+    assert re.fullmatch(r'profile_\d{8}T\d{6}', profile_dir.name)
+    assert (profile_dir / 'summary.txt').stat().st_size > 0
+    assert list(profile_dir.glob('daohaus_members.*'))
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from dao_analyzer.cache_scripts import config
+from dao_analyzer.cache_scripts.metadata import CollectorMetaData, CollectorRunStats, RunnerMetadata
+from dao_analyzer.cache_scripts.report import load_runs, print_report, summarize_runs
+
+def _stats(day: int, duration: float, ok: bool = True, **kwargs) -> CollectorRunStats:
+    stats = CollectorRunStats()
+    stats.start = datetime(2026, 10, day, tzinfo=timezone.utc)
+    stats.ok = ok
+    stats.duration = duration
+    stats.__dict__.update(kwargs)
+    return stats
+
+def _record(datawarehouse, platform: str, runs: dict[str, list[CollectorRunStats]]):
+    runner = SimpleNamespace(basedir=datawarehouse / platform)
+    runner.basedir.mkdir(parents=True)
+    with RunnerMetadata(runner) as metadata:
+        for collectorid, stats in runs.items():
+            for s in stats:
+                metadata[collectorid].add_run(s)
+
+def test_stats_measure():
+    stats = CollectorRunStats()
+    with stats.measure('fetch_time'):
+        pass
+    first = stats.fetch_time
+    with stats.measure('fetch_time'):
+        pass
+    assert 0 < first < stats.fetch_time
+
+def test_stats_round_trip(tmp_path):
+    stats = _stats(1, 2.5, ok=False, requests=3, retries=1, rows=300, bytes=4000, peak_memory=10**8)
+    _record(tmp_path, 'daohaus', {'daohaus/mainnet/members': [stats]})
+
+    with RunnerMetadata(SimpleNamespace(basedir=tmp_path / 'daohaus')) as metadata:
+        [loaded] = metadata['daohaus/mainnet/members'].runs
+    assert loaded.toDict() == stats.toDict()
+    assert loaded.start == stats.start and not loaded.ok
+
+def test_metrics_history():
+    settings = config.get_settings()
+    prev = settings.METRICS_HISTORY
+    settings.set('METRICS_HISTORY', 3)
+    try:
+        m = CollectorMetaData('members')
+        for day in range(1, 6):
+            m.add_run(_stats(day, day))
+    finally:
+        settings.set('METRICS_HISTORY', prev)
+
+    # Only the last runs are kept
+    assert [r.duration for r in m.runs] == [3, 4, 5]
+
+def test_summarize_runs(tmp_path):
+    _record(tmp_path, 'daohaus', {
+        'daohaus/mainnet/members': [
+            _stats(1, 2, requests=4, retries=1, rows=100, bytes=2*10**6, file_size=10**6),
+            _stats(2, 4, ok=False, requests=6, retries=2, rows=300, bytes=4*10**6, file_size=3*10**6, peak_memory=5*10**6),
+        ],
+    })
+    _record(tmp_path, 'aragon', {
+        'aragon/mainnet/apps': [_stats(1, 10, requests=1, rows=5)],
+    })
+
+    runs = load_runs(tmp_path)
+    assert len(runs) == 3
+    summary = summarize_runs(runs)
+
+    # Sorted by mean duration
+    assert summary.index.tolist() == ['aragon/mainnet/apps', 'daohaus/mainnet/members']
+    members = summary.loc['daohaus/mainnet/members']
+    assert (members['runs'], members['failed'], members['retries']) == (2, 1, 3)
+    assert members['last_run'] == datetime(2026, 10, 2, tzinfo=timezone.utc).isoformat()
+    assert members['duration'] == 3 and members['max_duration'] == 4
+    assert members['requests'] == 5 and members['rows'] == 200
+    assert members['MB'] == pytest.approx(3) and members['file_MB'] == pytest.approx(3)
+    assert members['peak_MB'] == pytest.approx(5)
+
+def test_print_report(tmp_path, capsys):
+    print_report(tmp_path)
+    assert capsys.readouterr().out == f"No runs recorded in {tmp_path}\n"
+
+    _record(tmp_path, 'daohaus', {'daohaus/mainnet/members': [_stats(1, 2.5, rows=100)]})
+    print_report(tmp_path)
+    out = capsys.readouterr().out.splitlines()
+    assert str(tmp_path) in out[0]
+    assert any(line.startswith('daohaus/mainnet/members') and '2.50' in line for line in out)
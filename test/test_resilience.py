@@ -0,0 +1,22 @@
+from benchmarks.faults import Scenario, FaultInjector
+from benchmarks.resilience import run_scenario
+
+def test_injector_script():
+    injector = FaultInjector(Scenario('test', script=['429', None, 'truncated'], faults={'503': 1}))
+    assert [injector.inject() for _ in range(4)] == ['429', None, 'truncated', '503']
+    assert injector.injected == {'429': 1, 'truncated': 1, '503': 1}
+
+def test_graphql_recovers():
+    scenario = Scenario('test', script=['503', 'error', 'truncated'], config={'PAGE_RETRY_MAX_WAIT': 1})
+    result = run_scenario('graphql', scenario)
+
+    assert result['error'] is None
+    assert result['injected'] == {'503': 1, 'error': 1, 'truncated': 1}
+    assert result['server_requests'] == result['calls'] + 3
+    assert result['p50'] <= result['p99']
+
+def test_cryptocompare_baseline():
+    result = run_scenario('cryptocompare', Scenario('test'))
+
+    assert result['error'] is None
+    assert result['calls'] == result['server_requests'] == 20
@@ -0,0 +1,150 @@
+from contextlib import ExitStack
+import threading
+
+import pytest
+
+from dao_analyzer.cache_scripts.common.scheduler import EndpointLimit, RequestScheduler
+
+class Overloaded(Exception):
+    pass
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 1000
+
+    def __call__(self) -> float:
+        return self.now
+
+def _scheduler(max_concurrency=8, endpoint_concurrency=4, target_latency=60, cooldown=0, clock=None) -> RequestScheduler:
+    return RequestScheduler(
+        max_concurrency, endpoint_concurrency, target_latency, cooldown,
+        lambda e: isinstance(e, Overloaded), clock=clock or FakeClock(),
+    )
+
+def test_endpoint_limit_aimd():
+    limit = EndpointLimit(4)
+
+    limit.decrease(cooldown=0)
+    assert limit.limit == 2
+    limit.decrease(cooldown=0)
+    limit.decrease(cooldown=0)
+    assert limit.limit == 1
+
+    # About one more request in flight every `limit` successes
+    limit.increase()
+    assert limit.limit == 2
+    limit.increase()
+    limit.increase()
+    assert int(limit.limit) == 2
+    limit.increase()
+    assert int(limit.limit) == 3
+
+    for _ in range(10):
+        limit.increase()
+    assert limit.limit == 4
+
+def test_endpoint_limit_cooldown():
+    clock = FakeClock()
+    limit = EndpointLimit(8, clock)
+
+    limit.decrease(cooldown=60)
+    clock.now += 59
+    limit.decrease(cooldown=60)
+    assert limit.limit == 4
+
+    clock.now += 1
+    limit.decrease(cooldown=60)
+    assert limit.limit == 2
+
+def test_endpoint_limit_baseline():
+    limit = EndpointLimit(4)
+    assert not limit.is_slow(100)
+
+    for _ in range(10):
+        limit.observe(1)
+    assert limit.baseline == pytest.approx(1)
+    assert not limit.is_slow(2)
+    assert limit.is_slow(4)
+    assert not limit.is_slow(4, min_latency=10)
+
+    # The baseline follows the latency slowly
+    limit.observe(11)
+    assert limit.baseline == pytest.approx(2)
+
+def _blocked(scheduler: RequestScheduler, endpoint: str) -> threading.Thread:
+    """ Starts a request to the endpoint in another thread, that must wait for a free slot """
+    def request():
+        with scheduler.slot(endpoint):
+            pass
+
+    thread = threading.Thread(target=request, daemon=True)
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    return thread
+
+def test_slot_global_limit():
+    scheduler = _scheduler(max_concurrency=2)
+    with ExitStack() as stack:
+        stack.enter_context(scheduler.slot('a'))
+        stack.enter_context(scheduler.slot('b'))
+        thread = _blocked(scheduler, 'c')
+    # Released by the slots leaving the stack
+    thread.join(5)
+    assert not thread.is_alive()
+
+def test_slot_endpoint_limit():
+    scheduler = _scheduler(endpoint_concurrency=2)
+    with ExitStack() as stack:
+        stack.enter_context(scheduler.slot('a'))
+        stack.enter_context(scheduler.slot('a'))
+        # Other endpoints have their own limit
+        stack.enter_context(scheduler.slot('b'))
+        assert scheduler.limit('b').in_flight == 1
+
+        thread = _blocked(scheduler, 'a')
+    thread.join(5)
+    assert not thread.is_alive()
+    assert scheduler.limit('a').in_flight == 0
+
+def test_slot_overload_error():
+    scheduler = _scheduler()
+
+    with pytest.raises(ValueError), scheduler.slot('a'):
+        raise ValueError("Not an overload")
+    assert scheduler.limit('a').limit == 4
+
+    with pytest.raises(Overloaded), scheduler.slot('a'):
+        raise Overloaded()
+    assert scheduler.limit('a').limit == 2
+    assert scheduler.limit('a').in_flight == 0
+
+def _request(scheduler: RequestScheduler, clock: FakeClock, latency: float):
+    with scheduler.slot('a'):
+        clock.now += latency
+
+def test_slot_slow_request():
+    clock = FakeClock()
+    scheduler = _scheduler(target_latency=1, cooldown=10, clock=clock)
+    for _ in range(5):
+        _request(scheduler, clock, 0.5)
+    assert scheduler.limit('a').limit == 4
+
+    _request(scheduler, clock, 2)
+    assert scheduler.limit('a').limit == 2
+
+    # Within the cooldown, slow requests don't decrease it again
+    _request(scheduler, clock, 5)
+    assert scheduler.limit('a').limit == 2
+    clock.now += 10
+    _request(scheduler, clock, 10)
+    assert scheduler.limit('a').limit == 1
+
+def test_slot_under_target_latency():
+    clock = FakeClock()
+    scheduler = _scheduler(target_latency=1, clock=clock)
+    _request(scheduler, clock, 0.01)
+
+    # Much slower than the baseline, but under the target latency
+    _request(scheduler, clock, 0.5)
+    assert scheduler.limit('a').limit == 4
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.server import SubgraphServer
+from benchmarks.throughput import NETWORK, subgraph_endpoint
+from dao_analyzer.cache_scripts import config
+from dao_analyzer.cache_scripts.common.spill import SEGMENT_SUFFIX, SpillBuffer
+from dao_analyzer.cache_scripts.daohaus.runner import DaohausRunner
+from dao_analyzer.cache_scripts.metadata import CollectorRunStats
+
+def _page(start: int, n: int = 10, **kwargs) -> list[dict]:
+    return [{'id': f'0x{i:040x}', 'shares': i, 'moloch': {'id': f'0x{i % 3:040x}'}, **kwargs} for i in range(start, start + n)]
+
+def test_no_spill(tmp_path):
+    with SpillBuffer(tmp_path, 'daohaus/members', threshold=1000) as buffer:
+        buffer.append(_page(0), size=500)
+        buffer.append(_page(10), size=500)
+
+        assert not buffer.spilled
+        assert buffer.result() == _page(0, 20)
+    assert not list(tmp_path.iterdir())
+
+def test_spill_threshold(tmp_path):
+    with SpillBuffer(tmp_path, 'daohaus/members', threshold=1000) as buffer:
+        buffer.append(_page(0), size=600)
+        assert not buffer.spilled
+
+        buffer.append(_page(10), size=600)
+        assert buffer.spilled
+        assert [p.name for p in tmp_path.iterdir()] == [f'daohaus_members-0000{SEGMENT_SUFFIX}']
+
+        # The rows after the spill are read back too, flattened
+        buffer.append(_page(20), size=10)
+        result = buffer.result()
+        assert isinstance(result, pa.Table)
+        pd.testing.assert_frame_equal(result.to_pandas(), pd.json_normalize(_page(0, 30)))
+
+    assert not list(tmp_path.iterdir())
+
+def test_spill_pressure(tmp_path):
+    pressure = False
+    with SpillBuffer(tmp_path, 'members', threshold=0, pressure=lambda: pressure) as buffer:
+        buffer.append(_page(0), size=10**9)
+        assert not buffer.spilled
+
+        pressure = True
+        buffer.append(_page(10))
+        assert buffer.spilled
+        assert buffer.result().num_rows == 20
+
+def test_spill_schema_change(tmp_path):
+    with SpillBuffer(tmp_path, 'members', threshold=1) as buffer:
+        buffer.append(_page(0, loot=None), size=10)
+        buffer.append(_page(10, loot='5'), size=10)
+
+        # A column without values has another type, so it is written to a new segment
+        assert len(list(tmp_path.iterdir())) == 2
+        result = buffer.result()
+        assert result['loot'].to_pylist() == [None] * 10 + ['5'] * 10
+
+def _run_members(dw: Path) -> pd.DataFrame:
+    runner = DaohausRunner(dw)
+    runner.basedir.mkdir(parents=True)
+    c = next(c for c in runner.network_collectors(NETWORK) if c.name == 'members')
+    c._pbar_enabled = False
+    c.stats = CollectorRunStats()
+    c.run(force=True)
+    return c.df
+
+def test_collector_spill(tmp_path):
+    settings = config.get_settings()
+    prev = settings.SPILL_THRESHOLD
+
+    with SubgraphServer(rows=2500) as server, subgraph_endpoint(server.url):
+        expected = _run_members(tmp_path / 'memory')
+        settings.set('SPILL_THRESHOLD', 1)
+        try:
+            spilled = _run_members(tmp_path / 'spilled')
+        finally:
+            settings.set('SPILL_THRESHOLD', prev)
+
+    assert len(expected) == 2500
+    pd.testing.assert_frame_equal(spilled, expected)
+    assert not list((tmp_path / 'spilled' / '.cache' / 'spill').iterdir())
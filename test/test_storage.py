@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from dao_analyzer.cache_scripts import config, DataWarehouse
+from dao_analyzer.cache_scripts.common.common import NetworkCollector
+from dao_analyzer.cache_scripts.common.storage import ENCODING_KEY, read_df, read_arrow, write_df
+from dao_analyzer.cache_scripts.utils.export import write_csv
+
+class _Runner:
+    name = 'test'
+
+    def __init__(self, dw):
+        self.basedir = dw
+        self.cache = dw / '.cache'
+
+class _Collector(NetworkCollector):
+    CATEGORICAL_COLUMNS = ['outcome']
+
+    def run(self, force=False, **kwargs):
+        pass
+
+def _votes(ids, network='mainnet', seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': [f'v{i}' for i in ids],
+        'network': network,
+        'dao': rng.choice(['d0', 'd1', 'd2'], len(ids)),
+        'outcome': rng.choice(['Pass', 'Fail'], len(ids)),
+        'voter': [f'0x{i:040x}' for i in ids],
+    })
+
+def _decoded(df):
+    return df.astype({c: 'str' for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+def test_encoding(tmp_path):
+    df = _votes(range(5))
+    write_df(df, tmp_path / 'votes.arr', categorical=['outcome'])
+
+    # Only the declared column, as the others have too many distinct values
+    schema = read_arrow(tmp_path / 'votes.arr').schema
+    assert [f.name for f in schema if pa.types.is_dictionary(f.type)] == ['outcome']
+
+    df = _votes(range(1000))
+    write_df(df, tmp_path / 'votes.arr')
+    read = read_df(tmp_path / 'votes.arr')
+    assert {c for c in read.columns if isinstance(read[c].dtype, pd.CategoricalDtype)} == {'network', 'dao', 'outcome'}
+    pd.testing.assert_frame_equal(_decoded(read), df)
+
+def test_update_categorical(tmp_path):
+    runner = _Runner(tmp_path)
+    mainnet, xdai = _Collector('votes', runner, 'mainnet'), _Collector('votes', runner, 'xdai')
+
+    mainnet._update_data(_votes(range(1000)))
+    xdai._update_data(_votes(range(500), network='xdai'))
+    mainnet._update_data(_votes(range(900, 1100), seed=1))
+
+    expected = pd.concat([
+        _votes(range(1000)).iloc[:900],
+        _votes(range(900, 1100), seed=1),
+        _votes(range(500), network='xdai'),
+    ]).set_index(['network', 'id']).sort_index()
+    read = _decoded(read_df(mainnet.data_path)).set_index(['network', 'id']).sort_index()
+    pd.testing.assert_frame_equal(read, expected)
+    assert isinstance(read_df(mainnet.data_path)['outcome'].dtype, pd.CategoricalDtype)
+
+@pytest.fixture
+def binary_addresses():
+    config.settings.set('BINARY_ADDRESSES', True)
+    yield
+    config.settings.set('BINARY_ADDRESSES', False)
+
+def test_binary_addresses(tmp_path, binary_addresses):
+    runner = _Runner(tmp_path / 'daohaus')
+    runner.basedir.mkdir()
+    c = _Collector('votes', runner, 'mainnet')
+
+    df = _votes(range(1000))
+    df['id'] = [f'0x{i:064x}' for i in range(1000)]
+    df.loc[::7, 'voter'] = None
+    c._update_data(df.iloc[:600])
+    c._update_data(df.iloc[500:])
+
+    schema = pa.ipc.open_file(c.data_path).schema
+    assert schema.field('id').type == pa.binary(32)
+    assert schema.field('voter').type == pa.binary(20)
+    assert schema.field('voter').metadata[ENCODING_KEY] == b'address'
+    assert schema.field('dao').metadata is None
+
+    read = _decoded(read_df(c.data_path)).sort_values('id', ignore_index=True)
+    pd.testing.assert_frame_equal(read, df[read.columns])
+
+    dw = DataWarehouse(tmp_path)
+    voter = df['voter'].iloc[1]
+    pd.testing.assert_frame_equal(_decoded(dw.read('daohaus/votes', filter={'voter': voter})), df[df['voter'] == voter][read.columns].reset_index(drop=True))
+    assert dw.read_dao('daohaus/votes', ['d0'], key='dao', columns=['voter'])['voter'].dropna().str.startswith('0x').all()
+    # Scanning a binary column, which has no index
+    pd.testing.assert_frame_equal(_decoded(dw.read_dao('daohaus/votes', [voter, '0x01'], key='voter')), df[df['voter'] == voter][read.columns].reset_index(drop=True))
+
+    write_csv(c.data_path, tmp_path / 'votes.csv')
+    csv = pd.read_csv(tmp_path / 'votes.csv', index_col=0).sort_values('id', ignore_index=True)
+    assert csv['voter'].equals(read['voter'])
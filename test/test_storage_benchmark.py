@@ -0,0 +1,18 @@
+import pytest
+
+from benchmarks.storage import ENCODINGS, bench_layout, draw_layouts
+from dao_analyzer.cache_scripts import config
+
+def test_layouts_are_reproducible():
+    assert draw_layouts(3, random_seed=1) == draw_layouts(3, random_seed=1)
+    assert len(draw_layouts(3)) == 3
+
+@pytest.mark.parametrize('encoding', list(ENCODINGS))
+def test_bench_layout(encoding):
+    layout = draw_layouts(1)[0]
+    r = bench_layout(layout, rows=500, update_ratio=0.5, encoding=encoding, repeats=1)
+
+    assert r['encoding'] == encoding and not config.BINARY_ADDRESSES
+    assert r['columns'] == len(layout['columns']) + 3
+    assert all(r[f'{k}_seconds'] > 0 for k in ['merge', 'force', 'write', 'read'])
+    assert r['file_size'] > 0
@@ -0,0 +1,120 @@
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.server import ROWS_PER_DAO, SubgraphServer, address
+from benchmarks.throughput import NETWORK, subgraph_endpoint
+from dao_analyzer.cache_scripts import config
+from dao_analyzer.cache_scripts.common import thegraph
+from dao_analyzer.cache_scripts.common.common import NetworkRunner
+from dao_analyzer.cache_scripts.common.index import index_path
+from dao_analyzer.cache_scripts.common.thegraph import SubgraphMetaCache, TheGraphCollector
+from dao_analyzer.cache_scripts.daohaus.runner import DaohausRunner
+from dao_analyzer.cache_scripts.metadata import CollectorRunStats
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 1000
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_meta_cache_ttl():
+    clock = FakeClock()
+    cache = SubgraphMetaCache(clock)
+    fetched = []
+    fetch = lambda: fetched.append(1) or {'n': len(fetched)}  # noqa: E731
+
+    assert cache.get('a', fetch) == cache.get('a', fetch) == {'n': 1}
+    clock.now += SubgraphMetaCache.TTL
+    assert cache.get('a', fetch) == {'n': 1}
+
+    # Expired
+    clock.now += 1
+    assert cache.get('a', fetch) == {'n': 2}
+    # Other endpoints and refreshes are requested
+    assert cache.get('b', fetch) == {'n': 3}
+    assert cache.get('a', fetch, refresh=True) == {'n': 4}
+
+def test_meta_cache_collectors(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(thegraph, '_meta_cache', SubgraphMetaCache(clock))
+
+    requests = []
+    request_meta = TheGraphCollector._request_meta
+    def counting(self):
+        requests.append(self.collectorid)
+        return request_meta(self)
+    monkeypatch.setattr(TheGraphCollector, '_request_meta', counting)
+
+    with SubgraphServer(rows=10) as server, subgraph_endpoint(server.url):
+        collectors = [c for c in DaohausRunner(Path(tmp_path)).network_collectors(NETWORK) if isinstance(c, TheGraphCollector)]
+        assert len(collectors) > 1
+
+        # Every collector of the endpoint uses the same _meta
+        assert all(c.check_subgraph_health() for c in collectors)
+        assert len(requests) == 1
+
+        clock.now += SubgraphMetaCache.TTL + 1
+        assert all(c.check_subgraph_health() for c in collectors)
+        assert len(requests) == 2
+
+class _SlowCollector:
+    """ Takes some time to be verified, recording how many are verified at once """
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, i: int):
+        self.collectorid = f'slow/{i}'
+
+    def verify(self) -> bool:
+        cls = _SlowCollector
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.1)
+        with cls.lock:
+            cls.active -= 1
+        return self.collectorid != 'slow/3'
+
+def test_verify_concurrently():
+    settings = config.get_settings()
+    prev = settings.THE_GRAPH_MAX_CONCURRENCY
+    settings.set('THE_GRAPH_MAX_CONCURRENCY', 2)
+    try:
+        collectors = [_SlowCollector(i) for i in range(6)]
+        verified = NetworkRunner._verifyCollectors(collectors)
+    finally:
+        settings.set('THE_GRAPH_MAX_CONCURRENCY', prev)
+
+    # Up to THE_GRAPH_MAX_CONCURRENCY collectors are verified at once, keeping their order
+    assert _SlowCollector.peak == 2
+    assert verified == collectors[:3] + collectors[4:]
+
+def test_collector_indexes(tmp_path):
+    settings = config.get_settings()
+    prev = settings.daohaus.skip_names
+    settings.set('daohaus.skip_names', True)
+
+    try:
+        with SubgraphServer(rows=500) as server, subgraph_endpoint(server.url):
+            runner = DaohausRunner(Path(tmp_path))
+            runner.basedir.mkdir(parents=True)
+            collectors = {c.name: c for c in runner.network_collectors(NETWORK)}
+            for name in ['moloches', 'members']:
+                c = collectors[name]
+                c._pbar_enabled = False
+                c.stats = CollectorRunStats()
+                c.run(force=True)
+    finally:
+        settings.set('daohaus.skip_names', prev)
+
+    moloches, members = collectors['moloches'], collectors['members']
+    # A row per DAO, so the moloches are read scanning the column
+    assert not index_path(moloches.data_path, 'molochAddress').exists()
+    assert index_path(members.data_path, 'molochAddress').is_file()
+
+    dao = address(3)
+    assert moloches.read_dao(dao)['molochAddress'].tolist() == [dao]
+    assert len(members.read_dao(dao)) == ROWS_PER_DAO
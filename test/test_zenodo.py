@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import random
+import zipfile
+
+import pyarrow as pa
+import pyarrow.feather  # noqa: F401
+import pytest
+import requests
+
+from benchmarks.faults import FaultInjector, Scenario, ZenodoServer
+from dao_analyzer.cache_scripts.utils.export import export_dw
+from dao_analyzer.cache_scripts.utils.uploadDataWarehouse import archiveToZenodo
+from dao_analyzer.cache_scripts.utils.zenodo import ResumableUploader, split_parts
+
+def _uploader(server, tmp_path, **kwargs):
+    return ResumableUploader(1, 'token', base_url=server.url + 'api/', state_path=tmp_path / 'state.json', **kwargs)
+
+def test_split_parts(tmp_path):
+    (f := tmp_path / 'archive.zip').write_bytes(bytes(range(256)) * 10)
+
+    parts = split_parts([f], chunk_size=1000)
+    assert [p.name for p in parts] == ['archive.zip.part000', 'archive.zip.part001', 'archive.zip.part002']
+
+    data = b''
+    for p in parts:
+        with p:
+            data += p.read()
+    assert data == f.read_bytes()
+
+def test_upload_new_version(tmp_path):
+    (f := tmp_path / 'archive.zip').write_bytes(b'new data' * 1000)
+
+    with ZenodoServer({'archive.zip': b'old data', 'old.txt': b'removed'}) as server:
+        published = _uploader(server, tmp_path).upload([f])
+
+        assert published['id'] == 2 and published['submitted']
+        assert server.contents[2] == {'archive.zip': f.read_bytes()}
+        assert server.contents[1]['archive.zip'] == b'old data'
+        assert published['metadata']['version'] == '2'
+    assert not (tmp_path / 'state.json').exists()
+
+def test_upload_resumes(tmp_path):
+    (export := tmp_path / 'export').mkdir()
+    (export / 'members.parquet').write_bytes(random.Random(0).randbytes(100_000))
+
+    injector = FaultInjector(Scenario('flaky', faults={'503': 0.2}, seed=1))
+    with ZenodoServer(injector=injector) as server:
+        archiveToZenodo(export, max_retries=50, sleep_seconds=0, uploader=_uploader(server, tmp_path, chunk_size=8192))
+
+        assert injector.injected['503'] > 0
+        # Every part was uploaded once, to the same draft
+        assert set(server.uploads.values()) == {1}
+        assert len(server.depositions) == 2 and server.depositions[2]['submitted']
+
+        archive = b''.join(server.contents[2][k] for k in sorted(server.contents[2]))
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            assert zf.read('members.parquet') == (export / 'members.parquet').read_bytes()
+
+def test_upload_state(tmp_path):
+    (f := tmp_path / 'archive.zip').write_bytes(b'data' * 1000)
+
+    with ZenodoServer() as server:
+        _uploader(server, tmp_path, chunk_size=1024).upload([f], publish=False)
+        with open(tmp_path / 'state.json') as s:
+            state = json.load(s)
+        assert state['draft_id'] == 2 and len(state['files']) == 4
+
+        # Another process continues with the same draft
+        _uploader(server, tmp_path, chunk_size=1024).upload([f])
+        assert len(server.depositions) == 2 and server.depositions[2]['submitted']
+        assert set(server.uploads.values()) == {1}
+
+def test_upload_resumes_after_restart(tmp_path):
+    (dw := tmp_path / 'dw' / 'daohaus').mkdir(parents=True)
+    rng = random.Random(0)
+    pa.feather.write_feather(pa.table({'id': [rng.randbytes(16).hex() for _ in range(4000)]}), dw / 'members.arr')
+
+    export_dw(dw.parent, tmp_path / 'export1', jobs=1)
+    # The first run fails after uploading some parts
+    injector = FaultInjector(Scenario('restart', script=[None] * 8 + ['503'] * 5))
+    with ZenodoServer(injector=injector) as server:
+        with pytest.raises(requests.exceptions.HTTPError):
+            archiveToZenodo(tmp_path / 'export1', max_retries=1, sleep_seconds=0, uploader=_uploader(server, tmp_path, chunk_size=8192, workers=1))
+        uploaded = dict(server.uploads)
+        assert uploaded and (tmp_path / 'state.json').exists()
+
+        # The next run exports the datawarehouse again, into files with other dates
+        export = tmp_path / 'export2'
+        for f in export_dw(dw.parent, export, jobs=1):
+            os.utime(f, (1e9, 1e9))
+
+        server.injector = None
+        archiveToZenodo(export, max_retries=1, sleep_seconds=0, uploader=_uploader(server, tmp_path, chunk_size=8192))
+
+        # Same draft, and the parts of the first run were not uploaded again
+        assert len(server.depositions) == 2 and server.depositions[2]['submitted']
+        assert set(server.uploads.values()) == {1}
+        assert len(server.uploads) > len(uploaded)